@@ -0,0 +1,66 @@
+from datetime import date
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_current_active_user
+from app.db.base import TransactionType
+from app.db.shards import get_group_db
+from app.models.user import User as UserModel
+from app.schemas.analytics import AnalyticsBreakdown, AnalyticsPivot, Dimension
+from app.services.analytics_service import get_group_frame as svc_get_group_frame
+from app.services.group_service import is_user_member_in_group
+
+router = APIRouter(
+    tags=["Analytics"],
+)
+
+
+async def _frame(db: AsyncSession, group_id: UUID, user: UserModel):
+    if not await is_user_member_in_group(db, group_id, user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
+    return await svc_get_group_frame(db, group_id)
+
+
+@router.get(
+    '/groups/{group_id}/analytics',
+    response_model=AnalyticsBreakdown,
+    summary='Sums and counts grouped by any combination of dimensions'
+)
+async def get_breakdown(
+        group_id: UUID,
+        by: list[Dimension] = Query(..., min_length=1, max_length=4),
+        tx_type: TransactionType | None = Query(None),
+        date_from: date | None = Query(None),
+        date_to: date | None = Query(None),
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    frame = await _frame(db, group_id, current_user)
+    by = list(dict.fromkeys(by))
+    return {'by': by, 'rows': frame.named(frame.group_sum(by, tx_type, date_from, date_to))}
+
+
+@router.get(
+    '/groups/{group_id}/analytics/pivot',
+    response_model=AnalyticsPivot,
+    summary='Pivot table of sums (rows x columns)'
+)
+async def get_pivot(
+        group_id: UUID,
+        index: Dimension = Query('category'),
+        columns: Dimension = Query('month'),
+        tx_type: TransactionType | None = Query(None),
+        date_from: date | None = Query(None),
+        date_to: date | None = Query(None),
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    if index == columns:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='index and columns must differ')
+    frame = await _frame(db, group_id, current_user)
+    return {
+        **frame.pivot(index, columns, tx_type, date_from, date_to),
+        'names': {**frame.category_names, **frame.user_names},
+    }
@@ -1,9 +1,10 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.ratelimit import LoginLimiter, get_login_limiter
 from app.db.session import get_db
 from app.schemas.user import UserCreate, UserRead, Token
 from app.services.auth_service import (
@@ -39,9 +40,13 @@ async def register(
     summary='Obtain access token via username & password'
 )
 async def login_for_access_token(
+        request: Request,
         form_data: OAuth2PasswordRequestForm = Depends(),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        limiter: LoginLimiter = Depends(get_login_limiter)
 ):
+    # до запросов к БД и bcrypt
+    await limiter.check(request.client.host if request.client else None, form_data.username)
     user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
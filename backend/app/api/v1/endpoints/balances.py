@@ -0,0 +1,53 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_current_active_user
+from app.db.shards import get_group_db
+from app.models.user import User as UserModel
+from app.schemas.balance import GroupBalances, BalanceMismatch
+from app.services.balance_service import (
+    get_group_balances as svc_get_balances,
+    settle_up as svc_settle_up,
+    check_group_balances as svc_check_balances,
+)
+from app.services.group_service import is_user_member_in_group, is_user_admin_in_group
+
+router = APIRouter(
+    tags=["Balances"],
+)
+
+
+@router.get(
+    '/groups/{group_id}/balances',
+    response_model=GroupBalances,
+    summary='Member balances and settle-up plan'
+)
+async def get_balances(
+        group_id: UUID,
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    if not await is_user_member_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
+
+    balances = await svc_get_balances(db, group_id)
+    return {'group_id': group_id, 'members': balances, 'settle_up': svc_settle_up(balances)}
+
+
+@router.post(
+    '/groups/{group_id}/balances:check',
+    response_model=list[BalanceMismatch],
+    summary='Compare balances with transactions (admin-only)'
+)
+async def check_balances(
+        group_id: UUID,
+        repair: bool = False,
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    if not await is_user_admin_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Only group admin can check balances')
+
+    return await svc_check_balances(db, group_id, repair=repair)
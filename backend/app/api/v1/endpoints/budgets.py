@@ -0,0 +1,77 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_current_active_user
+from app.db.shards import get_budget_db, get_group_db
+from app.models.user import User as UserModel
+from app.schemas.budget import BudgetCreate, BudgetRead
+from app.services.budget_service import (
+    create_budget as svc_create_budget,
+    list_budgets as svc_list_budgets,
+    get_budget_by_id as svc_get_budget,
+    delete_budget as svc_delete_budget,
+    get_budget_status as svc_budget_status,
+)
+from app.services.group_service import is_user_member_in_group, is_user_admin_in_group
+
+router = APIRouter(
+    tags=["Budgets"],
+)
+
+
+@router.post(
+    '/groups/{group_id}/budgets',
+    response_model=BudgetRead,
+    status_code=status.HTTP_201_CREATED,
+    summary='Create a monthly budget (admin-only)'
+)
+async def create_budget(
+        group_id: UUID,
+        payload: BudgetCreate,
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    if not await is_user_admin_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Only group admin can manage budgets')
+
+    budget = await svc_create_budget(db, group_id, payload)
+    return await svc_budget_status(db, budget.id)
+
+
+@router.get(
+    '/groups/{group_id}/budgets',
+    response_model=list[BudgetRead],
+    summary='List budgets with spend for a month'
+)
+async def list_budgets(
+        group_id: UUID,
+        month: str | None = Query(None, pattern=r'^\d{4}-\d{2}$', description="'YYYY-MM', current month by default"),
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    if not await is_user_member_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
+
+    return await svc_list_budgets(db, group_id, month)
+
+
+@router.delete(
+    '/budgets/{budget_id}',
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary='Delete a budget (admin-only)'
+)
+async def delete_budget(
+        budget_id: UUID,
+        db: AsyncSession = Depends(get_budget_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    budget = await svc_get_budget(db, budget_id)
+    if not budget:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Budget not found')
+    if not await is_user_admin_in_group(db, budget.group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Only group admin can manage budgets')
+
+    await svc_delete_budget(db, budget)
+    return None
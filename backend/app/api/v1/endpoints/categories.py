@@ -1,20 +1,24 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import get_current_active_user
-from app.db.session import get_db
+from app.db.shards import get_category_db, get_group_db
 from app.models.user import User as UserModel
-from app.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate
+from app.schemas.category import CategoryCreate, CategoryRead, CategoryUpdate, CategoryMerge, CategoryMergeResult
 from app.services.category_service import (
     create_category as svc_create_category,
     list_categories_for_group as svc_list_categories,
     get_category_by_id as svc_get_category_by_id,
     update_category as svc_update_category,
     delete_category as svc_delete_category,
+    merge_categories as svc_merge_categories,
+    get_categories_version as svc_categories_version,
 )
 from app.services.group_service import is_user_member_in_group
+from app.utils.etag import make_etag, etag_matches, not_modified
+from app.utils.serialization import ModelListResponse
 
 router = APIRouter(
     tags=["Categories"],
@@ -30,7 +34,7 @@ router = APIRouter(
 async def create_category(
         group_id: UUID,
         payload: CategoryCreate,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_group_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
     if not await is_user_member_in_group(db, group_id, current_user.id):
@@ -46,13 +50,19 @@ async def create_category(
 )
 async def get_categories(
         group_id: UUID,
-        db: AsyncSession = Depends(get_db),
+        request: Request,
+        db: AsyncSession = Depends(get_group_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
     if not await is_user_member_in_group(db, group_id, current_user.id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
+
+    etag = make_etag('categories', group_id, *await svc_categories_version(db, group_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     categories = await svc_list_categories(db, group_id)
-    return categories
+    return ModelListResponse(categories, CategoryRead, headers={'ETag': etag})
 
 
 @router.patch(
@@ -63,7 +73,7 @@ async def get_categories(
 async def update_category_endpoint(
         category_id: UUID,
         payload: CategoryUpdate,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_category_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
     category = await svc_get_category_by_id(db, category_id)
@@ -83,7 +93,30 @@ async def update_category_endpoint(
 )
 async def delete_category_endpoint(
         category_id: UUID,
-        db: AsyncSession = Depends(get_db),
+        reassign_to: UUID | None = Query(None, description='Move transactions to this category first'),
+        db: AsyncSession = Depends(get_category_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    category = await svc_get_category_by_id(db, category_id)
+
+    if not category:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Category not found')
+    if not await is_user_member_in_group(db, category.group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
+
+    await svc_delete_category(db, category, reassign_to)
+    return None
+
+
+@router.post(
+    '/categories/{category_id}/merge',
+    response_model=CategoryMergeResult,
+    summary='Merge category into another one'
+)
+async def merge_category_endpoint(
+        category_id: UUID,
+        payload: CategoryMerge,
+        db: AsyncSession = Depends(get_category_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
     category = await svc_get_category_by_id(db, category_id)
@@ -93,5 +126,5 @@ async def delete_category_endpoint(
     if not await is_user_member_in_group(db, category.group_id, current_user.id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
 
-    await svc_delete_category(db, category)
-    return None
\ No newline at end of file
+    moved = await svc_merge_categories(db, category, payload.target_id)
+    return {'target_id': payload.target_id, 'moved': moved}
\ No newline at end of file
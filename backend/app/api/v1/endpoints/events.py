@@ -0,0 +1,53 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Header, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.events import broker, Subscription
+from app.core.security import get_current_active_user
+from app.db.shards import get_group_db
+from app.models.user import User as UserModel
+from app.services.group_service import is_user_member_in_group
+
+router = APIRouter(
+    tags=["Events"],
+)
+
+# Пауза перед переподключением EventSource после обрыва, мс
+RETRY_FRAME = b'retry: 3000\n\n'
+
+
+async def _stream(subscription: Subscription):
+    try:
+        yield RETRY_FRAME
+        async for frame in subscription.frames(settings.EVENTS_HEARTBEAT_SECONDS):
+            yield frame
+    finally:
+        broker.unsubscribe(subscription)
+
+
+@router.get(
+    '/groups/{group_id}/events',
+    response_class=StreamingResponse,
+    summary='Live stream of group transaction and membership events (SSE)'
+)
+async def stream_group_events(
+        group_id: UUID,
+        last_event_id: str | None = Header(None, alias='Last-Event-ID'),
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    if not await is_user_member_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
+    # соединение из пула не держим всё время жизни потока
+    await db.close()
+
+    # членство проверяется один раз; удалённого из группы broker отключит сам (member.removed)
+    subscription = broker.subscribe(group_id, last_event_id, current_user.id)
+    return StreamingResponse(
+        _stream(subscription),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -1,19 +1,31 @@
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.core.security import get_current_active_user
 from app.db.base import GroupRole
 from app.db.session import get_db
+from app.db.shards import (
+    ShardRouter,
+    get_shard_router,
+    get_group_db,
+    get_group_session_factory,
+    mirror_users,
+    mirror_users_by_emails,
+)
 from app.models.user import User as UserModel
+from app.schemas.bootstrap import GroupBootstrap
 from app.schemas.group import (
     GroupCreate,
     GroupRead,
     GroupUpdate,
     GroupAddUser,
+    GroupAddUsers,
+    GroupAddUserResult,
     UserGroupRead,
 )
+from app.services.bootstrap_service import get_group_bootstrap as svc_bootstrap
 from app.services.group_service import (
     create_group,
     get_group_by_id as svc_get_group,
@@ -21,10 +33,16 @@ from app.services.group_service import (
     update_group as svc_update_group,
     delete_group as svc_delete_group,
     add_user_to_group as svc_add_user,
+    add_users_to_group as svc_add_users,
     remove_user_from_group as svc_remove_user,
     change_user_role_in_group as svc_change_role,
     list_group_members as svc_list_members,
+    get_group_version as svc_group_version,
+    get_members_version as svc_members_version,
+    is_user_member_in_group,
 )
+from app.utils.etag import make_etag, etag_matches, not_modified
+from app.utils.serialization import ModelListResponse
 
 router = APIRouter(
     prefix="/groups",
@@ -41,9 +59,14 @@ router = APIRouter(
 async def create_group_endpoint(
         group_in: GroupCreate,
         db: AsyncSession = Depends(get_db),
+        router: ShardRouter = Depends(get_shard_router),
         current_user: UserModel = Depends(get_current_active_user)
 ):
-    group = await create_group(db, group_in, owner_id=current_user.id)
+    # id выбираем заранее: по нему определяется шард группы
+    group_id = uuid4()
+    async with router.session(router.shard_for(group_id), db) as group_db:
+        await mirror_users(group_db, [current_user])
+        group = await create_group(group_db, group_in, owner_id=current_user.id, group_id=group_id)
     return group
 
 
@@ -54,9 +77,13 @@ async def create_group_endpoint(
 )
 async def list_my_group(
         db: AsyncSession = Depends(get_db),
+        router: ShardRouter = Depends(get_shard_router),
         current_user: UserModel = Depends(get_current_active_user)
 ):
-    return await list_group_by_user(db, current_user.id)
+    # группы пользователя могут лежать на любых шардах — опрашиваем все параллельно
+    parts = await router.gather(db, list_group_by_user, current_user.id)
+    groups = [group for part in parts for group in part]
+    return ModelListResponse(groups, GroupRead)
 
 
 @router.get(
@@ -66,19 +93,50 @@ async def list_my_group(
 )
 async def get_group(
         group_id: UUID,
-        db: AsyncSession = Depends(get_db),
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_group_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
-    group = await svc_get_group(db, group_id)
-    if not group:
+    version = await svc_group_version(db, group_id)
+    if version is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Group not found')
 
-    is_member = any(m.user_id == current_user.id for m in await svc_list_members(db, group_id))
-    if not is_member and not current_user.is_admin:
+    if not current_user.is_admin and not await is_user_member_in_group(db, group_id, current_user.id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not enough rights')
+
+    etag = make_etag('group', group_id, *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    group = await svc_get_group(db, group_id)
+    response.headers['ETag'] = etag
     return group
 
 
+@router.get(
+    '/{group_id}/bootstrap',
+    response_model=GroupBootstrap,
+    summary='Group, members, categories, recent transactions and month summary in one request'
+)
+async def get_group_bootstrap(
+        group_id: UUID,
+        tx_limit: int = Query(50, ge=1, le=200),
+        db: AsyncSession = Depends(get_group_db),
+        session_factory: async_sessionmaker[AsyncSession] = Depends(get_group_session_factory),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    if not current_user.is_admin and not await is_user_member_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not enough rights')
+    # дальше запросы идут в своих сессиях; соединение этого запроса возвращаем в пул
+    await db.close()
+
+    bootstrap = await svc_bootstrap(session_factory, group_id, tx_limit)
+    if bootstrap is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Group not found')
+    return bootstrap
+
+
 @router.patch(
     '/{group_id}',
     response_model=GroupRead,
@@ -87,10 +145,10 @@ async def get_group(
 async def update_group(
         group_id: UUID,
         group_in: GroupUpdate,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_group_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
-    group = await svc_get_group(db, group_id)
+    group = await svc_get_group(db, group_id, with_members=False)
 
     if not group:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Group not found')
@@ -106,10 +164,10 @@ async def update_group(
 )
 async def delete_group(
         group_id: UUID,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_group_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
-    group = await svc_get_group(db, group_id)
+    group = await svc_get_group(db, group_id, with_members=False)
     if not group:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Group not found')
 
@@ -126,12 +184,30 @@ async def delete_group(
 async def add_member(
         group_id: UUID,
         payload: GroupAddUser,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_group_db),
+        users_db: AsyncSession = Depends(get_db),
 ):
+    await mirror_users_by_emails(db, users_db, [payload.email])
     membership = await svc_add_user(db, group_id, payload.email, payload.role)
     return membership
 
 
+@router.post(
+    '/{group_id}/members:bulk',
+    response_model=list[GroupAddUserResult],
+    summary='Add many members to group'
+)
+async def add_members_bulk(
+        group_id: UUID,
+        payload: GroupAddUsers,
+        db: AsyncSession = Depends(get_group_db),
+        users_db: AsyncSession = Depends(get_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    await mirror_users_by_emails(db, users_db, payload.emails)
+    return await svc_add_users(db, group_id, payload.emails, current_user, payload.role)
+
+
 @router.get(
     '/{group_id}/members',
     response_model=list[UserGroupRead],
@@ -139,13 +215,19 @@ async def add_member(
 )
 async def list_members(
         group_id: UUID,
-        db: AsyncSession = Depends(get_db),
+        request: Request,
+        db: AsyncSession = Depends(get_group_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
-    members = await svc_list_members(db, group_id)
-    if not any(m.user_id == current_user.id for m in members):
+    if not await is_user_member_in_group(db, group_id, current_user.id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
-    return members
+
+    etag = make_etag('members', group_id, *await svc_members_version(db, group_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    members = await svc_list_members(db, group_id)
+    return ModelListResponse(members, UserGroupRead, headers={'ETag': etag})
 
 
 @router.patch(
@@ -157,7 +239,7 @@ async def change_member_role(
         group_id: UUID,
         user_id: UUID,
         new_role: GroupRole,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_group_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
     membership = await svc_change_role(db, group_id, user_id, new_role, current_user)
@@ -173,7 +255,7 @@ async def change_member_role(
 async def remove_member(
         group_id: UUID,
         user_id: UUID,
-        db: AsyncSession = Depends(get_db),
+        db: AsyncSession = Depends(get_group_db),
         current_user: UserModel = Depends(get_current_active_user)
 ):
     await svc_remove_user(db, group_id, user_id, current_user)
@@ -0,0 +1,64 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_current_active_user
+from app.db.shards import get_group_db, get_recurring_db
+from app.models.user import User as UserModel
+from app.schemas.recurring import RecurringCreate, RecurringRead
+from app.services.group_service import is_user_member_in_group
+from app.services.recurring_service import (
+    create_recurring as svc_create_recurring,
+    list_recurring as svc_list_recurring,
+    deactivate_recurring as svc_deactivate_recurring,
+)
+
+router = APIRouter(
+    tags=["Recurring transactions"],
+)
+
+
+@router.post(
+    '/groups/{group_id}/recurring',
+    response_model=RecurringRead,
+    status_code=status.HTTP_201_CREATED,
+    summary='Create a recurring transaction'
+)
+async def create_recurring(
+        group_id: UUID,
+        payload: RecurringCreate,
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    return await svc_create_recurring(db, group_id, payload, current_user.id)
+
+
+@router.get(
+    '/groups/{group_id}/recurring',
+    response_model=list[RecurringRead],
+    summary='List recurring transactions of a group'
+)
+async def list_recurring(
+        group_id: UUID,
+        db: AsyncSession = Depends(get_group_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    if not await is_user_member_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not a group member')
+
+    return await svc_list_recurring(db, group_id)
+
+
+@router.delete(
+    '/recurring/{recurring_id}',
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary='Stop a recurring transaction'
+)
+async def deactivate_recurring(
+        recurring_id: UUID,
+        db: AsyncSession = Depends(get_recurring_db),
+        current_user: UserModel = Depends(get_current_active_user)
+):
+    await svc_deactivate_recurring(db, recurring_id, current_user.id)
+    return None
@@ -3,17 +3,21 @@ from datetime import date
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import get_current_active_user
 from app.db.base import TransactionType
 from app.db.session import get_db
+from app.db.shards import ShardRouter, get_shard_router, get_group_db, get_transaction_db
 from app.models.user import User as UserModel
 from app.schemas.transaction import (
     TransactionCreate,
     TransactionRead,
     TransactionUpdate,
+    TransactionBatch,
+    TransactionBatchResult,
+    TransactionSearchPage,
 )
 from app.services.category_service import get_category_by_id
 from app.services.group_service import is_user_member_in_group
@@ -21,10 +25,15 @@ from app.services.transaction_service import (
     create_transaction as svc_create,
     get_transaction_by_id as svc_get,
     list_transactions as svc_list,
-    update_transaction as svc_update,
-    delete_transaction as svc_delete,
+    update_transaction_by_id as svc_update,
+    delete_transaction_by_id as svc_delete,
     check_transaction_permission,
+    get_transactions_version as svc_version,
+    batch_transactions as svc_batch,
+    search_transactions as svc_search,
 )
+from app.utils.etag import make_etag, etag_matches, not_modified
+from app.utils.serialization import ModelListResponse
 
 router = APIRouter(
     tags=["Transactions"]
@@ -40,17 +49,20 @@ router = APIRouter(
 async def create_transaction_endpoint(
         payload: TransactionCreate,
         db: AsyncSession = Depends(get_db),
+        router: ShardRouter = Depends(get_shard_router),
         current_user: UserModel = Depends(get_current_active_user)
 ):
-    if not await is_user_member_in_group(db, payload.group_id, current_user.id):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a group member")
+    # группа приходит в теле запроса, поэтому шард выбирается здесь, а не в зависимости
+    async with router.session(router.shard_for(payload.group_id), db) as db:
+        if not await is_user_member_in_group(db, payload.group_id, current_user.id):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a group member")
 
-    category = await get_category_by_id(db, payload.category_id)
-    if not category or category.group_id != payload.group_id:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="Category does not belong to specified group")
+        category = await get_category_by_id(db, payload.category_id)
+        if not category or category.group_id != payload.group_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Category does not belong to specified group")
 
-    return await svc_create(db, payload, current_user.id)
+        return await svc_create(db, payload, current_user.id)
 
 
 
@@ -60,6 +72,7 @@ async def create_transaction_endpoint(
     summary="List transactions in a group",
 )
 async def list_transactions_endpoint(
+    request: Request,
     group_id: UUID = Query(..., description="UUID of the group"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
@@ -68,13 +81,19 @@ async def list_transactions_endpoint(
     date_from: date | None = Query(None),
     date_to:   date | None = Query(None),
     tx_type:   TransactionType | None  = Query(None, description="'income' or 'expense'"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_group_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
     if not await is_user_member_in_group(db, group_id, current_user.id):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a group member")
 
-    return await svc_list(
+    # версия всей группы + параметры выборки: любое изменение в группе меняет ETag
+    version = await svc_version(db, group_id)
+    etag = make_etag("transactions", str(request.query_params), *version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    txs = await svc_list(
         db,
         group_id=group_id,
         skip=skip,
@@ -85,6 +104,43 @@ async def list_transactions_endpoint(
         date_to=date_to,
         tx_type=tx_type,
     )
+    return ModelListResponse(txs, TransactionRead, headers={"ETag": etag})
+
+
+@router.get(
+    "/transactions/search",
+    response_model=TransactionSearchPage,
+    summary="Search transactions by description",
+)
+async def search_transactions_endpoint(
+    group_id: UUID = Query(..., description="UUID of the group"),
+    q: str = Query(..., min_length=1, max_length=200, description="Search text"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    user_id: UUID | None = Query(None, description="Filter by author UUID"),
+    category_id: UUID | None = Query(None, description="Filter by category UUID"),
+    date_from: date | None = Query(None),
+    date_to:   date | None = Query(None),
+    tx_type:   TransactionType | None  = Query(None, description="'income' or 'expense'"),
+    db: AsyncSession = Depends(get_group_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    if not await is_user_member_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a group member")
+
+    items, next_cursor = await svc_search(
+        db,
+        group_id=group_id,
+        q=q,
+        limit=limit,
+        cursor=cursor,
+        user_id=user_id,
+        category_id=category_id,
+        date_from=date_from,
+        date_to=date_to,
+        tx_type=tx_type,
+    )
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.get(
@@ -94,7 +150,7 @@ async def list_transactions_endpoint(
 )
 async def get_transaction_endpoint(
     tx_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_transaction_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
     tx = await svc_get(db, tx_id)
@@ -115,14 +171,10 @@ async def get_transaction_endpoint(
 async def update_transaction_endpoint(
     tx_id: UUID,
     payload: TransactionUpdate,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_transaction_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
-    tx = await svc_get(db, tx_id)
-    if not tx:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
-
-    updated = await svc_update(db, tx, payload, current_user.id)
+    updated = await svc_update(db, tx_id, payload, current_user.id)
     return updated
 
 
@@ -133,16 +185,31 @@ async def update_transaction_endpoint(
 )
 async def delete_transaction_endpoint(
     tx_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_transaction_db),
     current_user: UserModel = Depends(get_current_active_user),
 ):
     """
     Удаляет транзакцию (hard delete).
     Разрешено автору или админам группы.
     """
-    tx = await svc_get(db, tx_id)
-    if not tx:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
+    await svc_delete(db, tx_id, current_user.id)
+    return None
 
-    await svc_delete(db, tx, current_user.id)
-    return None
\ No newline at end of file
+
+@router.post(
+    "/groups/{group_id}/transactions:batch",
+    response_model=TransactionBatchResult,
+    summary="Apply one operation to many transactions",
+)
+async def batch_transactions_endpoint(
+    group_id: UUID,
+    payload: TransactionBatch,
+    db: AsyncSession = Depends(get_group_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    Удаляет, перекатегоризирует, меняет тип или сдвигает дату у набора транзакций
+    одним запросом. Админ группы — любые транзакции, участник — только свои.
+    """
+    affected = await svc_batch(db, group_id, payload, current_user.id)
+    return {"op": payload.op, "affected": affected}
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import get_current_active_user, get_current_active_admin
 from app.db.session import get_db
+from app.db.shards import ShardRouter, get_shard_router
 from app.models.user import User as UserModel
 from app.schemas.user import (
     UserCreate,
@@ -18,6 +19,7 @@ from app.services.user_service import (
     update_user,
     delete_user,
 )
+from app.utils.serialization import ModelListResponse
 
 router = APIRouter(
     prefix="/users",
@@ -53,7 +55,8 @@ async def list_users_endpoint(
             status_code=status.HTTP_403_FORBIDDEN,
             detail='Not enough rights'
         )
-    return await list_users(db)
+    users = await list_users(db)
+    return ModelListResponse(users, UserRead)
 
 
 @router.get(
@@ -94,12 +97,14 @@ async def update_user_endpoint(
     user_id: UUID,
     user_in: UserUpdate,
     db: AsyncSession = Depends(get_db),
+    router: ShardRouter = Depends(get_shard_router),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     user = await svc_get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found')
     updated = await update_user(db, user, user_in, current_user)
+    await router.sync_user(db, updated)
     return updated
 
 
@@ -111,10 +116,12 @@ async def update_user_endpoint(
 async def delete_user_endpoint(
     user_id: UUID,
     db: AsyncSession = Depends(get_db),
+    router: ShardRouter = Depends(get_shard_router),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     user = await svc_get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='User not found')
     await delete_user(db, user, current_user)
+    await router.sync_user(db, user)
     return
\ No newline at end of file
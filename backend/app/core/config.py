@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -19,6 +20,10 @@ class Settings(BaseSettings):
 
     SQLALCHEMY_ECHO: bool = True
 
+    # базы шардов 1..N для групп (postgresql+asyncpg://...); основная база — шард 0
+    DATABASE_SHARD_URLS: list[str] = []
+    SHARD_VIRTUAL_NODES: int = 64
+
     PROJECT_NAME: str
     VERSION: str
     OPENAPI_URL: str = "/api/v1/openapi.json"
@@ -28,6 +33,74 @@ class Settings(BaseSettings):
     HOST: str = "localhost"
     PORT: int = 8000
     DEBUG: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    # пустая строка — только консоль (так запускаются тесты, см. tests/conftest.py)
+    LOG_FILE: str = "logs/app.log"
+    LOG_ENQUEUE: bool = True
+    LOG_JSON: bool = False
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0
+    # значения локальных переменных в трейсбэках: только для отладки, в логах окажутся токены и пароли
+    LOG_DIAGNOSE: bool = False
+
+    RECURRING_SCHEDULER_ENABLED: bool = True
+    RECURRING_INTERVAL_SECONDS: float = 60.0
+
+    # memory — рассылка внутри процесса, postgres — LISTEN/NOTIFY между воркерами
+    EVENTS_BACKEND: Literal['memory', 'postgres'] = 'memory'
+    EVENTS_REPLAY_SIZE: int = 256
+    EVENTS_QUEUE_SIZE: int = 1000
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    # переподключение слушающего соединения postgres: пауза растёт вдвое от BASE до MAX
+    EVENTS_RECONNECT_BASE_SECONDS: float = 0.5
+    EVENTS_RECONNECT_MAX_SECONDS: float = 30.0
+
+    # лимит попыток входа (корзины токенов на IP и на email); memory — счёт в каждом воркере,
+    # postgres — общая таблица rate_limit_buckets
+    LOGIN_RATE_BACKEND: Literal['memory', 'postgres'] = 'memory'
+    LOGIN_RATE_IP_CAPACITY: int = 30
+    LOGIN_RATE_IP_PER_MINUTE: float = 10.0
+    LOGIN_RATE_EMAIL_CAPACITY: int = 10
+    LOGIN_RATE_EMAIL_PER_MINUTE: float = 2.0
+    # сколько проверок bcrypt выполняется одновременно (в потоках, вне цикла событий)
+    LOGIN_MAX_CONCURRENT_VERIFIES: int = 4
+
+    # сколько вызывающий ждёт общего вычисления отчёта или сводки
+    SINGLEFLIGHT_TIMEOUT_SECONDS: float = 30.0
+    # сколько /bootstrap выполняется одновременно: каждый занимает до 6 соединений пула
+    # (5 частей и общее вычисление сводки), остальные ждут очереди
+    BOOTSTRAP_MAX_CONCURRENT: int = 2
+
+    # кэш колоночных снимков транзакций групп для аналитики и отчётов
+    SNAPSHOT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    SNAPSHOT_CHECK_SECONDS: float = 5.0
+    SNAPSHOT_WATERMARK_OVERLAP_SECONDS: float = 60.0
+
+    # очередь фоновых задач (таблица jobs)
+    JOBS_WORKER_ENABLED: bool = True
+    JOBS_CONCURRENCY: int = 4
+    JOBS_POLL_SECONDS: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_VISIBILITY_TIMEOUT_SECONDS: float = 300.0
+    JOBS_RETRY_BASE_SECONDS: float = 10.0
+    JOBS_RETRY_MAX_SECONDS: float = 60 * 60
+
+    # помесячные секции transactions (Postgres): сколько месяцев вперёд создавать заранее
+    TRANSACTION_PARTITIONS_AHEAD_MONTHS: int = 3
+    TRANSACTION_PARTITIONS_INTERVAL_SECONDS: float = 24 * 60 * 60
+
+    # архив закрытых лет в Parquet: в transactions остаются текущий и ARCHIVE_KEEP_YEARS прошлых лет
+    ARCHIVE_DIR: str = "archive"
+    ARCHIVE_KEEP_YEARS: int = 2
+    ARCHIVE_SCHEDULER_ENABLED: bool = False
+    ARCHIVE_INTERVAL_SECONDS: float = 24 * 60 * 60
+
+    # окончательное удаление групп и пользователей через PURGE_RETENTION_DAYS после soft delete
+    PURGE_RETENTION_DAYS: int = 30
+    PURGE_BATCH_ROWS: int = 1000
+    PURGE_BATCH_PAUSE_SECONDS: float = 0.2
+    PURGE_SCHEDULER_ENABLED: bool = True
+    PURGE_INTERVAL_SECONDS: float = 24 * 60 * 60
 
     @property
     def database_url_asyncpg(self):
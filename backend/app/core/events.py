@@ -0,0 +1,369 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import OrderedDict, deque
+from functools import partial
+from typing import AsyncIterator, Callable
+
+import asyncpg
+import orjson
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.utils.serialization import ORJSON_OPTIONS
+
+# Канал LISTEN/NOTIFY, общий для всех воркеров
+NOTIFY_CHANNEL = 'group_events'
+# pg_notify принимает payload до 8000 байт
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+_PENDING_KEY = 'after_commit_callbacks'
+_counter = itertools.count()
+
+
+def _next_event_id() -> str:
+    """Id события: время публикации и счётчик процесса — уникален и растёт во времени."""
+    return f'{time.time_ns():x}-{next(_counter):x}'
+
+
+def _frame(event_id: str, event_type: str, data: object) -> bytes:
+    """Кодирует событие в кадр text/event-stream."""
+    payload = orjson.dumps(data, default=float, option=ORJSON_OPTIONS)
+    return b'id: %s\nevent: %s\ndata: %s\n\n' % (event_id.encode(), event_type.encode(), payload)
+
+
+# Кадр для клиента, чей Last-Event-ID уже вытеснен из буфера: состояние нужно перечитать
+RESET_FRAME = b'event: reset\ndata: {}\n\n'
+HEARTBEAT_FRAME = b': ping\n\n'
+
+# Ошибки, после которых соединение с Postgres нужно открыть заново
+_CONNECTION_ERRORS = (asyncpg.PostgresError, asyncpg.InterfaceError, OSError)
+
+
+class Subscription:
+    """
+    Подписка одного клиента на события группы.
+
+    Очередь ограничена: если клиент не успевает читать, подписка помечается
+    переполненной, новые события в неё больше не кладутся, а поток
+    завершается после уже накопленных. Клиент переподключается
+    с Last-Event-ID и дочитывает пропущенное из буфера.
+
+    Подписка пользователя user_id закрывается, когда его удаляют из группы
+    (событие member.removed): поток завершается этим событием.
+    """
+
+    def __init__(self, group_id: str, replay: list[bytes], maxsize: int, user_id: str | None = None) -> None:
+        self.group_id = group_id
+        self.user_id = user_id
+        self.replay = replay
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def push(self, frame: bytes) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def close(self) -> None:
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def frames(self, heartbeat: float) -> AsyncIterator[bytes]:
+        """
+        Кадры для StreamingResponse: сначала пропущенные события, затем новые.
+
+        :param heartbeat: через сколько секунд тишины отправлять комментарий-пинг
+        """
+        for frame in self.replay:
+            yield frame
+        while True:
+            if self.overflowed and self.queue.empty():
+                return
+            try:
+                frame = await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT_FRAME
+                continue
+            if frame is None:
+                return
+            yield frame
+
+
+class EventBroker:
+    """
+    Рассылка событий групп подписчикам этого процесса.
+
+    На каждую группу хранится ограниченный буфер последних событий для
+    повтора по Last-Event-ID; буферы неактивных групп вытесняются (LRU).
+    Все методы синхронные и вызываются из цикла событий, поэтому
+    подписка и повтор из буфера не пересекаются с доставкой.
+    """
+
+    def __init__(self, replay_size: int = 256, queue_size: int = 1000, max_groups: int = 10000) -> None:
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self.max_groups = max_groups
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._history: OrderedDict[str, deque[tuple[str, bytes]]] = OrderedDict()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.close()
+
+    def publish(self, group_id: uuid.UUID | str, event_type: str, data: dict) -> None:
+        """
+        Публикует событие группы.
+
+        :param group_id: UUID группы
+        :param event_type: тип события, например transaction.created
+        :param data: компактное тело события
+        """
+        self._send({'id': _next_event_id(), 'type': event_type, 'group_id': str(group_id), 'data': data})
+
+    def _send(self, message: dict) -> None:
+        self._deliver(message)
+
+    def _deliver(self, message: dict) -> None:
+        group_id = message['group_id']
+        frame = _frame(message['id'], message['type'], message['data'])
+
+        history = self._history.get(group_id)
+        if history is None:
+            history = self._history[group_id] = deque(maxlen=self.replay_size)
+            if len(self._history) > self.max_groups:
+                self._history.popitem(last=False)
+        else:
+            self._history.move_to_end(group_id)
+        history.append((message['id'], frame))
+
+        removed = str(message['data'].get('user_id')) if message['type'] == 'member.removed' else None
+        for subscription in self._subscribers.get(group_id, ()):
+            subscription.push(frame)
+            if removed is not None and subscription.user_id == removed:
+                subscription.close()
+
+    def subscribe(
+            self,
+            group_id: uuid.UUID | str,
+            last_event_id: str | None = None,
+            user_id: uuid.UUID | str | None = None
+    ) -> Subscription:
+        """
+        Подписывает клиента на события группы.
+
+        :param group_id: UUID группы
+        :param last_event_id: id последнего полученного события (при переподключении)
+        :param user_id: UUID подписчика: его поток закрывается при удалении из группы
+        :return: подписка; после отключения клиента — unsubscribe
+        """
+        group_id = str(group_id)
+        replay = []
+        if last_event_id:
+            history = list(self._history.get(group_id, ()))
+            position = next((i for i, (event_id, _) in enumerate(history) if event_id == last_event_id), None)
+            replay = [RESET_FRAME] if position is None else [frame for _, frame in history[position + 1:]]
+
+        subscription = Subscription(group_id, replay, self.queue_size, str(user_id) if user_id else None)
+        self._subscribers.setdefault(group_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscribers.get(subscription.group_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[subscription.group_id]
+
+
+class PostgresEventBroker(EventBroker):
+    """
+    Рассылка между воркерами через Postgres LISTEN/NOTIFY.
+
+    Событие уходит в pg_notify и доставляется подписчикам каждого воркера
+    (включая публикующий) из уведомления, поэтому порядок событий и буферы
+    повтора у всех воркеров совпадают.
+
+    Если слушающее соединение разорвано (рестарт или failover базы),
+    оно переподключается с растущей паузой. Уведомления, отправленные
+    без слушателя, потеряны: после переподключения буферы повтора
+    сбрасываются, а подписчики получают RESET_FRAME и перечитывают состояние.
+    """
+
+    def __init__(
+            self,
+            dsn: str,
+            reconnect_base: float = 0.5,
+            reconnect_max: float = 30.0,
+            **kwargs
+    ) -> None:
+        super().__init__(**kwargs)
+        self.dsn = dsn
+        self.reconnect_base = reconnect_base
+        self.reconnect_max = reconnect_max
+        self._outbox: asyncio.Queue[str] = asyncio.Queue()
+        self._listener: asyncpg.Connection | None = None
+        self._sender: asyncio.Task | None = None
+        self._reconnector: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        await self._listen()
+        self._sender = asyncio.create_task(self._send_loop(), name='group-events-notify')
+
+    async def stop(self) -> None:
+        await super().stop()
+        for task in (self._sender, self._reconnector):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._sender = self._reconnector = None
+        if self._listener is not None:
+            # закрытие при остановке — не обрыв, переподключаться не нужно
+            self._listener.remove_termination_listener(self._on_terminated)
+            await self._listener.close()
+            self._listener = None
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+        except BaseException:
+            connection.terminate()
+            raise
+        connection.add_termination_listener(self._on_terminated)
+        self._listener = connection
+
+    def _on_terminated(self, connection) -> None:
+        if connection is self._listener and self._reconnector is None:
+            logger.warning('Group events listener connection lost, reconnecting')
+            self._reconnector = asyncio.create_task(self._reconnect(), name='group-events-reconnect')
+
+    async def _reconnect(self) -> None:
+        delay = self.reconnect_base
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+                break
+            except _CONNECTION_ERRORS:
+                logger.exception('Group events listener reconnect failed')
+                delay = min(delay * 2, self.reconnect_max)
+        self._reconnector = None
+        logger.info('Group events listener reconnected')
+        # пропущенных событий нет ни в буферах, ни в очередях: клиенты перечитывают состояние
+        self._history.clear()
+        for subscriptions in self._subscribers.values():
+            for subscription in subscriptions:
+                subscription.push(RESET_FRAME)
+
+    def _send(self, message: dict) -> None:
+        payload = orjson.dumps(message, default=float, option=ORJSON_OPTIONS)
+        if len(payload) > NOTIFY_PAYLOAD_LIMIT:
+            # длинное описание и т.п. не влезает в NOTIFY — клиент дочитает объект по id
+            message = {**message, 'data': {'id': message['data'].get('id')}}
+            payload = orjson.dumps(message, default=float, option=ORJSON_OPTIONS)
+        self._outbox.put_nowait(payload.decode())
+
+    async def _connect(self) -> asyncpg.Connection:
+        """Открывает соединение, повторяя попытки с растущей паузой."""
+        delay = self.reconnect_base
+        while True:
+            try:
+                return await asyncpg.connect(self.dsn)
+            except _CONNECTION_ERRORS:
+                logger.exception('Group events connection failed')
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.reconnect_max)
+
+    async def _send_loop(self) -> None:
+        # отдельное соединение: на слушающем нельзя выполнять запросы параллельно с уведомлениями
+        connection = await self._connect()
+        try:
+            while True:
+                payload = await self._outbox.get()
+                try:
+                    await connection.execute('SELECT pg_notify($1, $2)', NOTIFY_CHANNEL, payload)
+                except _CONNECTION_ERRORS:
+                    logger.exception('Group event notify failed')
+                    if connection.is_closed():
+                        connection = await self._connect()
+        finally:
+            await connection.close()
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        self._deliver(orjson.loads(payload))
+
+
+def create_broker() -> EventBroker:
+    options = dict(
+        replay_size=settings.EVENTS_REPLAY_SIZE,
+        queue_size=settings.EVENTS_QUEUE_SIZE,
+    )
+    if settings.EVENTS_BACKEND == 'postgres':
+        dsn = settings.database_url_asyncpg.replace('+asyncpg', '')
+        return PostgresEventBroker(
+            dsn,
+            reconnect_base=settings.EVENTS_RECONNECT_BASE_SECONDS,
+            reconnect_max=settings.EVENTS_RECONNECT_MAX_SECONDS,
+            **options,
+        )
+    return EventBroker(**options)
+
+
+broker = create_broker()
+
+
+def on_commit(db: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Вызывает callback после успешного коммита сессии; при откате он отбрасывается.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param callback: синхронная функция без аргументов
+    """
+    db.sync_session.info.setdefault(_PENDING_KEY, []).append(callback)
+
+
+def publish_after_commit(db: AsyncSession, group_id: uuid.UUID, event_type: str, data: dict) -> None:
+    """
+    Откладывает публикацию события до успешного коммита сессии.
+
+    При откате событие отбрасывается, поэтому подписчики не видят
+    изменений, которых нет в БД.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param event_type: тип события
+    :param data: компактное тело события
+    """
+    on_commit(db, partial(broker.publish, group_id, event_type, data))
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_pending(session: Session) -> None:
+    for callback in session.info.pop(_PENDING_KEY, ()):
+        # коммит уже прошёл — ошибка побочного действия не должна выглядеть как ошибка записи
+        try:
+            callback()
+        except Exception:
+            logger.exception('After-commit callback failed')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
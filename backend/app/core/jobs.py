@@ -0,0 +1,342 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+from pydantic_core import to_jsonable_python
+from sqlalchemy import select, update, func, or_, and_, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.events import on_commit
+from app.db.base import JobStatus
+from app.models.job import Job
+
+# Сериализует выбор задач с лимитом параллельности между воркерами (Postgres)
+_LOCK_KEY = 0x6A6F6273  # 'jobs'
+
+
+class JobHandler:
+    def __init__(
+            self,
+            kind: str,
+            func: Callable[..., Awaitable[Any]],
+            concurrency: int | None,
+            max_attempts: int,
+            visibility_timeout: float
+    ) -> None:
+        self.kind = kind
+        self.func = func
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+
+
+HANDLERS: dict[str, JobHandler] = {}
+# Воркеры этого процесса: enqueue будит их сразу после commit, не дожидаясь опроса
+_workers: set['JobWorker'] = set()
+
+
+def job(
+        kind: str,
+        *,
+        concurrency: int | None = None,
+        max_attempts: int | None = None,
+        visibility_timeout: float | None = None
+):
+    """
+    Регистрирует корутину как обработчик задач kind.
+
+    Обработчик вызывается как func(db, **payload) в отдельной сессии; если
+    в payload есть group_id — в сессии шарда группы. Возвращённое значение
+    сохраняется в jobs.result. Исключение — неудачная попытка: задача
+    повторяется с экспоненциальной паузой, пока не кончатся попытки.
+
+    :param kind: имя задачи
+    :param concurrency: сколько задач kind выполняется одновременно во всех воркерах
+    :param max_attempts: попыток до статуса failed (по умолчанию JOBS_MAX_ATTEMPTS)
+    :param visibility_timeout: через сколько секунд без продления задачу упавшего воркера заберёт другой
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        if kind in HANDLERS:
+            raise ValueError(f'Job handler {kind} is already registered')
+        HANDLERS[kind] = JobHandler(
+            kind, func, concurrency,
+            max_attempts or settings.JOBS_MAX_ATTEMPTS,
+            visibility_timeout or settings.JOBS_VISIBILITY_TIMEOUT_SECONDS,
+        )
+        return func
+
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _wake_workers() -> None:
+    for worker in _workers:
+        worker.wake()
+
+
+def retry_delay(attempts: int) -> float:
+    """Пауза в секундах перед следующей попыткой после attempts неудачных."""
+    return min(settings.JOBS_RETRY_MAX_SECONDS, settings.JOBS_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+async def enqueue(
+        db: AsyncSession,
+        kind: str,
+        payload: dict | None = None,
+        *,
+        priority: int = 0,
+        delay: float = 0,
+        commit: bool = True
+) -> Job:
+    """
+    Ставит задачу в очередь.
+
+    С commit=False задача добавляется в текущую транзакцию и попадёт в
+    очередь только вместе с остальными изменениями вызывающего кода.
+
+    :param db: асинхронная сессия основной базы
+    :param kind: имя зарегистрированного обработчика
+    :param payload: аргументы обработчика (UUID и даты сохраняются строками)
+    :param priority: меньше — раньше
+    :param delay: не запускать раньше чем через delay секунд
+    :param commit: зафиксировать транзакцию
+    :return: созданная задача
+    :raises ValueError: если обработчик kind не зарегистрирован
+    """
+    handler = HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f'Unknown job kind: {kind}')
+
+    job = Job(
+        kind=kind,
+        payload=to_jsonable_python(payload or {}),
+        priority=priority,
+        max_attempts=handler.max_attempts,
+        run_at=_now() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    on_commit(db, _wake_workers)
+    if commit:
+        await db.commit()
+    else:
+        await db.flush()
+    return job
+
+
+class JobWorker:
+    """
+    Выполняет задачи из таблицы jobs в текущем процессе.
+
+    Задачи выбираются через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+    воркеры разных процессов не берут одну задачу дважды и не ждут друг
+    друга. Пока задача выполняется, её locked_until продлевается; если
+    процесс упал, после visibility timeout задачу заберёт другой воркер.
+    На SQLite FOR UPDATE не используется — там запись и так одна.
+    """
+
+    def __init__(
+            self,
+            session_factory: async_sessionmaker[AsyncSession],
+            router=None,
+            concurrency: int = 4,
+            poll_interval: float = 1.0,
+            name: str | None = None
+    ) -> None:
+        self.session_factory = session_factory
+        self.router = router
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = (name or f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}')[-64:]
+        self._running: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def claim(self, limit: int) -> list[tuple]:
+        """
+        Забирает до limit готовых задач: queued с наступившим run_at
+        и running с истёкшим locked_until (их воркер пропал).
+
+        :return: кортежи (id, kind, payload, attempts, max_attempts)
+        """
+        now = _now()
+        kinds = list(HANDLERS)
+        limited = {kind: handler.concurrency for kind, handler in HANDLERS.items() if handler.concurrency}
+        async with self.session_factory() as db:
+            free = {}
+            if limited:
+                if db.get_bind().dialect.name == 'postgresql':
+                    # счёт выполняющихся и захват — атомарно относительно других воркеров
+                    await db.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+                running = await db.execute(
+                    select(Job.kind, func.count())
+                    .filter(Job.status == JobStatus.running, Job.locked_until >= now, Job.kind.in_(limited))
+                    .group_by(Job.kind)
+                )
+                counts = dict(running.tuples().all())
+                free = {kind: limit_ - counts.get(kind, 0) for kind, limit_ in limited.items()}
+                kinds = [kind for kind in kinds if free.get(kind, 1) > 0]
+            if not kinds:
+                await db.commit()
+                return []
+
+            result = await db.execute(
+                select(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+                .filter(
+                    Job.kind.in_(kinds),
+                    or_(
+                        and_(Job.status == JobStatus.queued, Job.run_at <= now),
+                        and_(Job.status == JobStatus.running, Job.locked_until < now),
+                    ),
+                )
+                .order_by(Job.priority, Job.run_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            claimed = []
+            for job_id, kind, payload, attempts, max_attempts in result.tuples().all():
+                if kind in free:
+                    if free[kind] <= 0:
+                        continue
+                    free[kind] -= 1
+                claimed.append((job_id, kind, payload, attempts + 1, max_attempts))
+
+            if claimed:
+                await db.execute(update(Job), [
+                    {
+                        'id': job_id,
+                        'status': JobStatus.running,
+                        'attempts': attempts,
+                        'locked_by': self.name,
+                        'locked_until': now + timedelta(seconds=HANDLERS[kind].visibility_timeout),
+                    }
+                    for job_id, kind, _, attempts, _ in claimed
+                ])
+            await db.commit()
+        return claimed
+
+    async def _update(self, job_id: uuid.UUID, **values: Any) -> None:
+        # только пока задача наша: после истечения блокировки её мог забрать другой воркер
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Job)
+                .filter(Job.id == job_id, Job.status == JobStatus.running, Job.locked_by == self.name)
+                .values(**values)
+            )
+            await db.commit()
+
+    async def _heartbeat(self, job_id: uuid.UUID, timeout: float) -> None:
+        while True:
+            await asyncio.sleep(timeout / 3)
+            try:
+                await self._update(job_id, locked_until=_now() + timedelta(seconds=timeout))
+            except Exception:
+                logger.exception(f'Job {job_id} heartbeat failed')
+
+    def _session_factory(self, payload: dict) -> async_sessionmaker[AsyncSession]:
+        group_id = payload.get('group_id')
+        if self.router is not None and group_id is not None:
+            return self.router.session_factory(uuid.UUID(str(group_id)))
+        return self.session_factory
+
+    async def _execute(self, job_id: uuid.UUID, kind: str, payload: dict, attempts: int, max_attempts: int) -> None:
+        handler = HANDLERS[kind]
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, handler.visibility_timeout))
+        try:
+            if attempts > max_attempts:
+                raise RuntimeError('Visibility timeout expired on the last attempt')
+            async with self._session_factory(payload)() as db:
+                result = await handler.func(db, **payload)
+        except asyncio.CancelledError:
+            # остановка воркера — не неудача: задача возвращается в очередь без траты попытки
+            heartbeat.cancel()
+            await asyncio.shield(self._update(
+                job_id, status=JobStatus.queued, run_at=_now(), attempts=Job.attempts - 1,
+                locked_by=None, locked_until=None,
+            ))
+            raise
+        except Exception as error:
+            heartbeat.cancel()
+            message = f'{type(error).__name__}: {error}'
+            if attempts >= max_attempts:
+                logger.exception(f'Job {kind} {job_id} failed after {attempts} attempts')
+                await self._update(
+                    job_id, status=JobStatus.failed, last_error=message, finished_at=_now(),
+                    locked_by=None, locked_until=None,
+                )
+            else:
+                delay = retry_delay(attempts)
+                logger.warning(f'Job {kind} {job_id} attempt {attempts} failed, retry in {delay:.0f}s: {message}')
+                await self._update(
+                    job_id, status=JobStatus.queued, last_error=message,
+                    run_at=_now() + timedelta(seconds=delay), locked_by=None, locked_until=None,
+                )
+        else:
+            heartbeat.cancel()
+            await self._update(
+                job_id, status=JobStatus.done, result=to_jsonable_python(result), last_error=None,
+                finished_at=_now(), locked_by=None, locked_until=None,
+            )
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self._wakeup.set()
+
+    async def run_once(self) -> int:
+        """Забирает задачи на свободные места и запускает их; возвращает число запущенных."""
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        claimed = await self.claim(free)
+        for row in claimed:
+            task = asyncio.create_task(self._execute(*row), name=f'job-{row[1]}')
+            self._running.add(task)
+            task.add_done_callback(self._on_done)
+        return len(claimed)
+
+    async def join(self) -> None:
+        """Ждёт завершения уже запущенных задач."""
+        while self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                started = await self.run_once()
+            except Exception:
+                logger.exception(f'Job worker {self.name} failed to claim jobs')
+                started = 0
+            if started == 0 or len(self._running) >= self.concurrency:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except TimeoutError:
+                    pass
+
+    def start(self) -> None:
+        if self._task is None:
+            _workers.add(self)
+            self._task = asyncio.create_task(self._run(), name=f'jobs-{self.name}')
+
+    async def stop(self) -> None:
+        _workers.discard(self)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in self._running:
+            task.cancel()
+        await self.join()
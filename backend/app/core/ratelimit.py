@@ -0,0 +1,188 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import asyncpg
+from fastapi import HTTPException, status
+from loguru import logger
+
+from app.core.config import settings
+
+# Общая таблица корзин для PostgresRateLimiter (UNLOGGED, создаётся миграцией)
+BUCKETS_TABLE = 'rate_limit_buckets'
+
+_TAKE_SQL = f"""
+INSERT INTO {BUCKETS_TABLE} AS b (key, tokens, updated_at)
+VALUES ($1, $2 - 1, extract(epoch FROM clock_timestamp()))
+ON CONFLICT (key) DO UPDATE
+SET tokens = least($2, b.tokens + (extract(epoch FROM clock_timestamp()) - b.updated_at) * $3) - 1,
+    updated_at = extract(epoch FROM clock_timestamp())
+WHERE least($2, b.tokens + (extract(epoch FROM clock_timestamp()) - b.updated_at) * $3) >= 1
+RETURNING tokens
+"""
+_TOKENS_SQL = f"""
+SELECT least($2, tokens + (extract(epoch FROM clock_timestamp()) - updated_at) * $3)
+FROM {BUCKETS_TABLE} WHERE key = $1
+"""
+_PRUNE_SQL = f'DELETE FROM {BUCKETS_TABLE} WHERE updated_at < extract(epoch FROM clock_timestamp()) - $1'
+
+
+class TokenBucket:
+    """
+    Параметры корзины токенов: capacity попыток подряд, затем
+    per_minute попыток в минуту.
+    """
+
+    def __init__(self, name: str, capacity: int, per_minute: float) -> None:
+        self.name = name
+        self.capacity = capacity
+        self.rate = per_minute / 60
+
+    @property
+    def refill_seconds(self) -> float:
+        """За сколько секунд пустая корзина наполняется полностью."""
+        return self.capacity / self.rate
+
+
+class RateLimiter:
+    """
+    Корзины токенов в памяти процесса: у каждого воркера свой счёт.
+
+    Используется по умолчанию и в тестах (часы подменяются через clock).
+    Корзин хранится не больше max_keys; дольше всех не использованные
+    вытесняются — для них это то же, что полная корзина.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_keys: int = 100_000) -> None:
+        self.clock = clock
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def take(self, bucket: TokenBucket, key: str) -> float:
+        """
+        Забирает токен из корзины bucket для key.
+
+        :return: 0, если токен был; иначе через сколько секунд он появится
+        """
+        key = f'{bucket.name}:{key}'
+        now = self.clock()
+        tokens, updated = self._buckets.pop(key, (bucket.capacity, now))
+        tokens = min(bucket.capacity, tokens + (now - updated) * bucket.rate)
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) / bucket.rate
+
+
+class PostgresRateLimiter(RateLimiter):
+    """
+    Корзины в общей таблице Postgres: лимит один на все воркеры и серверы.
+
+    Проверка и списание — один INSERT ... ON CONFLICT DO UPDATE, время
+    берётся из базы, поэтому расхождение часов серверов не влияет.
+    Давно не использованные корзины периодически удаляются.
+    """
+
+    def __init__(self, dsn: str, prune_horizon: float, prune_interval: float = 60.0, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.dsn = dsn
+        self.prune_horizon = prune_horizon
+        self.prune_interval = prune_interval
+        self._pool: asyncpg.Pool | None = None
+        self._pruner: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=4)
+        self._pruner = asyncio.create_task(self._prune_loop(), name='rate-limit-prune')
+
+    async def stop(self) -> None:
+        if self._pruner is not None:
+            self._pruner.cancel()
+            try:
+                await self._pruner
+            except asyncio.CancelledError:
+                pass
+            self._pruner = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def take(self, bucket: TokenBucket, key: str) -> float:
+        key = f'{bucket.name}:{key}'
+        async with self._pool.acquire() as connection:
+            if await connection.fetchval(_TAKE_SQL, key, bucket.capacity, bucket.rate) is not None:
+                return 0
+            tokens = await connection.fetchval(_TOKENS_SQL, key, bucket.capacity, bucket.rate)
+        return max(0.0, 1 - (tokens or 0)) / bucket.rate
+
+    async def _prune_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.prune_interval)
+            try:
+                await self._pool.execute(_PRUNE_SQL, self.prune_horizon)
+            except (asyncpg.PostgresError, OSError):
+                logger.exception('Rate limit buckets prune failed')
+
+
+class LoginLimiter:
+    """
+    Ограничение попыток входа: корзина на IP клиента (перебор email
+    с одного адреса) и корзина на email (подбор пароля к одному аккаунту).
+    Проверка идёт до обращения к БД и bcrypt.
+    """
+
+    def __init__(self, backend: RateLimiter, per_ip: TokenBucket, per_email: TokenBucket) -> None:
+        self.backend = backend
+        self.per_ip = per_ip
+        self.per_email = per_email
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    async def check(self, ip: str | None, email: str) -> None:
+        """
+        Списывает попытку входа.
+
+        :param ip: адрес клиента
+        :param email: введённый email
+        :raises HTTPException 429: если попытки исчерпаны (с заголовком Retry-After)
+        """
+        retry_after = await self.backend.take(self.per_ip, ip or 'unknown')
+        if not retry_after:
+            retry_after = await self.backend.take(self.per_email, email.strip().lower())
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail='Too many login attempts',
+                headers={'Retry-After': str(math.ceil(retry_after))},
+            )
+
+
+def create_login_limiter() -> LoginLimiter:
+    per_ip = TokenBucket('login-ip', settings.LOGIN_RATE_IP_CAPACITY, settings.LOGIN_RATE_IP_PER_MINUTE)
+    per_email = TokenBucket('login-email', settings.LOGIN_RATE_EMAIL_CAPACITY, settings.LOGIN_RATE_EMAIL_PER_MINUTE)
+    if settings.LOGIN_RATE_BACKEND == 'postgres':
+        dsn = settings.database_url_asyncpg.replace('+asyncpg', '')
+        backend = PostgresRateLimiter(dsn, max(per_ip.refill_seconds, per_email.refill_seconds))
+    else:
+        backend = RateLimiter()
+    return LoginLimiter(backend, per_ip, per_email)
+
+
+login_limiter = create_login_limiter()
+
+
+def get_login_limiter() -> LoginLimiter:
+    return login_limiter
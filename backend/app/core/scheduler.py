@@ -0,0 +1,41 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+
+class PeriodicTask:
+    """
+    Фоновая задача в процессе приложения: вызывает func раз в interval секунд.
+
+    Ошибка одного запуска логируется и не останавливает расписание.
+    """
+
+    def __init__(self, name: str, func: Callable[[], Awaitable[object]], interval: float) -> None:
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.func()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f'Periodic task {self.name} failed')
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -20,6 +20,10 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def dummy_verify_password() -> None:
+    # проверка с той же стоимостью, что и настоящая, — для несуществующих email
+    pwd_context.dummy_verify()
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.transaction_archive import TransactionArchive
+
+ARCHIVE_DIR = Path(settings.ARCHIVE_DIR)
+
+_UUID = pa.binary(16)
+_TIMESTAMP = pa.timestamp('us', tz='UTC')
+_LABEL = pa.dictionary(pa.int32(), pa.string())
+
+# Колонки архивного файла; строки для записи — кортежи в этом же порядке
+SCHEMA = pa.schema([
+    ('id', _UUID),
+    ('category_id', _UUID),
+    ('user_id', _UUID),
+    ('recurring_id', _UUID),
+    # названия на момент архивации: категорию потом могут удалить или слить с другой
+    ('category_name', _LABEL),
+    ('user_name', _LABEL),
+    ('amount', pa.decimal128(12, 2)),
+    ('type', _LABEL),
+    ('description', pa.string()),
+    ('date', _TIMESTAMP),
+    ('created_at', _TIMESTAMP),
+    ('updated_at', _TIMESTAMP),
+])
+
+
+def _record_batch(rows: Sequence[tuple]) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    arrays = []
+    for field, values in zip(SCHEMA, columns):
+        if field.type == _UUID:
+            values = [value.bytes if value is not None else None for value in values]
+        elif field.name == 'type':
+            values = [value.value for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+class ArchiveFile:
+    """
+    Запись одного архивного файла: строки пишутся во временный файл,
+    close() переименовывает его в окончательный. Пока запись о файле
+    не закоммичена в манифест, файл можно удалить через discard().
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._target = ARCHIVE_DIR / path
+        self._temp = self._target.with_suffix('.tmp')
+        self._writer: pq.ParquetWriter | None = None
+
+    async def write(self, rows: Sequence[tuple]) -> None:
+        if self._writer is None:
+            self._target.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self._temp, SCHEMA, compression='zstd')
+        # сборка колонок и сжатие — в потоке, чтобы не задерживать цикл событий
+        await asyncio.to_thread(lambda: self._writer.write_batch(_record_batch(rows)))
+
+    async def close(self) -> int:
+        """Дописывает файл на диск и возвращает его размер в байтах."""
+        await asyncio.to_thread(self._writer.close)
+        with open(self._temp, 'rb') as file:
+            os.fsync(file.fileno())
+        os.replace(self._temp, self._target)
+        return self._target.stat().st_size
+
+    def discard(self) -> None:
+        if self._writer is not None and self._writer.is_open:
+            self._writer.close()
+        self._temp.unlink(missing_ok=True)
+        self._target.unlink(missing_ok=True)
+
+
+def as_utc(value: datetime | date) -> datetime:
+    """Дата или datetime как aware UTC (naive считается UTC — так пишет SQLite)."""
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def period_end(value: datetime | date) -> tuple[datetime, bool]:
+    """
+    Конец периода и входит ли он в период. Дата без времени — весь этот
+    день: граница — начало следующего дня, не включительно.
+    """
+    if isinstance(value, datetime):
+        return value, True
+    return datetime.combine(value + timedelta(days=1), time.min), False
+
+
+def _read(paths: list[str], columns: list[str], date_from, date_to) -> pa.Table:
+    filters = []
+    if date_from:
+        filters.append(('date', '>=', as_utc(date_from)))
+    if date_to:
+        end, inclusive = period_end(date_to)
+        filters.append(('date', '<=' if inclusive else '<', as_utc(end)))
+    tables = [
+        # memory_map: колонки читаются из отображённого файла, без копии всего файла в память
+        pq.read_table(ARCHIVE_DIR / path, columns=columns, memory_map=True, filters=filters or None)
+        for path in paths
+    ]
+    if not tables:
+        return SCHEMA.empty_table().select(columns)
+    return pa.concat_tables(tables).combine_chunks()
+
+
+async def read_archived(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        columns: list[str],
+        date_from: datetime | date | None = None,
+        date_to: datetime | date | None = None,
+) -> pa.Table:
+    """
+    Читает архивные транзакции группы за период по манифесту transaction_archives.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param columns: нужные колонки из SCHEMA
+    :param date_from: начало периода
+    :param date_to: конец периода (включительно)
+    :return: pyarrow.Table (пустая, если архива за период нет)
+    """
+    conditions = [TransactionArchive.group_id == group_id]
+    if date_from:
+        conditions.append(TransactionArchive.year >= date_from.year)
+    if date_to:
+        conditions.append(TransactionArchive.year <= date_to.year)
+    result = await db.execute(
+        select(TransactionArchive.path)
+        .filter(*conditions)
+        .order_by(TransactionArchive.year, TransactionArchive.created_at)
+    )
+    return await asyncio.to_thread(_read, list(result.scalars().all()), columns, date_from, date_to)
+
+
+def amount_cents(table: pa.Table) -> pa.ChunkedArray:
+    """Суммы архивных транзакций в копейках (int64)."""
+    return pc.cast(pc.multiply(table.column('amount'), pa.scalar(100, pa.decimal128(3, 0))), pa.int64())
@@ -32,6 +32,10 @@ class Base(DeclarativeBase):
     repr_cols_num = 3
     repr_cols = tuple()
 
+    # created_at/updated_at считаются в БД: забираем их через INSERT/UPDATE ... RETURNING,
+    # чтобы после commit не перечитывать строку
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         cols = []
         for idx, col in enumerate(self.__table__.columns.keys()):
@@ -54,3 +58,10 @@ class GroupRole(enum.Enum):
 class TransactionType(enum.Enum):
     expense = 'expense'
     income = 'income'
+
+
+class JobStatus(enum.Enum):
+    queued = 'queued'
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
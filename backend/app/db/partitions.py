@@ -0,0 +1,168 @@
+import re
+from datetime import date
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.shards import shard_router
+
+# Секции transactions: transactions_pYYYYMM — один календарный месяц по date
+PARTITION_NAME = re.compile(r'^transactions_p(\d{4})(\d{2})$')
+# Сериализует создание и удаление секций между воркерами
+_LOCK_KEY = 0x7472616E73  # 'trans'
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f'transactions_p{month:%Y%m}'
+
+
+def partition_ddl(month: date) -> str:
+    """CREATE TABLE ... PARTITION OF для месяца month (границы — полночь UTC)."""
+    start = month_start(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF transactions "
+        f"FOR VALUES FROM ('{start.isoformat()} 00:00+00') TO ('{add_months(start, 1).isoformat()} 00:00+00')"
+    )
+
+
+def _is_postgres(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == 'postgresql'
+
+
+async def list_transaction_partitions(db: AsyncSession) -> list[date]:
+    """
+    Месяцы, для которых у transactions есть секции (без секции по умолчанию).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :return: отсортированный список первых чисел месяцев; на SQLite — пустой
+    """
+    if not _is_postgres(db):
+        return []
+    result = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'transactions'::regclass"
+    ))
+    months = []
+    for name in result.scalars().all():
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+async def ensure_transaction_partitions(
+        db: AsyncSession,
+        months_ahead: int,
+        start: date | None = None
+) -> list[date]:
+    """
+    Создаёт недостающие помесячные секции transactions от start до текущего
+    месяца плюс months_ahead. На SQLite ничего не делает.
+
+    Месяц, строки которого уже лежат в секции по умолчанию, пропускается
+    с предупреждением: Postgres не даёт создать секцию поверх них.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param months_ahead: на сколько месяцев вперёд держать секции
+    :param start: первый месяц (по умолчанию — текущий)
+    :return: месяцы созданных секций
+    """
+    if not _is_postgres(db):
+        return []
+    await db.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+    existing = set(await list_transaction_partitions(db))
+
+    current = month_start(date.today())
+    month = month_start(start or current)
+    created = []
+    while month <= add_months(current, months_ahead):
+        if month not in existing:
+            try:
+                async with db.begin_nested():
+                    await db.execute(text(partition_ddl(month)))
+                created.append(month)
+            except DBAPIError:
+                logger.warning(f'Partition {partition_name(month)} not created: rows in transactions_default')
+        month = add_months(month, 1)
+    await db.commit()
+    return created
+
+
+async def detach_transaction_partition(
+        db: AsyncSession,
+        month: date,
+        drop: bool = False,
+        if_empty: bool = False
+) -> bool:
+    """
+    Отсоединяет секцию месяца от transactions (метаданные, без перезаписи строк).
+
+    Отсоединённая таблица остаётся в БД для выгрузки; с drop=True удаляется.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param month: любой день месяца
+    :param drop: удалить таблицу после отсоединения
+    :param if_empty: только если в секции нет строк
+    :return: была ли секция отсоединена
+    """
+    if not _is_postgres(db):
+        return False
+    month = month_start(month)
+    await db.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+    if month not in await list_transaction_partitions(db):
+        await db.commit()
+        return False
+    name = partition_name(month)
+    if if_empty:
+        # блокировка до проверки: строка не успеет появиться между проверкой и DETACH
+        await db.execute(text(f'LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE'))
+        rows = await db.execute(text(f'SELECT 1 FROM {name} LIMIT 1'))
+        if rows.first() is not None:
+            await db.commit()
+            return False
+    await db.execute(text(f'ALTER TABLE transactions DETACH PARTITION {name}'))
+    if drop:
+        await db.execute(text(f'DROP TABLE {name}'))
+    await db.commit()
+    return True
+
+
+async def drop_empty_partitions(
+        db: AsyncSession,
+        before: date
+) -> list[date]:
+    """
+    Удаляет пустые секции месяцев раньше before (например, после архивации лет).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param before: первый месяц, секции которого остаются
+    :return: месяцы удалённых секций
+    """
+    dropped = []
+    for month in await list_transaction_partitions(db):
+        if month >= before:
+            break
+        if await detach_transaction_partition(db, month, drop=True, if_empty=True):
+            dropped.append(month)
+    return dropped
+
+
+async def run_partition_tick() -> list[date]:
+    """Создание секций наперёд на каждом шарде (для PeriodicTask в lifespan)."""
+    created = []
+    for factory in shard_router.factories:
+        async with factory() as db:
+            created += await ensure_transaction_partitions(db, settings.TRANSACTION_PARTITIONS_AHEAD_MONTHS)
+    return created
@@ -20,4 +20,8 @@ async_sesion_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
 async def get_db() -> AsyncGenerator[AsyncSession, Any]:
 
     async with async_sesion_factory() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Фабрика сессий для эндпоинтов, которые выполняют запросы параллельно."""
+    return async_sesion_factory
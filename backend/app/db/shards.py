@@ -0,0 +1,214 @@
+import asyncio
+import bisect
+import hashlib
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Sequence
+
+from fastapi import Depends, Path
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.session import get_db, get_session_factory, async_sesion_factory
+from app.db.upsert import insert
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.transaction import Transaction
+from app.models.user import User
+
+# Колонки пользователя, которые копируются на шарды групп (пароль остаётся в основной базе)
+MIRROR_COLUMNS = ('id', 'email', 'name', 'role', 'created_at', 'updated_at', 'is_active', 'deleted_at')
+
+
+def _point(data: bytes) -> int:
+    # стабильный между процессами хеш (встроенный hash() рандомизирован)
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+class ShardRouter:
+    """
+    Распределяет группы по базам через кольцо консистентного хеширования.
+
+    Шард 0 — основная база: в ней пользователи и авторизация, и она же
+    хранит часть групп. Каждый шард занимает virtual_nodes точек на кольце,
+    группа принадлежит шарду первой точки после хеша её id. Новый шард
+    забирает примерно 1/N групп, остальные остаются на месте.
+    """
+
+    def __init__(self, factories: Sequence[async_sessionmaker[AsyncSession]], virtual_nodes: int = 64) -> None:
+        self.factories = list(factories)
+        ring = sorted(
+            (_point(f'shard-{shard}-{node}'.encode()), shard)
+            for shard in range(len(self.factories))
+            for node in range(virtual_nodes)
+        )
+        self._points = [point for point, _ in ring]
+        self._shards = [shard for _, shard in ring]
+
+    def __len__(self) -> int:
+        return len(self.factories)
+
+    def shard_for(self, group_id: uuid.UUID) -> int:
+        if len(self.factories) == 1:
+            return 0
+        index = bisect.bisect(self._points, _point(group_id.bytes)) % len(self._points)
+        return self._shards[index]
+
+    def session_factory(self, group_id: uuid.UUID) -> async_sessionmaker[AsyncSession]:
+        return self.factories[self.shard_for(group_id)]
+
+    @asynccontextmanager
+    async def session(self, shard: int, primary: AsyncSession) -> AsyncIterator[AsyncSession]:
+        """Сессия шарда; для шарда 0 — уже открытая сессия основной базы."""
+        if shard == 0:
+            yield primary
+            return
+        async with self.factories[shard]() as db:
+            yield db
+
+    async def gather(
+            self,
+            primary: AsyncSession,
+            func: Callable[..., Awaitable[Any]],
+            *args: Any
+    ) -> list[Any]:
+        """
+        Параллельно выполняет func(db, *args) на всех шардах.
+
+        :param primary: сессия основной базы (для шарда 0)
+        :param func: корутина, первым аргументом принимающая сессию
+        :return: результаты в порядке шардов
+        """
+        async def run(shard: int):
+            async with self.session(shard, primary) as db:
+                return await func(db, *args)
+
+        return list(await asyncio.gather(*(run(shard) for shard in range(len(self.factories)))))
+
+    async def locate(self, primary: AsyncSession, model: type, key: uuid.UUID) -> int:
+        """
+        Находит шард со строкой model по первичному ключу (когда группа не известна из запроса).
+
+        :return: номер шарда; 0, если строки нет нигде
+        """
+        if len(self.factories) == 1:
+            return 0
+
+        async def probe(db: AsyncSession) -> bool:
+            return (await db.execute(select(model.id).filter(model.id == key))).first() is not None
+
+        found = await self.gather(primary, probe)
+        return found.index(True) if True in found else 0
+
+    async def sync_user(self, primary: AsyncSession, user: User) -> None:
+        """Переносит изменения пользователя в его копии на шардах 1..N."""
+        if len(self.factories) == 1:
+            return
+        values = {name: getattr(user, name) for name in MIRROR_COLUMNS if name != 'id'}
+
+        async def apply(db: AsyncSession) -> None:
+            if db is primary:
+                return
+            await db.execute(update(User).filter(User.id == user.id).values(**values))
+            await db.commit()
+
+        await self.gather(primary, apply)
+
+
+async def mirror_users(db: AsyncSession, users: Sequence[User]) -> None:
+    """
+    Копирует пользователей в базу шарда группы, чтобы на них могли
+    ссылаться user_groups и transactions. В основной базе ничего не делает.
+
+    Запись идёт в текущей транзакции сессии и фиксируется вместе с
+    изменением, ради которого пользователи копируются.
+
+    :param db: сессия шарда группы
+    :param users: пользователи из основной базы
+    """
+    if not users or db.info.get('shard', 0) == 0:
+        return
+    rows = [{name: getattr(user, name) for name in MIRROR_COLUMNS} | {'password_hash': ''} for user in users]
+    stmt = insert(db, User)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=['id'],
+            set_={name: stmt.excluded[name] for name in MIRROR_COLUMNS if name != 'id'},
+        ),
+        rows,
+    )
+
+
+async def mirror_users_by_emails(db: AsyncSession, users_db: AsyncSession, emails: Sequence[str]) -> None:
+    """
+    mirror_users для активных пользователей с данными email.
+
+    :param db: сессия шарда группы
+    :param users_db: сессия основной базы
+    :param emails: email пользователей
+    """
+    if db.info.get('shard', 0) == 0:
+        return
+    result = await users_db.execute(select(User).filter(User.email.in_(emails), User.is_active == True))
+    await mirror_users(db, result.scalars().all())
+
+
+def _create_router() -> ShardRouter:
+    factories = [async_sesion_factory]
+    for shard, url in enumerate(settings.DATABASE_SHARD_URLS, start=1):
+        engine = create_async_engine(url=url, echo=settings.SQLALCHEMY_ECHO, future=True)
+        factories.append(async_sessionmaker(engine, expire_on_commit=False, autoflush=False, info={'shard': shard}))
+    return ShardRouter(factories, settings.SHARD_VIRTUAL_NODES)
+
+
+shard_router = _create_router()
+
+
+def get_shard_router() -> ShardRouter:
+    return shard_router
+
+
+async def get_group_db(
+        group_id: uuid.UUID,
+        db: AsyncSession = Depends(get_db),
+        router: ShardRouter = Depends(get_shard_router),
+) -> AsyncGenerator[AsyncSession, Any]:
+    """Сессия шарда группы из пути или query-параметра group_id."""
+    async with router.session(router.shard_for(group_id), db) as session:
+        yield session
+
+
+def get_group_session_factory(
+        group_id: uuid.UUID,
+        primary: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+        router: ShardRouter = Depends(get_shard_router),
+) -> async_sessionmaker[AsyncSession]:
+    """Фабрика сессий шарда группы для эндпоинтов с параллельными запросами."""
+    shard = router.shard_for(group_id)
+    return primary if shard == 0 else router.factories[shard]
+
+
+def _located_db(model: type, param: str):
+    async def dependency(
+            key: uuid.UUID = Path(alias=param),
+            db: AsyncSession = Depends(get_db),
+            router: ShardRouter = Depends(get_shard_router),
+    ) -> AsyncGenerator[AsyncSession, Any]:
+        async with router.session(await router.locate(db, model, key), db) as session:
+            yield session
+
+    dependency.__doc__ = f'Сессия шарда, где лежит {model.__name__} с id из пути ({{{param}}}).'
+    return dependency
+
+
+get_transaction_db = _located_db(Transaction, 'tx_id')
+get_category_db = _located_db(Category, 'category_id')
+get_budget_db = _located_db(Budget, 'budget_id')
+get_recurring_db = _located_db(RecurringTransaction, 'recurring_id')
+
+
+async def dispose_shards() -> None:
+    for factory in shard_router.factories[1:]:
+        await factory.kw['bind'].dispose()
@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def insert(db: AsyncSession, table):
+    """
+    INSERT с поддержкой ON CONFLICT для диалекта сессии (Postgres в проде, SQLite в тестах).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param table: модель или таблица
+    :return: конструкция insert с методами on_conflict_do_update / on_conflict_do_nothing
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
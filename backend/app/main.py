@@ -3,6 +3,7 @@ from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.v1.endpoints import (
     auth,
@@ -10,14 +11,36 @@ from app.api.v1.endpoints import (
     groups,
     categories,
     transactions,
+    balances,
+    budgets,
+    recurring,
+    events,
+    analytics,
 )
 from app.core.config import settings
+from app.core.events import broker
+from app.core.jobs import JobWorker
+from app.core.middleware import CompressionMiddleware
+from app.core.ratelimit import login_limiter
+from app.core.scheduler import PeriodicTask
+from app.db.partitions import run_partition_tick
 from app.db.session import (
     async_engine,
+    async_sesion_factory,
 )
-from app.utils.logger import setup_logging
+from app.db.shards import dispose_shards, shard_router
+from app.services.archive_service import run_archive_tick
+from app.services.purge_service import run_purge_tick
+from app.services.recurring_service import run_recurring_tick
+from app.utils.logger import setup_logging, stop_logging
 
-setup_logging()
+setup_logging(
+    settings.LOG_FILE,
+    enqueue=settings.LOG_ENQUEUE,
+    serialize=settings.LOG_JSON,
+    diagnose=settings.LOG_DIAGNOSE,
+    access_sample_rate=settings.LOG_ACCESS_SAMPLE_RATE,
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -25,9 +48,50 @@ async def lifespan(app: FastAPI):
     # 1) Создаём таблицы (только в dev; в prod — миграции через Alembic)
     # async with async_engine.begin() as conn:
     #     await conn.run_sync(Base.metadata.create_all)
+
+    # 2) Рассылка событий групп (для postgres — подключение к LISTEN/NOTIFY)
+    await broker.start()
+    # лимит попыток входа (для postgres — пул соединений к таблице корзин)
+    await login_limiter.start()
+
+    # 3) Секции transactions на ближайшие месяцы (на SQLite ничего не делает)
+    partitioner = PeriodicTask('partitions', run_partition_tick, settings.TRANSACTION_PARTITIONS_INTERVAL_SECONDS)
+    partitioner.start()
+
+    # 4) Планировщик повторяющихся транзакций
+    scheduler = PeriodicTask('recurring', run_recurring_tick, settings.RECURRING_INTERVAL_SECONDS)
+    if settings.RECURRING_SCHEDULER_ENABLED:
+        scheduler.start()
+
+    # 5) Перенос закрытых лет в архив
+    archiver = PeriodicTask('archive', run_archive_tick, settings.ARCHIVE_INTERVAL_SECONDS)
+    if settings.ARCHIVE_SCHEDULER_ENABLED:
+        archiver.start()
+
+    # 6) Воркер очереди фоновых задач (отдельным процессом — python -m app.worker)
+    jobs = JobWorker(async_sesion_factory, shard_router, settings.JOBS_CONCURRENCY, settings.JOBS_POLL_SECONDS)
+    if settings.JOBS_WORKER_ENABLED:
+        jobs.start()
+
+    # 7) Очистка давно удалённых групп и пользователей (задачи выполняет воркер)
+    purger = PeriodicTask('purge', run_purge_tick, settings.PURGE_INTERVAL_SECONDS)
+    if settings.PURGE_SCHEDULER_ENABLED:
+        purger.start()
     yield
 
+    await purger.stop()
+    await jobs.stop()
+    await archiver.stop()
+    await scheduler.stop()
+    await partitioner.stop()
+    # завершаем открытые SSE-потоки
+    await broker.stop()
+    await login_limiter.stop()
+
     await async_engine.dispose()
+    await dispose_shards()
+    # дописываем очередь логов перед выходом
+    stop_logging()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -35,7 +99,8 @@ app = FastAPI(
     openapi_url=settings.OPENAPI_URL,      # например "/api/v1/openapi.json"
     docs_url=settings.DOCS_URL,            # например "/docs"
     redoc_url=settings.REDOC_URL,          # например "/redoc"
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS: по умолчанию пустой список
@@ -47,6 +112,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Сжатие ответов: brotli, если клиент его принимает, иначе gzip
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
 # Подключаем наши маршруты
 app.include_router(auth.router,        prefix="/api/v1")
 app.include_router(users.router,       prefix="/api/v1")
@@ -54,6 +122,11 @@ app.include_router(groups.router,      prefix="/api/v1")
 # категории и транзакции — пути уже внутри роутеров включают /groups или /transactions
 app.include_router(categories.router,  prefix="/api/v1")
 app.include_router(transactions.router,prefix="/api/v1")
+app.include_router(balances.router,    prefix="/api/v1")
+app.include_router(budgets.router,     prefix="/api/v1")
+app.include_router(recurring.router,   prefix="/api/v1")
+app.include_router(events.router,      prefix="/api/v1")
+app.include_router(analytics.router,   prefix="/api/v1")
 
 
 @app.get("/", tags=["Root"])
@@ -18,7 +18,10 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 
-config.set_main_option('sqlalchemy.url', settings.database_url_asyncpg + '?async_fallback=True')
+# база шарда: alembic -x shard=1 upgrade head (шард 0 — основная база)
+shard = int(context.get_x_argument(as_dictionary=True).get('shard', 0))
+url = settings.database_url_asyncpg if shard == 0 else settings.DATABASE_SHARD_URLS[shard - 1]
+config.set_main_option('sqlalchemy.url', url + ('&' if '?' in url else '?') + 'async_fallback=True')
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -0,0 +1,39 @@
+"""updated_at for categories and user_groups, group lookup indexes
+
+Revision ID: 3f9c2a71d4e5
+Revises: 896b86dd6788
+Create Date: 2026-10-19 10:12:41.518203
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a71d4e5'
+down_revision: Union[str, Sequence[str], None] = '896b86dd6788'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('categories', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+    op.add_column('user_groups', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False))
+
+    op.create_index('ix_categories_group_id', 'categories', ['group_id'])
+    op.create_index('ix_user_groups_group_id_user_id', 'user_groups', ['group_id', 'user_id'])
+    op.create_index('ix_user_groups_user_id', 'user_groups', ['user_id'])
+    op.create_index('ix_transactions_group_id_updated_at', 'transactions', ['group_id', 'updated_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_group_id_updated_at', table_name='transactions')
+    op.drop_index('ix_user_groups_user_id', table_name='user_groups')
+    op.drop_index('ix_user_groups_group_id_user_id', table_name='user_groups')
+    op.drop_index('ix_categories_group_id', table_name='categories')
+
+    op.drop_column('user_groups', 'updated_at')
+    op.drop_column('categories', 'updated_at')
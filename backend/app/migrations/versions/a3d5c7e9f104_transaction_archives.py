@@ -0,0 +1,55 @@
+"""transaction archive manifest
+
+Revision ID: a3d5c7e9f104
+Revises: f1a8c3d6e042
+Create Date: 2026-10-19 21:14:37.502816
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d5c7e9f104'
+down_revision: Union[str, Sequence[str], None] = 'f1a8c3d6e042'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transaction_archives',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('group_id', sa.UUID(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('nbytes', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_transaction_archives_group_id_year', 'transaction_archives', ['group_id', 'year'])
+
+    op.create_table('transaction_archive_totals',
+    sa.Column('archive_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('group_id', sa.UUID(), nullable=False),
+    sa.Column('expense', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('income', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('tx_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['archive_id'], ['transaction_archives.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('archive_id', 'user_id')
+    )
+    op.create_index('ix_transaction_archive_totals_group_id', 'transaction_archive_totals', ['group_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transaction_archive_totals_group_id', table_name='transaction_archive_totals')
+    op.drop_table('transaction_archive_totals')
+    op.drop_index('ix_transaction_archives_group_id_year', table_name='transaction_archives')
+    op.drop_table('transaction_archives')
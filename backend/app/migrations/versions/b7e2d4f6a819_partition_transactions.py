@@ -0,0 +1,121 @@
+"""monthly range partitioning of transactions by date
+
+Revision ID: b7e2d4f6a819
+Revises: a3d5c7e9f104
+Create Date: 2026-10-19 22:31:05.917342
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4f6a819'
+down_revision: Union[str, Sequence[str], None] = 'a3d5c7e9f104'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = 'id, group_id, category_id, user_id, recurring_id, amount, type, description, date, created_at, updated_at'
+# секции создаются от первого месяца с данными до стольких месяцев вперёд
+MONTHS_AHEAD = 3
+
+
+def _columns() -> list:
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('group_id', sa.UUID(), nullable=False),
+        sa.Column('category_id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('recurring_id', sa.UUID(), nullable=True),
+        sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('type', postgresql.ENUM('expense', 'income', name='transactiontype', create_type=False), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('date', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+        sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['recurring_id'], ['recurring_transactions.id'], name='transactions_recurring_id_fkey'),
+    ]
+
+
+INDEXES = (
+    'ix_transactions_group_id_updated_at',
+    'ix_transactions_group_id_date',
+    'uq_transactions_recurring_id_date',
+    'ix_transactions_description_tsv',
+    'ix_transactions_description_trgm',
+)
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_transactions_group_id_updated_at', 'transactions', ['group_id', 'updated_at'])
+    op.create_index('ix_transactions_group_id_date', 'transactions', ['group_id', 'date'])
+    op.create_unique_constraint('uq_transactions_recurring_id_date', 'transactions', ['recurring_id', 'date'])
+    op.create_index(
+        'ix_transactions_description_tsv',
+        'transactions',
+        [sa.text("to_tsvector('simple'::regconfig, coalesce(description, ''))")],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_transactions_description_trgm',
+        'transactions',
+        ['description'],
+        postgresql_using='gin',
+        postgresql_ops={'description': 'gin_trgm_ops'},
+    )
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ключ секционирования не может быть NULL
+    op.execute('UPDATE transactions SET date = created_at WHERE date IS NULL')
+
+    # старая таблица и её индексы уступают имена новой
+    op.rename_table('transactions', 'transactions_unpartitioned')
+    for name in ('transactions_pkey', *INDEXES):
+        op.execute(f'ALTER INDEX {name} RENAME TO {name}_old')
+
+    op.create_table(
+        'transactions',
+        *_columns(),
+        sa.PrimaryKeyConstraint('id', 'date'),
+        postgresql_partition_by='RANGE (date)',
+    )
+    op.execute('CREATE TABLE transactions_default PARTITION OF transactions DEFAULT')
+
+    first = op.get_bind().execute(sa.text('SELECT min(date) FROM transactions_unpartitioned')).scalar()
+    today = date.today()
+    month = date((first or today).year, (first or today).month, 1)
+    while month <= _add_months(date(today.year, today.month, 1), MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE transactions_p{month:%Y%m} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00+00') TO ('{_add_months(month, 1).isoformat()} 00:00+00')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(f'INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_unpartitioned')
+    op.drop_table('transactions_unpartitioned')
+    _create_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('transactions_unpartitioned', *_columns(), sa.PrimaryKeyConstraint('id'))
+    op.execute(f'INSERT INTO transactions_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM transactions')
+    # секции удаляются вместе с родительской таблицей
+    op.drop_table('transactions')
+    op.rename_table('transactions_unpartitioned', 'transactions')
+    op.execute('ALTER INDEX transactions_unpartitioned_pkey RENAME TO transactions_pkey')
+    op.alter_column('transactions', 'date', nullable=True)
+    _create_indexes()
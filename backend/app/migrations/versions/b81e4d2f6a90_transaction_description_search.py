@@ -0,0 +1,42 @@
+"""full-text and trigram search indexes on transactions.description
+
+Revision ID: b81e4d2f6a90
+Revises: 3f9c2a71d4e5
+Create Date: 2026-10-19 14:03:27.904116
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e4d2f6a90'
+down_revision: Union[str, Sequence[str], None] = '3f9c2a71d4e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    op.create_index(
+        'ix_transactions_description_tsv',
+        'transactions',
+        [sa.text("to_tsvector('simple'::regconfig, coalesce(description, ''))")],
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_transactions_description_trgm',
+        'transactions',
+        ['description'],
+        postgresql_using='gin',
+        postgresql_ops={'description': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_description_trgm', table_name='transactions')
+    op.drop_index('ix_transactions_description_tsv', table_name='transactions')
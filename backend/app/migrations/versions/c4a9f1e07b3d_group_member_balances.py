@@ -0,0 +1,48 @@
+"""group_member_balances ledger
+
+Revision ID: c4a9f1e07b3d
+Revises: b81e4d2f6a90
+Create Date: 2026-10-19 15:21:08.371954
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9f1e07b3d'
+down_revision: Union[str, Sequence[str], None] = 'b81e4d2f6a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('group_member_balances',
+    sa.Column('group_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('expense', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('income', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('tx_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('group_id', 'user_id')
+    )
+
+    # заполняем баланс по уже существующим транзакциям
+    op.execute("""
+        INSERT INTO group_member_balances (group_id, user_id, expense, income, tx_count)
+        SELECT group_id, user_id,
+               coalesce(sum(amount) FILTER (WHERE type = 'expense'), 0),
+               coalesce(sum(amount) FILTER (WHERE type = 'income'), 0),
+               count(*)
+        FROM transactions
+        GROUP BY group_id, user_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('group_member_balances')
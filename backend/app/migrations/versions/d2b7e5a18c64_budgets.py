@@ -0,0 +1,62 @@
+"""budgets, budget_spend and budget_events outbox
+
+Revision ID: d2b7e5a18c64
+Revises: c4a9f1e07b3d
+Create Date: 2026-10-19 16:47:55.102634
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b7e5a18c64'
+down_revision: Union[str, Sequence[str], None] = 'c4a9f1e07b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('budgets',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('group_id', sa.UUID(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('group_id', 'category_id', name='uq_budgets_group_id_category_id')
+    )
+    op.create_table('budget_spend',
+    sa.Column('budget_id', sa.UUID(), nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('spent', sa.Numeric(precision=14, scale=2), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['budget_id'], ['budgets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('budget_id', 'month')
+    )
+    op.create_table('budget_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('budget_id', sa.UUID(), nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('threshold', sa.Integer(), nullable=False),
+    sa.Column('spent', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['budget_id'], ['budgets.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('budget_id', 'month', 'threshold', name='uq_budget_events_budget_id_month_threshold')
+    )
+    op.create_index('ix_budget_events_unprocessed', 'budget_events', ['id'], postgresql_where=sa.text('processed_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_budget_events_unprocessed', table_name='budget_events')
+    op.drop_table('budget_events')
+    op.drop_table('budget_spend')
+    op.drop_table('budgets')
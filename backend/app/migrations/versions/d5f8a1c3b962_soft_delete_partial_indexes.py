@@ -0,0 +1,33 @@
+"""partial indexes for active and soft-deleted users and groups
+
+Revision ID: d5f8a1c3b962
+Revises: c9e4b2a7d130
+Create Date: 2026-10-20 00:41:27.305118
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f8a1c3b962'
+down_revision: Union[str, Sequence[str], None] = 'c9e4b2a7d130'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_email_active', 'users', ['email'], postgresql_where=sa.text('is_active'))
+    op.create_index('ix_users_deleted_at', 'users', ['deleted_at'], postgresql_where=sa.text('NOT is_active'))
+    op.create_index('ix_groups_id_active', 'groups', ['id'], postgresql_where=sa.text('is_active'))
+    op.create_index('ix_groups_deleted_at', 'groups', ['deleted_at'], postgresql_where=sa.text('NOT is_active'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_groups_deleted_at', table_name='groups')
+    op.drop_index('ix_groups_id_active', table_name='groups')
+    op.drop_index('ix_users_deleted_at', table_name='users')
+    op.drop_index('ix_users_email_active', table_name='users')
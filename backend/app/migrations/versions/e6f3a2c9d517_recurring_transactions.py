@@ -0,0 +1,58 @@
+"""recurring transaction templates
+
+Revision ID: e6f3a2c9d517
+Revises: d2b7e5a18c64
+Create Date: 2026-10-19 18:05:12.640381
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6f3a2c9d517'
+down_revision: Union[str, Sequence[str], None] = 'd2b7e5a18c64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('recurring_transactions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('group_id', sa.UUID(), nullable=False),
+    sa.Column('category_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('type', postgresql.ENUM('expense', 'income', name='transactiontype', create_type=False), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('rrule', sa.String(length=500), nullable=False),
+    sa.Column('dtstart', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('is_active', sa.Boolean(), server_default=sa.text('true'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_recurring_transactions_due', 'recurring_transactions', ['next_run_at'], postgresql_where=sa.text('is_active'))
+    op.create_index('ix_recurring_transactions_group_id', 'recurring_transactions', ['group_id'])
+
+    op.add_column('transactions', sa.Column('recurring_id', sa.UUID(), nullable=True))
+    op.create_foreign_key('transactions_recurring_id_fkey', 'transactions', 'recurring_transactions', ['recurring_id'], ['id'])
+    op.create_unique_constraint('uq_transactions_recurring_id_date', 'transactions', ['recurring_id', 'date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_transactions_recurring_id_date', 'transactions', type_='unique')
+    op.drop_constraint('transactions_recurring_id_fkey', 'transactions', type_='foreignkey')
+    op.drop_column('transactions', 'recurring_id')
+
+    op.drop_index('ix_recurring_transactions_group_id', table_name='recurring_transactions')
+    op.drop_index('ix_recurring_transactions_due', table_name='recurring_transactions')
+    op.drop_table('recurring_transactions')
@@ -0,0 +1,34 @@
+"""rate limit buckets
+
+Revision ID: e8b3c6d2f471
+Revises: d5f8a1c3b962
+Create Date: 2026-10-20 01:27:53.640219
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3c6d2f471'
+down_revision: Union[str, Sequence[str], None] = 'd5f8a1c3b962'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # корзины LOGIN_RATE_BACKEND=postgres: частые записи, потеря при сбое не страшна — без WAL
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.Text(), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key'),
+    prefixes=['UNLOGGED'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limit_buckets')
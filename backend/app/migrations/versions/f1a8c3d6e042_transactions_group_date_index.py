@@ -0,0 +1,26 @@
+"""transactions (group_id, date) index
+
+Revision ID: f1a8c3d6e042
+Revises: e6f3a2c9d517
+Create Date: 2026-10-19 19:42:08.113520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a8c3d6e042'
+down_revision: Union[str, Sequence[str], None] = 'e6f3a2c9d517'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_transactions_group_id_date', 'transactions', ['group_id', 'date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_group_id_date', table_name='transactions')
@@ -1,7 +1,12 @@
+from .budget import Budget, BudgetSpend, BudgetEvent
 from .category import Category
 from .group import Group
+from .group_member_balance import GroupMemberBalance
+from .job import Job
+from .recurring_transaction import RecurringTransaction
 from .transaction import Transaction
+from .transaction_archive import TransactionArchive, TransactionArchiveTotal
 from .user import User
 from .user_group import UserGroup
 
-__all__ = ["User", "Group", "UserGroup", "Category", "Transaction"]
\ No newline at end of file
+__all__ = ["User", "Group", "UserGroup", "Category", "Transaction", "GroupMemberBalance", "Budget", "BudgetSpend", "BudgetEvent", "RecurringTransaction", "TransactionArchive", "TransactionArchiveTotal", "Job"]
\ No newline at end of file
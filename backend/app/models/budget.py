@@ -0,0 +1,50 @@
+import datetime
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy import DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, intpk, intpkdef, created_at, updated_at
+
+
+class Budget(Base):
+    """Месячный бюджет группы (category_id is None) или одной категории группы."""
+    __tablename__ = 'budgets'
+    __table_args__ = (
+        sa.UniqueConstraint('group_id', 'category_id', name='uq_budgets_group_id_category_id'),
+    )
+
+    id: Mapped[intpk]
+    group_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('groups.id'))
+    category_id: Mapped[uuid.UUID | None] = mapped_column(sa.ForeignKey('categories.id'))
+    amount: Mapped[float] = mapped_column(sa.Numeric(precision=12, scale=2))
+    created_at: Mapped[created_at]
+    updated_at: Mapped[updated_at]
+
+
+class BudgetSpend(Base):
+    """Расходы по бюджету за месяц, поддерживаются при каждой записи транзакций."""
+    __tablename__ = 'budget_spend'
+
+    budget_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('budgets.id', ondelete='CASCADE'), primary_key=True)
+    month: Mapped[str] = mapped_column(sa.String(7), primary_key=True)
+    spent: Mapped[float] = mapped_column(sa.Numeric(precision=14, scale=2), default=0, server_default='0')
+    updated_at: Mapped[updated_at]
+
+
+class BudgetEvent(Base):
+    """Outbox: пересечение порога бюджета, по одной записи на (бюджет, месяц, порог)."""
+    __tablename__ = 'budget_events'
+    __table_args__ = (
+        sa.UniqueConstraint('budget_id', 'month', 'threshold', name='uq_budget_events_budget_id_month_threshold'),
+        sa.Index('ix_budget_events_unprocessed', 'id', postgresql_where=sa.text('processed_at IS NULL')),
+    )
+
+    id: Mapped[intpkdef]
+    budget_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('budgets.id', ondelete='CASCADE'))
+    month: Mapped[str] = mapped_column(sa.String(7))
+    threshold: Mapped[int]
+    spent: Mapped[float] = mapped_column(sa.Numeric(precision=14, scale=2))
+    created_at: Mapped[created_at]
+    processed_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
@@ -3,17 +3,21 @@ import uuid
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.db.base import Base, intpk, created_at
+from app.db.base import Base, intpk, created_at, updated_at
 
 
 class Category(Base):
     __tablename__ = 'categories'
+    __table_args__ = (
+        sa.Index('ix_categories_group_id', 'group_id'),
+    )
 
     id: Mapped[intpk]
     group_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('groups.id'))
     name: Mapped[str] = mapped_column(sa.String(100))
     icon: Mapped[str | None] = mapped_column(sa.String(100))
     created_at: Mapped[created_at]
+    updated_at: Mapped[updated_at]
 
     group: Mapped["Group"] = relationship(
         "Group",
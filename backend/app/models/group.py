@@ -10,6 +10,10 @@ from app.db.base import Base, intpk, created_at, updated_at
 
 class Group(Base):
     __tablename__ = 'groups'
+    __table_args__ = (
+        sa.Index('ix_groups_id_active', 'id', postgresql_where=sa.text('is_active')),
+        sa.Index('ix_groups_deleted_at', 'deleted_at', postgresql_where=sa.text('NOT is_active')),
+    )
 
     id: Mapped[intpk]
     name: Mapped[str] = mapped_column(sa.String(150))
@@ -0,0 +1,23 @@
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, updated_at
+
+
+class GroupMemberBalance(Base):
+    """
+    Накопленные суммы транзакций участника группы.
+
+    Поддерживается transaction_service в той же транзакции БД, что и сами
+    транзакции, поэтому балансы читаются без агрегации по transactions.
+    """
+    __tablename__ = 'group_member_balances'
+
+    group_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('groups.id'), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('users.id'), primary_key=True)
+    expense: Mapped[float] = mapped_column(sa.Numeric(precision=14, scale=2), default=0, server_default='0')
+    income: Mapped[float] = mapped_column(sa.Numeric(precision=14, scale=2), default=0, server_default='0')
+    tx_count: Mapped[int] = mapped_column(default=0, server_default='0')
+    updated_at: Mapped[updated_at]
@@ -0,0 +1,38 @@
+import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, intpk, created_at, updated_at, JobStatus
+
+
+class Job(Base):
+    """
+    Фоновая задача: kind — имя обработчика (@job), payload — его аргументы.
+
+    Готова к запуску в статусе queued с run_at <= now; в статусе running
+    принадлежит воркеру locked_by до locked_until, после чего её может
+    забрать другой воркер. Меньший priority запускается раньше.
+    """
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        sa.Index('ix_jobs_ready', 'priority', 'run_at', postgresql_where=sa.text("status = 'queued'")),
+        sa.Index('ix_jobs_running', 'kind', 'locked_until', postgresql_where=sa.text("status = 'running'")),
+    )
+
+    id: Mapped[intpk]
+    kind: Mapped[str] = mapped_column(sa.String(64))
+    payload: Mapped[dict] = mapped_column(sa.JSON, default=dict)
+    status: Mapped[JobStatus] = mapped_column(default=JobStatus.queued, server_default=JobStatus.queued.value)
+    priority: Mapped[int] = mapped_column(default=0, server_default='0')
+    attempts: Mapped[int] = mapped_column(default=0, server_default='0')
+    max_attempts: Mapped[int]
+    run_at: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    locked_by: Mapped[str | None] = mapped_column(sa.String(64))
+    locked_until: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+    result: Mapped[dict | None] = mapped_column(sa.JSON)
+    last_error: Mapped[str | None] = mapped_column(sa.Text)
+    created_at: Mapped[created_at]
+    updated_at: Mapped[updated_at]
+    finished_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,34 @@
+import datetime
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy import DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, intpk, created_at, updated_at, TransactionType
+
+
+class RecurringTransaction(Base):
+    """
+    Шаблон повторяющейся транзакции. Расписание — правило RRULE (RFC 5545)
+    от dtstart; next_run_at — ближайшее ещё не созданное повторение.
+    """
+    __tablename__ = 'recurring_transactions'
+    __table_args__ = (
+        sa.Index('ix_recurring_transactions_due', 'next_run_at', postgresql_where=sa.text('is_active')),
+        sa.Index('ix_recurring_transactions_group_id', 'group_id'),
+    )
+
+    id: Mapped[intpk]
+    group_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('groups.id'))
+    category_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('categories.id'))
+    user_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('users.id'))
+    amount: Mapped[float] = mapped_column(sa.Numeric(precision=12, scale=2))
+    type: Mapped[TransactionType]
+    description: Mapped[str | None]
+    rrule: Mapped[str] = mapped_column(sa.String(500))
+    dtstart: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True))
+    next_run_at: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+    is_active: Mapped[bool] = mapped_column(default=True, server_default=sa.text('true'))
+    created_at: Mapped[created_at]
+    updated_at: Mapped[updated_at]
@@ -2,26 +2,55 @@ import datetime
 import uuid
 
 import sqlalchemy as sa
-from sqlalchemy import DateTime
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import DateTime, DDL, event
+from sqlalchemy.orm import Mapped, declared_attr, mapped_column, relationship
 
 from app.db.base import Base, intpk, created_at, updated_at, TransactionType
 
 
 class Transaction(Base):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        sa.Index('ix_transactions_group_id_updated_at', 'group_id', 'updated_at'),
+        # последние транзакции и выборки за месяц
+        sa.Index('ix_transactions_group_id_date', 'group_id', 'date'),
+        # повторение шаблона создаётся не больше одного раза
+        sa.UniqueConstraint('recurring_id', 'date', name='uq_transactions_recurring_id_date'),
+        # полнотекстовый и нечёткий поиск по описанию (только Postgres, см. миграцию)
+        sa.Index(
+            'ix_transactions_description_tsv',
+            sa.text("to_tsvector('simple'::regconfig, coalesce(description, ''))"),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+        sa.Index(
+            'ix_transactions_description_trgm',
+            'description',
+            postgresql_using='gin',
+            postgresql_ops={'description': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+        # Postgres: помесячные секции по дате операции (app/db/partitions.py)
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
 
     id:  Mapped[intpk]
     group_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('groups.id'))
     category_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('categories.id'))
     user_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('users.id'))
+    recurring_id: Mapped[uuid.UUID | None] = mapped_column(sa.ForeignKey('recurring_transactions.id'))
     amount: Mapped[float] = mapped_column(sa.Numeric(precision=12, scale=2))
     type: Mapped[TransactionType]
     description: Mapped[str | None]
-    date: Mapped[datetime.datetime | None] = mapped_column(DateTime(timezone=True))
+    # ключ секционирования входит в первичный ключ таблицы (требование Postgres)
+    date: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
 
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict:
+        # для ORM транзакция по-прежнему определяется одним id;
+        # eager_defaults из Base директива иначе перекрыла бы
+        return {**Base.__mapper_args__, 'primary_key': [cls.__table__.c.id]}
+
     group: Mapped["Group"] = relationship(
         "Group",
         back_populates="transactions",
@@ -35,3 +64,37 @@ class Transaction(Base):
         "User",
         back_populates="transactions",
     )
+
+
+# SQLite (тесты, локальная разработка): поиск через FTS5 external-content таблицу,
+# синхронизируемую триггерами, поэтому её видят и ORM, и set-based UPDATE/DELETE
+transactions_fts = sa.table('transactions_fts', sa.column('rowid'), sa.column('description'))
+
+for statement in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5("
+    "description, content='transactions', content_rowid='rowid', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts(rowid, description) VALUES (new.rowid, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description) "
+    "VALUES ('delete', old.rowid, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF description ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description) "
+    "VALUES ('delete', old.rowid, old.description); "
+    "INSERT INTO transactions_fts(rowid, description) VALUES (new.rowid, new.description); END",
+):
+    event.listen(Transaction.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+# секция по умолчанию: строки вне созданных месяцев (см. ensure_transaction_partitions)
+event.listen(
+    Transaction.__table__,
+    'after_create',
+    DDL("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT").execute_if(dialect='postgresql'),
+)
+
+event.listen(
+    Transaction.__table__,
+    'before_drop',
+    DDL("DROP TABLE IF EXISTS transactions_fts").execute_if(dialect='sqlite'),
+)
@@ -0,0 +1,47 @@
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, intpk, created_at
+
+
+class TransactionArchive(Base):
+    """
+    Файл архива (Parquet): транзакции группы за закрытый год, перенесённые
+    из transactions. За один год может быть несколько файлов — транзакции,
+    задним числом добавленные после архивации, уходят следующим файлом.
+    """
+    __tablename__ = 'transaction_archives'
+    __table_args__ = (
+        sa.Index('ix_transaction_archives_group_id_year', 'group_id', 'year'),
+    )
+
+    id: Mapped[intpk]
+    group_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('groups.id'))
+    year: Mapped[int]
+    # путь относительно ARCHIVE_DIR
+    path: Mapped[str] = mapped_column(sa.String(500))
+    row_count: Mapped[int]
+    nbytes: Mapped[int] = mapped_column(sa.BigInteger)
+    created_at: Mapped[created_at]
+
+
+class TransactionArchiveTotal(Base):
+    """
+    Суммы архивного файла по участнику: балансы сверяются с ними,
+    не читая файлы.
+    """
+    __tablename__ = 'transaction_archive_totals'
+    __table_args__ = (
+        sa.Index('ix_transaction_archive_totals_group_id', 'group_id'),
+    )
+
+    archive_id: Mapped[uuid.UUID] = mapped_column(
+        sa.ForeignKey('transaction_archives.id', ondelete='CASCADE'), primary_key=True
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('users.id'), primary_key=True)
+    group_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('groups.id'))
+    expense: Mapped[float] = mapped_column(sa.Numeric(precision=14, scale=2))
+    income: Mapped[float] = mapped_column(sa.Numeric(precision=14, scale=2))
+    tx_count: Mapped[int]
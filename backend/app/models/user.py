@@ -8,6 +8,11 @@ from app.db.base import Base, intpk, created_at, updated_at, UserRole
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # поиск по email среди активных; удалённые ждут очистки в отдельном индексе
+        sa.Index('ix_users_email_active', 'email', postgresql_where=sa.text('is_active')),
+        sa.Index('ix_users_deleted_at', 'deleted_at', postgresql_where=sa.text('NOT is_active')),
+    )
 
     id: Mapped[intpk]
     email: Mapped[str] = mapped_column(sa.String(255), unique=True)
@@ -3,17 +3,22 @@ import uuid
 import sqlalchemy as sa
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.db.base import Base, intpk, created_at, GroupRole
+from app.db.base import Base, intpk, created_at, updated_at, GroupRole
 
 
 class UserGroup(Base):
     __tablename__ = 'user_groups'
+    __table_args__ = (
+        sa.Index('ix_user_groups_group_id_user_id', 'group_id', 'user_id'),
+        sa.Index('ix_user_groups_user_id', 'user_id'),
+    )
 
     id: Mapped[intpk]
     user_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('users.id'))
     group_id: Mapped[uuid.UUID] = mapped_column(sa.ForeignKey('groups.id'))
     role: Mapped[GroupRole] = mapped_column(default=GroupRole.member, server_default=GroupRole.member.value)
     joined_at: Mapped[created_at]
+    updated_at: Mapped[updated_at]
 
     user: Mapped["User"] = relationship(
         "User",
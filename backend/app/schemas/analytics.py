@@ -0,0 +1,18 @@
+import uuid
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+Dimension = Literal["category", "user", "type", "year", "month", "week", "day"]
+
+
+class AnalyticsBreakdown(BaseModel):
+    by: list[Dimension]
+    rows: list[dict[str, Any]]
+
+
+class AnalyticsPivot(BaseModel):
+    index: list[Any]
+    columns: list[Any]
+    values: list[list[float]]
+    names: dict[uuid.UUID, str]
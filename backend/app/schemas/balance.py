@@ -0,0 +1,31 @@
+import uuid
+
+from pydantic import BaseModel
+
+
+class MemberBalance(BaseModel):
+    user_id: uuid.UUID
+    expense: float
+    income: float
+    share: float
+    balance: float
+
+
+class SettlementTransfer(BaseModel):
+    from_user_id: uuid.UUID
+    to_user_id: uuid.UUID
+    amount: float
+
+
+class GroupBalances(BaseModel):
+    group_id: uuid.UUID
+    members: list[MemberBalance]
+    settle_up: list[SettlementTransfer]
+
+
+class BalanceMismatch(BaseModel):
+    user_id: uuid.UUID
+    expense: float
+    income: float
+    expected_expense: float
+    expected_income: float
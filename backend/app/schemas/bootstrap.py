@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.db.base import GroupRole
+from app.schemas.category import CategoryRead
+from app.schemas.group import GroupBase
+from app.schemas.transaction import TransactionRead
+from app.schemas.user import UserRead
+
+
+class GroupInfo(GroupBase):
+    id: uuid.UUID
+    owner_id: uuid.UUID
+    created_at: datetime
+    updated_at: datetime
+    is_active: bool
+    deleted_at: datetime | None = None
+
+
+class GroupMemberRead(BaseModel):
+    user: UserRead
+    role: GroupRole
+    joined_at: datetime
+
+
+class CategoryMonthSummary(BaseModel):
+    category_id: uuid.UUID
+    income: float
+    expense: float
+
+
+class MonthSummary(BaseModel):
+    month: str
+    total_income: float
+    total_expense: float
+    by_category: list[CategoryMonthSummary]
+
+
+class GroupBootstrap(BaseModel):
+    group: GroupInfo
+    members: list[GroupMemberRead]
+    categories: list[CategoryRead]
+    transactions: list[TransactionRead]
+    summary: MonthSummary
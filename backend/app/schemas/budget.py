@@ -0,0 +1,18 @@
+import uuid
+
+from pydantic import BaseModel, Field
+
+
+class BudgetCreate(BaseModel):
+    category_id: uuid.UUID | None = None
+    amount: float = Field(..., gt=0)
+
+
+class BudgetRead(BaseModel):
+    id: uuid.UUID
+    group_id: uuid.UUID
+    category_id: uuid.UUID | None
+    amount: float
+    month: str
+    spent: float
+    utilization: float
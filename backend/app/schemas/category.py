@@ -20,4 +20,13 @@ class CategoryRead(CategoryBase):
 
 class CategoryUpdate(BaseModel):
     name: str | None = None
-    icon: str | None = None
\ No newline at end of file
+    icon: str | None = None
+
+
+class CategoryMerge(BaseModel):
+    target_id: uuid.UUID
+
+
+class CategoryMergeResult(BaseModel):
+    target_id: uuid.UUID
+    moved: int
@@ -1,9 +1,11 @@
 import uuid
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 from app.db.base import GroupRole
+from app.schemas.category import CategoryCreate
 from app.schemas.user import UserRead
 
 
@@ -13,7 +15,7 @@ class GroupBase(BaseModel):
 
 
 class GroupCreate(GroupBase):
-    pass
+    categories: list[CategoryCreate] = []
 
 
 class GroupRead(GroupBase):
@@ -35,6 +37,17 @@ class GroupAddUser(BaseModel):
     role: GroupRole = GroupRole.member
 
 
+class GroupAddUsers(BaseModel):
+    emails: list[EmailStr] = Field(..., min_length=1, max_length=1000)
+    role: GroupRole = GroupRole.member
+
+
+class GroupAddUserResult(BaseModel):
+    email: EmailStr
+    status: Literal['added', 'already_member', 'not_found']
+    user_id: uuid.UUID | None = None
+
+
 class UserGroupBase(BaseModel):
     user_id: uuid.UUID
     group_id: uuid.UUID
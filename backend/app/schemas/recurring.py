@@ -0,0 +1,24 @@
+import uuid
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.db.base import TransactionType
+
+
+class RecurringCreate(BaseModel):
+    category_id: uuid.UUID
+    amount: float
+    type: TransactionType
+    description: str
+    rrule: str = Field(..., max_length=500, examples=['FREQ=MONTHLY;BYMONTHDAY=1'])
+    dtstart: datetime
+
+
+class RecurringRead(RecurringCreate):
+    id: uuid.UUID
+    group_id: uuid.UUID
+    user_id: uuid.UUID
+    next_run_at: datetime | None
+    is_active: bool
+    created_at: datetime
@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 from app.db.base import TransactionType
 
@@ -22,6 +23,7 @@ class TransactionCreate(TransactionBase):
 class TransactionRead(TransactionBase):
     id: uuid.UUID
     user_id: uuid.UUID
+    recurring_id: uuid.UUID | None = None
     created_at: datetime
     updated_at: datetime
 
@@ -32,3 +34,39 @@ class TransactionUpdate(BaseModel):
     description: str | None = None
     date: datetime | None = None
     category_id: uuid.UUID | None = None
+
+
+class TransactionSearchPage(BaseModel):
+    items: list[TransactionRead]
+    next_cursor: str | None = None
+
+
+class TransactionFilter(BaseModel):
+    user_id: uuid.UUID | None = None
+    category_id: uuid.UUID | None = None
+    date_from: datetime | None = None
+    date_to: datetime | None = None
+    tx_type: TransactionType | None = None
+
+
+class TransactionBatch(BaseModel):
+    ids: list[uuid.UUID] | None = Field(None, max_length=10000)
+    filter: TransactionFilter | None = None
+    op: Literal['delete', 'set_category', 'set_type', 'shift_date']
+    category_id: uuid.UUID | None = None
+    type: TransactionType | None = None
+    days: int | None = None
+
+    @model_validator(mode='after')
+    def check_operation(self):
+        if self.ids is None and self.filter is None:
+            raise ValueError('ids or filter is required')
+        required = {'set_category': 'category_id', 'set_type': 'type', 'shift_date': 'days'}.get(self.op)
+        if required and getattr(self, required) is None:
+            raise ValueError(f'{required} is required for {self.op}')
+        return self
+
+
+class TransactionBatchResult(BaseModel):
+    op: str
+    affected: int
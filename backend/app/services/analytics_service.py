@@ -0,0 +1,575 @@
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import select, func, cast, BigInteger, literal_column, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.archive import read_archived, amount_cents, period_end
+from app.db.base import TransactionType
+from app.models.category import Category
+from app.models.group_member_balance import GroupMemberBalance
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.user_group import UserGroup
+
+# Измерения, по которым можно группировать
+DIMENSIONS = ("category", "user", "type", "year", "month", "week", "day")
+# Тип транзакции кодируется так же, как порядок в TYPES
+TYPES = (TransactionType.expense, TransactionType.income)
+OTHER_LABEL = "Прочие"
+# До этого числа комбинаций ключей суммируем плотным bincount, дальше — через np.unique
+DENSE_KEYS_LIMIT = 1 << 22
+
+# Колонки архива, из которых строится фрейм
+FRAME_ARCHIVE_COLUMNS = ["id", "category_id", "user_id", "category_name", "user_name", "amount", "type", "date"]
+
+_BUCKETS = {"year": "datetime64[Y]", "month": "datetime64[M]", "week": "datetime64[W]", "day": "datetime64[D]"}
+
+
+class TransactionFrame:
+    """
+    Транзакции группы в колоночном виде.
+
+    ids — UUID транзакций (16 байт), category и user — целочисленные коды
+    (индексы в category_ids / user_ids), cents — сумма в копейках (int64),
+    dates — datetime64[s] (UTC), types — индекс в TYPES.
+    """
+
+    def __init__(
+            self,
+            ids: np.ndarray,
+            category: np.ndarray,
+            user: np.ndarray,
+            cents: np.ndarray,
+            dates: np.ndarray,
+            types: np.ndarray,
+            category_ids: list[uuid.UUID],
+            user_ids: list[uuid.UUID],
+            category_names: dict[uuid.UUID, str] | None = None,
+            user_names: dict[uuid.UUID, str] | None = None,
+    ) -> None:
+        self.ids = ids
+        self.category = category
+        self.user = user
+        self.cents = cents
+        self.dates = dates
+        self.types = types
+        self.category_ids = category_ids
+        self.user_ids = user_ids
+        self.category_names = category_names or {}
+        self.user_names = user_names or {}
+
+    def __len__(self) -> int:
+        return len(self.cents)
+
+    @property
+    def nbytes(self) -> int:
+        """Примерный объём в памяти: массивы плюс справочники кодов и названий."""
+        arrays = self.ids.nbytes + self.category.nbytes + self.user.nbytes
+        arrays += self.cents.nbytes + self.dates.nbytes + self.types.nbytes
+        # UUID в списке кодов и пара UUID -> str в словаре названий — порядка 100 и 200 байт
+        codes = 100 * (len(self.category_ids) + len(self.user_ids))
+        names = sum(200 + len(name) for name in (*self.category_names.values(), *self.user_names.values()))
+        return arrays + codes + names
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple], **names) -> "TransactionFrame":
+        """
+        Строит фрейм из строк (id, category_id, user_id, cents, epoch_seconds, is_income).
+        """
+        category_codes: dict[uuid.UUID, int] = {}
+        user_codes: dict[uuid.UUID, int] = {}
+        columns = list(zip(*rows)) or [()] * 6
+        ids, category_ids, user_ids, cents, seconds, incomes = columns
+
+        category = np.fromiter(
+            (category_codes.setdefault(c, len(category_codes)) for c in category_ids), np.int32, len(rows)
+        )
+        user = np.fromiter((user_codes.setdefault(u, len(user_codes)) for u in user_ids), np.int32, len(rows))
+        return cls(
+            ids=np.array([tx_id.bytes for tx_id in ids], dtype="S16"),
+            category=category,
+            user=user,
+            cents=np.fromiter(cents, np.int64, len(rows)),
+            dates=np.fromiter(seconds, np.int64, len(rows)).astype("datetime64[s]"),
+            types=np.fromiter(incomes, np.int8, len(rows)),
+            category_ids=list(category_codes),
+            user_ids=list(user_codes),
+            **names,
+        )
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table) -> "TransactionFrame":
+        """
+        Строит фрейм из архивной таблицы (колонки FRAME_ARCHIVE_COLUMNS)
+        без построчного прохода; названия берутся из архива.
+        """
+        def encode(ids: str, names: str) -> tuple[np.ndarray, list, dict]:
+            encoded = pc.dictionary_encode(table.column(ids).combine_chunks())
+            codes = encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32)
+            values = [uuid.UUID(bytes=value) for value in encoded.dictionary.to_pylist()]
+            _, first = np.unique(codes, return_index=True)
+            return codes, values, dict(zip(values, table.column(names).take(first).to_pylist()))
+
+        category, category_ids, category_names = encode("category_id", "category_name")
+        user, user_ids, user_names = encode("user_id", "user_name")
+        ids = table.column("id").combine_chunks()
+        return cls(
+            ids=np.frombuffer(ids.buffers()[1], dtype="S16")[ids.offset:ids.offset + len(ids)],
+            category=category,
+            user=user,
+            cents=amount_cents(table).to_numpy(),
+            dates=table.column("date").to_numpy().astype("datetime64[s]"),
+            types=pc.equal(table.column("type"), TransactionType.income.value).to_numpy().astype(np.int8),
+            category_ids=category_ids,
+            user_ids=user_ids,
+            category_names=category_names,
+            user_names=user_names,
+        )
+
+    def merged(self, rows: Sequence[tuple]) -> "TransactionFrame":
+        """
+        Новый фрейм, в котором строки rows заменяют строки с теми же id или добавляются.
+
+        :param rows: строки в формате from_rows (новые и изменённые транзакции)
+        """
+        return self.combined(TransactionFrame.from_rows(rows))
+
+    def combined(self, update: "TransactionFrame") -> "TransactionFrame":
+        """Новый фрейм: строки update заменяют строки с теми же id или добавляются."""
+        keep = ~np.isin(self.ids, update.ids)
+
+        def recode(known: list, added: list, codes: np.ndarray) -> tuple[list, np.ndarray]:
+            index = {value: code for code, value in enumerate(known)}
+            mapping = np.fromiter((index.setdefault(value, len(index)) for value in added), np.int32, len(added))
+            return list(index), mapping[codes] if len(codes) else codes
+
+        category_ids, category = recode(self.category_ids, update.category_ids, update.category)
+        user_ids, user = recode(self.user_ids, update.user_ids, update.user)
+        return TransactionFrame(
+            ids=np.concatenate([self.ids[keep], update.ids]),
+            category=np.concatenate([self.category[keep], category]),
+            user=np.concatenate([self.user[keep], user]),
+            cents=np.concatenate([self.cents[keep], update.cents]),
+            dates=np.concatenate([self.dates[keep], update.dates]),
+            types=np.concatenate([self.types[keep], update.types]),
+            category_ids=category_ids,
+            user_ids=user_ids,
+            category_names={**self.category_names, **update.category_names},
+            user_names={**self.user_names, **update.user_names},
+        )
+
+    def mask(
+            self,
+            tx_type: TransactionType | None = None,
+            date_from: datetime | date | None = None,
+            date_to: datetime | date | None = None,
+    ) -> np.ndarray:
+        """Булева маска строк по типу и периоду (date_to включительно; дата без времени — весь день)."""
+        selected = np.ones(len(self), dtype=bool)
+        if tx_type is not None:
+            selected &= self.types == TYPES.index(tx_type)
+        if date_from is not None:
+            selected &= self.dates >= np.datetime64(date_from, "s")
+        if date_to is not None:
+            end, inclusive = period_end(date_to)
+            end = np.datetime64(end, "s")
+            selected &= self.dates <= end if inclusive else self.dates < end
+        return selected
+
+    def _codes(self, dimension: str, selected: np.ndarray) -> tuple[np.ndarray, int, list]:
+        """Коды строк по измерению (0..size-1), число значений и подписи кодов."""
+        if dimension == "category":
+            return self.category[selected], len(self.category_ids), self.category_ids
+        if dimension == "user":
+            return self.user[selected], len(self.user_ids), self.user_ids
+        if dimension == "type":
+            return self.types[selected], len(TYPES), [t.value for t in TYPES]
+        if dimension in _BUCKETS:
+            dates = self.dates[selected]
+            if dimension == "week":
+                # недели datetime64[W] начинаются с четверга (1970-01-01): сдвигаем к понедельнику
+                dates = dates.astype("datetime64[D]") + 3
+            buckets = dates.astype(_BUCKETS[dimension])
+            if not len(buckets):
+                return buckets.astype(np.int64), 0, []
+            first, last = buckets.min(), buckets.max()
+            starts = np.arange(first, last + 1)
+            if dimension == "week":
+                starts = starts.astype("datetime64[D]") - 3
+            return (buckets - first).astype(np.int64), len(starts), starts.astype(str).tolist()
+        raise ValueError(f"Unknown dimension: {dimension}")
+
+    def group_sum(
+            self,
+            by: Sequence[str],
+            tx_type: TransactionType | None = None,
+            date_from: datetime | date | None = None,
+            date_to: datetime | date | None = None,
+    ) -> list[dict]:
+        """
+        Суммы и количества по комбинациям измерений (только непустые комбинации).
+
+        Ключи измерений сводятся в один линейный индекс, суммы считаются
+        одним bincount без циклов по строкам.
+
+        :param by: измерения из DIMENSIONS
+        :param tx_type: только расходы или только доходы
+        :param date_from: начало периода
+        :param date_to: конец периода (включительно)
+        :return: список словарей {<измерение>: значение, ..., amount, count}
+        """
+        selected = self.mask(tx_type, date_from, date_to)
+        cents = self.cents[selected]
+        if not by:
+            return [{"amount": int(cents.sum()) / 100, "count": int(cents.size)}] if cents.size else []
+
+        codes, sizes, labels = zip(*(self._codes(dimension, selected) for dimension in by))
+        if not cents.size:
+            return []
+
+        total = int(np.prod(sizes, dtype=np.int64))
+        linear = np.ravel_multi_index(codes, sizes) if len(by) > 1 else codes[0]
+        if total <= DENSE_KEYS_LIMIT:
+            counts = np.bincount(linear, minlength=total)
+            keys = np.flatnonzero(counts)
+            counts = counts[keys]
+            sums = np.bincount(linear, weights=cents, minlength=total)[keys]
+        else:
+            keys, inverse, counts = np.unique(linear, return_inverse=True, return_counts=True)
+            sums = np.bincount(inverse, weights=cents)
+
+        parts = np.unravel_index(keys, sizes) if len(by) > 1 else (keys,)
+        columns = [np.asarray(labels[i], dtype=object)[part].tolist() for i, part in enumerate(parts)]
+        names = (*by, "amount", "count")
+        return [
+            dict(zip(names, values))
+            for values in zip(*columns, (np.rint(sums) / 100).tolist(), counts.tolist())
+        ]
+
+    def pivot(
+            self,
+            index: str,
+            columns: str,
+            tx_type: TransactionType | None = None,
+            date_from: datetime | date | None = None,
+            date_to: datetime | date | None = None,
+    ) -> dict:
+        """
+        Сводная таблица сумм: строки — значения index, столбцы — значения columns.
+
+        Пустые строки и столбцы отбрасываются.
+
+        :return: словарь {index: [...], columns: [...], values: [[...], ...]}
+        """
+        selected = self.mask(tx_type, date_from, date_to)
+        row_codes, n_rows, row_labels = self._codes(index, selected)
+        col_codes, n_cols, col_labels = self._codes(columns, selected)
+        if not row_codes.size:
+            return {"index": [], "columns": [], "values": []}
+
+        linear = row_codes.astype(np.int64) * n_cols + col_codes
+        counts = np.bincount(linear, minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+        cells = np.bincount(linear, weights=self.cents[selected], minlength=n_rows * n_cols).reshape(n_rows, n_cols)
+        rows = np.flatnonzero(counts.any(axis=1))
+        cols = np.flatnonzero(counts.any(axis=0))
+        return {
+            "index": np.asarray(row_labels, dtype=object)[rows].tolist(),
+            "columns": np.asarray(col_labels, dtype=object)[cols].tolist(),
+            "values": (np.rint(cells[np.ix_(rows, cols)]) / 100).tolist(),
+        }
+
+    def named(self, rows: list[dict]) -> list[dict]:
+        """Добавляет к строкам group_sum названия категорий и имена пользователей."""
+        for row in rows:
+            if "category" in row:
+                row["category_name"] = self.category_names.get(row["category"])
+            if "user" in row:
+                row["user_name"] = self.user_names.get(row["user"])
+        return rows
+
+    def totals_by(
+            self,
+            dimension: str,
+            tx_type: TransactionType,
+            date_from: datetime | date | None = None,
+            date_to: datetime | date | None = None,
+            names: dict | None = None,
+    ) -> dict[str, float]:
+        """
+        Суммы по одному измерению как {подпись: сумма}; одинаковые подписи складываются.
+
+        :param dimension: category или user
+        :param tx_type: тип транзакций
+        :param date_from: начало периода
+        :param date_to: конец периода (включительно)
+        :param names: подписи кодов (по умолчанию названия категорий / имена пользователей)
+        """
+        if names is None:
+            names = self.category_names if dimension == "category" else self.user_names
+        out: dict[str, float] = {}
+        for row in self.group_sum([dimension], tx_type, date_from, date_to):
+            label = names.get(row[dimension], str(row[dimension]))
+            out[label] = round(out.get(label, 0.0) + row["amount"], 2)
+        return out
+
+
+def top_n(items: dict[str, float], n: int = 5, other: str = OTHER_LABEL) -> list[tuple[str, float]]:
+    """
+    Первые n значений по убыванию и сумма остальных одной строкой «Прочие».
+
+    :param items: {подпись: значение}
+    :param n: сколько значений оставить
+    :param other: подпись для суммы остальных
+    :return: список пар (подпись, значение)
+    """
+    if not items:
+        return []
+    labels = np.array(list(items), dtype=object)
+    values = np.fromiter(items.values(), np.float64, len(items))
+    order = np.argsort(-values, kind="stable")
+    top = [(labels[i], float(values[i])) for i in order[:n]]
+    if len(order) > n:
+        top.append((other, float(values[order[n:]].sum())))
+    return top
+
+
+def _epoch_seconds(db: AsyncSession, value):
+    """Выражение «секунды от 1970-01-01 UTC» для текущего диалекта."""
+    if db.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime(literal_column("'%s'"), value), BigInteger)
+    return cast(func.extract("epoch", value), BigInteger)
+
+
+def _frame_query(db: AsyncSession, *conditions):
+    return (
+        select(
+            Transaction.id,
+            Transaction.category_id,
+            Transaction.user_id,
+            cast(func.round(Transaction.amount * 100), BigInteger),
+            _epoch_seconds(db, Transaction.date),
+            Transaction.type == TransactionType.income,
+        )
+        .filter(*conditions)
+    )
+
+
+async def _load_names(db: AsyncSession, frame: TransactionFrame, refresh: bool = False) -> None:
+    """
+    Дочитывает названия категорий и имена пользователей, которых ещё нет во фрейме.
+
+    :param refresh: перечитать все: текущие названия из БД важнее сохранённых в архиве
+    """
+    missing = [c for c in frame.category_ids if refresh or c not in frame.category_names]
+    if missing:
+        categories = await db.execute(select(Category.id, Category.name).filter(Category.id.in_(missing)))
+        frame.category_names = {**frame.category_names, **dict(categories.tuples().all())}
+    missing = [u for u in frame.user_ids if refresh or u not in frame.user_names]
+    if missing:
+        users = await db.execute(select(User.id, User.name).filter(User.id.in_(missing)))
+        frame.user_names = {**frame.user_names, **dict(users.tuples().all())}
+
+
+async def _load_frame(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        date_from: datetime | date | None = None,
+        date_to: datetime | date | None = None,
+) -> tuple[TransactionFrame, int]:
+    conditions = [Transaction.group_id == group_id]
+    if date_from:
+        conditions.append(Transaction.date >= date_from)
+    if date_to:
+        end, inclusive = period_end(date_to)
+        conditions.append(Transaction.date <= end if inclusive else Transaction.date < end)
+
+    archived = TransactionFrame.from_arrow(
+        await read_archived(db, group_id, FRAME_ARCHIVE_COLUMNS, date_from, date_to)
+    )
+    result = await db.execute(_frame_query(db, *conditions))
+    frame = archived.combined(TransactionFrame.from_rows(result.tuples().all()))
+    await _load_names(db, frame, refresh=True)
+    return frame, len(archived)
+
+
+async def load_transactions_frame(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        date_from: datetime | date | None = None,
+        date_to: datetime | date | None = None,
+) -> TransactionFrame:
+    """
+    Загружает транзакции группы одним запросом только нужных колонок
+    (копейки и секунды считает БД) плюс по запросу на названия категорий
+    и имена пользователей. Архивные годы периода дочитываются из Parquet.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param date_from: начало периода
+    :param date_to: конец периода (включительно)
+    :return: TransactionFrame
+    """
+    frame, _ = await _load_frame(db, group_id, date_from, date_to)
+    return frame
+
+
+class Snapshot:
+    __slots__ = ("frame", "version", "archived", "checked_at", "dirty", "nbytes")
+
+    def __init__(self, frame: TransactionFrame, version: tuple, archived: int = 0) -> None:
+        self.frame = frame
+        # версия группы на момент загрузки (см. _version)
+        self.version = version
+        # сколько строк фрейма прочитано из архива
+        self.archived = archived
+        self.checked_at = time.monotonic()
+        self.dirty = False
+        self.nbytes = frame.nbytes
+
+
+class SnapshotCache:
+    """
+    LRU-кэш фреймов групп в памяти процесса с ограничением по объёму.
+
+    Снимок считается свежим, пока его не пометили записью в этом процессе
+    (touch) и не прошло check_interval секунд с последней сверки версии
+    группы. Изменения из других процессов, включая переименования категорий
+    и пользователей, видны не позже чем через check_interval. Объём снимка
+    считается при загрузке; при превышении max_bytes вытесняются давно не
+    читавшиеся группы.
+    """
+
+    def __init__(self, max_bytes: int, check_interval: float) -> None:
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._snapshots: OrderedDict[uuid.UUID, Snapshot] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def get(self, group_id: uuid.UUID) -> Snapshot | None:
+        snapshot = self._snapshots.get(group_id)
+        if snapshot is not None:
+            self._snapshots.move_to_end(group_id)
+        return snapshot
+
+    def is_fresh(self, snapshot: Snapshot) -> bool:
+        return not snapshot.dirty and time.monotonic() - snapshot.checked_at < self.check_interval
+
+    def put(self, group_id: uuid.UUID, snapshot: Snapshot) -> None:
+        self.invalidate(group_id)
+        if snapshot.nbytes > self.max_bytes:
+            return
+        self._snapshots[group_id] = snapshot
+        self.nbytes += snapshot.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._snapshots.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def touch(self, group_id: uuid.UUID) -> None:
+        """Транзакции группы изменились: при следующем чтении дочитать изменения."""
+        snapshot = self._snapshots.get(group_id)
+        if snapshot is not None:
+            snapshot.dirty = True
+
+    def invalidate(self, group_id: uuid.UUID) -> None:
+        """Снимок больше не годится (например, переименована категория)."""
+        snapshot = self._snapshots.pop(group_id, None)
+        if snapshot is not None:
+            self.nbytes -= snapshot.nbytes
+
+    def invalidate_user(self, user_id: uuid.UUID) -> None:
+        """Пользователь переименован: сбрасываем снимки групп, где он есть."""
+        for group_id in [g for g, snapshot in self._snapshots.items() if user_id in snapshot.frame.user_names]:
+            self.invalidate(group_id)
+
+    def stats(self) -> dict:
+        return {"groups": len(self), "nbytes": self.nbytes, "hits": self.hits, "misses": self.misses}
+
+
+snapshot_cache = SnapshotCache(settings.SNAPSHOT_CACHE_MAX_BYTES, settings.SNAPSHOT_CHECK_SECONDS)
+
+
+async def _version(db: AsyncSession, group_id: uuid.UUID) -> tuple:
+    """
+    Версия группы одним запросом: (count, max(updated_at)) транзакций — как
+    версия ETag списка, по индексу group_id, updated_at, — и max(updated_at)
+    категорий группы и пользователей, чьи имена могут быть во фрейме
+    (участники и все, у кого есть строка баланса, в том числе по архиву).
+
+    Последние два поля — версия названий: переименование в другом процессе
+    его snapshot_cache не сбросит, но изменит версию.
+    """
+    user_ids = union(
+        select(UserGroup.user_id).filter(UserGroup.group_id == group_id),
+        select(GroupMemberBalance.user_id).filter(GroupMemberBalance.group_id == group_id),
+    )
+    result = await db.execute(
+        select(
+            func.count(Transaction.id),
+            func.max(Transaction.updated_at),
+            select(func.max(Category.updated_at)).filter(Category.group_id == group_id).scalar_subquery(),
+            select(func.max(User.updated_at)).filter(User.id.in_(user_ids)).scalar_subquery(),
+        )
+        .filter(Transaction.group_id == group_id)
+    )
+    return tuple(result.one())
+
+
+async def get_group_frame(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> TransactionFrame:
+    """
+    Возвращает фрейм всех транзакций группы из snapshot_cache.
+
+    Свежий снимок отдаётся без запросов к БД. Иначе сверяется версия группы;
+    если она изменилась, дочитываются строки, изменённые начиная с водяного
+    знака updated_at (с запасом SNAPSHOT_WATERMARK_OVERLAP_SECONDS на
+    транзакции, закоммиченные позже своего now()), а при смене версии
+    названий перечитываются все названия. Если после этого число строк
+    не совпало с БД — были удаления, и группа загружается целиком, вместе
+    с архивом.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: TransactionFrame; изменять его нельзя, он общий для всех читателей
+    """
+    snapshot = snapshot_cache.get(group_id)
+    if snapshot is not None and snapshot_cache.is_fresh(snapshot):
+        snapshot_cache.hits += 1
+        return snapshot.frame
+    snapshot_cache.misses += 1
+
+    version = await _version(db, group_id)
+    # после своей записи версии не доверяем: updated_at мог совпасть с прежним максимумом
+    if snapshot is not None and not snapshot.dirty and version == snapshot.version:
+        snapshot.checked_at = time.monotonic()
+        return snapshot.frame
+
+    count = version[0]
+    if snapshot is not None and snapshot.version[1] is not None and count >= snapshot.version[0]:
+        since = snapshot.version[1] - timedelta(seconds=settings.SNAPSHOT_WATERMARK_OVERLAP_SECONDS)
+        result = await db.execute(
+            _frame_query(db, Transaction.group_id == group_id, Transaction.updated_at >= since)
+        )
+        frame = snapshot.frame.merged(result.tuples().all())
+        if len(frame) == count + snapshot.archived:
+            await _load_names(db, frame, refresh=version[2:] != snapshot.version[2:])
+            snapshot_cache.put(group_id, Snapshot(frame, version, snapshot.archived))
+            return frame
+
+    frame, archived = await _load_frame(db, group_id)
+    snapshot_cache.put(group_id, Snapshot(frame, version, archived))
+    return frame
@@ -0,0 +1,144 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from functools import partial
+
+from loguru import logger
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.events import on_commit, publish_after_commit
+from app.db.archive import ArchiveFile
+from app.db.base import TransactionType
+from app.db.partitions import drop_empty_partitions
+from app.db.shards import shard_router
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.transaction_archive import TransactionArchive, TransactionArchiveTotal
+from app.models.user import User
+from app.services.analytics_service import snapshot_cache
+
+# Строк на пачку чтения из БД и на row group Parquet
+ARCHIVE_BATCH_ROWS = 10000
+# Ограничение числа параметров в одном IN (...)
+IDS_PER_STATEMENT = 5000
+
+
+async def archive_group_year(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        year: int
+) -> int:
+    """
+    Переносит транзакции группы за календарный год в архивный Parquet-файл.
+
+    Строки читаются пачками с блокировкой (FOR UPDATE), пишутся в файл,
+    затем в одной транзакции БД добавляются запись манифеста и суммы по
+    участникам, а строки удаляются из transactions по id. Балансы и бюджеты
+    не меняются: они уже учитывают эти транзакции. Если коммит не прошёл,
+    файл удаляется.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param year: закрытый год
+    :return: количество перенесённых транзакций
+    """
+    archive_id = uuid.uuid4()
+    file = ArchiveFile(f'{group_id}/{year}-{archive_id}.parquet')
+    stmt = (
+        select(
+            Transaction.id, Transaction.category_id, Transaction.user_id, Transaction.recurring_id,
+            Category.name, User.name,
+            Transaction.amount, Transaction.type, Transaction.description,
+            Transaction.date, Transaction.created_at, Transaction.updated_at,
+        )
+        .join(Category, Category.id == Transaction.category_id)
+        .join(User, User.id == Transaction.user_id)
+        .filter(
+            Transaction.group_id == group_id,
+            Transaction.date >= datetime(year, 1, 1),
+            Transaction.date < datetime(year + 1, 1, 1),
+        )
+        .order_by(Transaction.date)
+        # изменения и удаления этих строк ждут конца архивации
+        .with_for_update(of=Transaction)
+        .execution_options(yield_per=ARCHIVE_BATCH_ROWS)
+    )
+
+    ids: list[uuid.UUID] = []
+    totals: dict[uuid.UUID, list] = {}
+    try:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            rows = [tuple(row) for row in rows]
+            await file.write(rows)
+            for tx_id, _, user_id, _, _, _, amount, tx_type, *_ in rows:
+                ids.append(tx_id)
+                total = totals.setdefault(user_id, [Decimal(0), Decimal(0), 0])
+                total[0 if tx_type == TransactionType.expense else 1] += amount
+                total[2] += 1
+        if not ids:
+            file.discard()
+            return 0
+        nbytes = await file.close()
+
+        db.add(TransactionArchive(
+            id=archive_id, group_id=group_id, year=year, path=file.path, row_count=len(ids), nbytes=nbytes
+        ))
+        db.add_all(
+            TransactionArchiveTotal(
+                archive_id=archive_id, user_id=user_id, group_id=group_id,
+                expense=expense, income=income, tx_count=tx_count,
+            )
+            for user_id, (expense, income, tx_count) in totals.items()
+        )
+        for start in range(0, len(ids), IDS_PER_STATEMENT):
+            await db.execute(
+                delete(Transaction)
+                .filter(Transaction.id.in_(ids[start:start + IDS_PER_STATEMENT]))
+                .execution_options(synchronize_session=False)
+            )
+        publish_after_commit(db, group_id, 'transaction.batch', {'op': 'archive', 'affected': len(ids)})
+        on_commit(db, partial(snapshot_cache.invalidate, group_id))
+        await db.commit()
+    except BaseException:
+        file.discard()
+        raise
+
+    logger.info(f'Archived {len(ids)} transactions of group {group_id} for {year} to {file.path}')
+    return len(ids)
+
+
+async def archive_closed_years(
+        db: AsyncSession,
+        before_year: int
+) -> int:
+    """
+    Архивирует транзакции всех групп за годы раньше before_year.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param before_year: первый год, который остаётся в transactions
+    :return: количество перенесённых транзакций
+    """
+    result = await db.execute(
+        select(Transaction.group_id, func.min(Transaction.date))
+        .filter(Transaction.date < datetime(before_year, 1, 1))
+        .group_by(Transaction.group_id)
+    )
+    archived = 0
+    for group_id, first in result.tuples().all():
+        for year in range(first.year, before_year):
+            archived += await archive_group_year(db, group_id, year)
+    # опустевшие помесячные секции убираем целиком (только Postgres)
+    await drop_empty_partitions(db, date(before_year, 1, 1))
+    return archived
+
+
+async def run_archive_tick() -> int:
+    """Один запуск архивации на каждом шарде (для PeriodicTask в lifespan)."""
+    archived = 0
+    for factory in shard_router.factories:
+        async with factory() as db:
+            archived += await archive_closed_years(db, date.today().year - settings.ARCHIVE_KEEP_YEARS)
+    return archived
@@ -1,5 +1,6 @@
 # app/services/auth_service.py
 
+import asyncio
 import uuid
 from datetime import timedelta
 from typing import Optional
@@ -12,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.core.security import (
     verify_password,
+    dummy_verify_password,
     get_password_hash,
     create_access_token,
 )
@@ -23,6 +25,10 @@ from app.services.user_service import (
     get_user_by_id,
 )
 
+# bcrypt выполняется в потоках, не больше LOGIN_MAX_CONCURRENT_VERIFIES одновременно:
+# нагрузка от входа на CPU ограничена, цикл событий не блокируется
+_verify_slots = asyncio.Semaphore(settings.LOGIN_MAX_CONCURRENT_VERIFIES)
+
 
 async def register_user(db: AsyncSession, user_in: UserCreate) -> User:
     """
@@ -48,14 +54,21 @@ async def authenticate_user(
     """
     Аутентифицирует пользователя по email и паролю.
 
+    Для неизвестного email выполняется фиктивная проверка той же
+    стоимости, чтобы по времени ответа нельзя было узнать, есть ли аккаунт.
+
     :param db: Асинхронная сессия SQLAlchemy
     :param email: e-mail пользователя
     :param password: введённый пароль
     :return: объект User, если аутентификация успешна, иначе None
     """
     user = await get_user_by_email(db, email)
-    if not user or not verify_password(password, user.password_hash):
-        return None
+    async with _verify_slots:
+        if not user:
+            await asyncio.to_thread(dummy_verify_password)
+            return None
+        if not await asyncio.to_thread(verify_password, password, user.password_hash):
+            return None
     return user
 
 
@@ -115,4 +128,3 @@ async def change_password(
 
     user.password_hash = get_password_hash(new_password)
     await db.commit()
-    await db.refresh(user)
@@ -0,0 +1,317 @@
+import heapq
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import select, delete, func, case, literal, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.jobs import job
+from app.db.base import TransactionType
+from app.db.upsert import insert
+from app.models.group_member_balance import GroupMemberBalance
+from app.models.transaction import Transaction
+from app.models.transaction_archive import TransactionArchiveTotal
+from app.models.user_group import UserGroup
+
+CENT = Decimal('0.01')
+
+
+def _split(tx_type, amount) -> tuple:
+    """
+    Разносит сумму транзакции на (расход, доход) в виде SQL-выражений.
+
+    :param tx_type: колонка типа или конкретный TransactionType
+    :param amount: колонка суммы или число
+    """
+    if isinstance(tx_type, TransactionType):
+        zero = literal(0)
+        return (amount, zero) if tx_type == TransactionType.expense else (zero, amount)
+    return (
+        case((tx_type == TransactionType.expense, amount), else_=0),
+        case((tx_type == TransactionType.income, amount), else_=0),
+    )
+
+
+def _accumulate(stmt):
+    """Дополняет INSERT в group_member_balances прибавлением к существующей строке."""
+    table = GroupMemberBalance.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.group_id, table.c.user_id],
+        set_={
+            'expense': table.c.expense + stmt.excluded.expense,
+            'income': table.c.income + stmt.excluded.income,
+            'tx_count': table.c.tx_count + stmt.excluded.tx_count,
+            'updated_at': func.now(),
+        },
+    )
+
+
+async def add_transaction_to_balances(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        user_id: uuid.UUID,
+        tx_type: TransactionType,
+        amount: float
+) -> None:
+    """
+    Учитывает в балансе новую транзакцию (одним upsert, без коммита).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param user_id: UUID автора
+    :param tx_type: тип транзакции
+    :param amount: сумма
+    """
+    expense, income = (amount, 0) if tx_type == TransactionType.expense else (0, amount)
+    await db.execute(_accumulate(insert(db, GroupMemberBalance).values(
+        group_id=group_id, user_id=user_id, expense=expense, income=income, tx_count=1
+    )))
+
+
+async def lock_transactions(db: AsyncSession, conditions: list) -> None:
+    """
+    Блокирует строки транзакций, выбранные conditions, до конца транзакции БД.
+
+    Повторная блокировка уже своих строк ничего не стоит, поэтому вызывать
+    можно перед каждым пересчётом агрегатов. В SQLite пишет и так одна
+    транзакция, а FOR UPDATE не поддерживается — запрос не выполняется.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param conditions: условия WHERE по Transaction
+    """
+    if db.get_bind().dialect.name == 'sqlite':
+        return
+    await db.execute(select(Transaction.id).filter(*conditions).with_for_update(of=Transaction))
+
+
+async def change_transactions_in_balances(
+        db: AsyncSession,
+        conditions: list,
+        values: dict | None = None
+) -> None:
+    """
+    Переносит в баланс изменение набора транзакций одним INSERT ... SELECT ... ON CONFLICT.
+
+    Вызывается до UPDATE/DELETE с теми же условиями: разница «новое − старое»
+    считается по ещё не изменённым строкам. Строки сначала блокируются
+    (SELECT ... FOR UPDATE): параллельный PATCH/DELETE тех же транзакций
+    ждёт коммита и считает разницу уже от новых значений. Без коммита.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param conditions: условия WHERE по Transaction, выбирающие изменяемые строки
+    :param values: новые значения amount и/или type; None — строки удаляются
+    """
+    await lock_transactions(db, conditions)
+    old_expense, old_income = _split(Transaction.type, Transaction.amount)
+    if values is None:
+        new_expense = new_income = 0
+        count = -1
+    else:
+        new_expense, new_income = _split(
+            values.get('type', Transaction.type), values.get('amount', Transaction.amount)
+        )
+        count = 0
+
+    source = (
+        select(
+            Transaction.group_id,
+            Transaction.user_id,
+            func.sum(new_expense - old_expense),
+            func.sum(new_income - old_income),
+            func.count() * count,
+        )
+        .filter(*conditions)
+        .group_by(Transaction.group_id, Transaction.user_id)
+    )
+    await db.execute(_accumulate(insert(db, GroupMemberBalance).from_select(
+        ['group_id', 'user_id', 'expense', 'income', 'tx_count'], source
+    )))
+
+
+async def add_transactions_to_balances(
+        db: AsyncSession,
+        conditions: list
+) -> None:
+    """
+    Учитывает в балансе набор уже вставленных транзакций одним INSERT ... SELECT (без коммита).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param conditions: условия WHERE по Transaction, выбирающие новые строки
+    """
+    expense, income = _split(Transaction.type, Transaction.amount)
+    source = (
+        select(Transaction.group_id, Transaction.user_id, func.sum(expense), func.sum(income), func.count())
+        .filter(*conditions)
+        .group_by(Transaction.group_id, Transaction.user_id)
+    )
+    await db.execute(_accumulate(insert(db, GroupMemberBalance).from_select(
+        ['group_id', 'user_id', 'expense', 'income', 'tx_count'], source
+    )))
+
+
+def _member_rows(rows) -> dict[uuid.UUID, tuple[Decimal, Decimal]]:
+    return {
+        user_id: (Decimal(expense or 0).quantize(CENT), Decimal(income or 0).quantize(CENT))
+        for user_id, expense, income in rows
+    }
+
+
+async def get_group_balances(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> list[dict]:
+    """
+    Возвращает баланс каждого участника группы.
+
+    Участники расчёта — текущие участники группы и все, у кого есть транзакции
+    в группе. Чистые траты (расход − доход) делятся поровну; balance > 0 —
+    участнику должны, balance < 0 — должен он. Сумма балансов равна нулю.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: список словарей {user_id, expense, income, share, balance}
+    """
+    ledger = await db.execute(
+        select(GroupMemberBalance.user_id, GroupMemberBalance.expense, GroupMemberBalance.income)
+        .filter(GroupMemberBalance.group_id == group_id)
+    )
+    totals = _member_rows(ledger.tuples().all())
+
+    members = await db.execute(select(UserGroup.user_id).filter(UserGroup.group_id == group_id))
+    for user_id in members.scalars().all():
+        totals.setdefault(user_id, (Decimal(0), Decimal(0)))
+
+    if not totals:
+        return []
+
+    # считаем в копейках, остаток от деления раздаём по одной копейке
+    user_ids = sorted(totals, key=str)
+    net = {user_id: int((totals[user_id][0] - totals[user_id][1]) / CENT) for user_id in user_ids}
+    share, remainder = divmod(sum(net.values()), len(user_ids))
+
+    balances = []
+    for index, user_id in enumerate(user_ids):
+        user_share = share + (1 if index < remainder else 0)
+        expense, income = totals[user_id]
+        balances.append({
+            'user_id': user_id,
+            'expense': expense,
+            'income': income,
+            'share': Decimal(user_share) * CENT,
+            'balance': Decimal(net[user_id] - user_share) * CENT,
+        })
+    return balances
+
+
+def settle_up(balances: list[dict]) -> list[dict]:
+    """
+    Строит список переводов, обнуляющий балансы, за O(n log n).
+
+    Жадно сводит самого крупного должника с самым крупным кредитором;
+    переводов получается не больше n − 1.
+
+    :param balances: результат get_group_balances
+    :return: список словарей {from_user_id, to_user_id, amount}
+    """
+    creditors = [(-int(b['balance'] / CENT), str(b['user_id']), b['user_id']) for b in balances if b['balance'] > 0]
+    debtors = [(int(b['balance'] / CENT), str(b['user_id']), b['user_id']) for b in balances if b['balance'] < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        credit, credit_key, creditor = heapq.heappop(creditors)
+        debt, debt_key, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append({'from_user_id': debtor, 'to_user_id': creditor, 'amount': Decimal(amount) * CENT})
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, credit_key, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debt_key, debtor))
+    return transfers
+
+
+def _raw_totals(group_id: uuid.UUID):
+    """Суммы участников по сырым транзакциям и по архивным файлам (подзапрос, строк на участника — несколько)."""
+    expense, income = _split(Transaction.type, Transaction.amount)
+    live = (
+        select(
+            Transaction.user_id.label('user_id'),
+            func.sum(expense).label('expense'),
+            func.sum(income).label('income'),
+            func.count().label('tx_count'),
+        )
+        .filter(Transaction.group_id == group_id)
+        .group_by(Transaction.user_id)
+    )
+    archived = (
+        select(
+            TransactionArchiveTotal.user_id,
+            TransactionArchiveTotal.expense,
+            TransactionArchiveTotal.income,
+            TransactionArchiveTotal.tx_count,
+        )
+        .filter(TransactionArchiveTotal.group_id == group_id)
+    )
+    return union_all(live, archived).subquery()
+
+
+async def check_group_balances(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        repair: bool = False
+) -> list[dict]:
+    """
+    Сверяет баланс группы с суммами по сырым транзакциям (включая архивные).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param repair: пересобрать баланс группы из транзакций, если есть расхождения
+    :return: расхождения {user_id, expense, income, expected_expense, expected_income}
+    """
+    totals = _raw_totals(group_id)
+    raw = await db.execute(
+        select(totals.c.user_id, func.sum(totals.c.expense), func.sum(totals.c.income))
+        .group_by(totals.c.user_id)
+    )
+    expected = _member_rows(raw.tuples().all())
+
+    ledger = await db.execute(
+        select(GroupMemberBalance.user_id, GroupMemberBalance.expense, GroupMemberBalance.income)
+        .filter(GroupMemberBalance.group_id == group_id)
+    )
+    actual = _member_rows(ledger.tuples().all())
+
+    zero = (Decimal(0), Decimal(0))
+    mismatches = [
+        {
+            'user_id': user_id,
+            'expense': actual.get(user_id, zero)[0],
+            'income': actual.get(user_id, zero)[1],
+            'expected_expense': expected.get(user_id, zero)[0],
+            'expected_income': expected.get(user_id, zero)[1],
+        }
+        for user_id in expected.keys() | actual.keys()
+        if actual.get(user_id, zero) != expected.get(user_id, zero)
+    ]
+
+    if mismatches and repair:
+        await db.execute(delete(GroupMemberBalance).filter(GroupMemberBalance.group_id == group_id))
+        await db.execute(insert(db, GroupMemberBalance).from_select(
+            ['group_id', 'user_id', 'expense', 'income', 'tx_count'],
+            select(
+                literal(group_id), totals.c.user_id,
+                func.sum(totals.c.expense), func.sum(totals.c.income), func.sum(totals.c.tx_count),
+            )
+            .group_by(totals.c.user_id)
+        ))
+        await db.commit()
+
+    return mismatches
+
+
+@job('balances.repair', concurrency=1)
+async def repair_balances_job(db: AsyncSession, group_id: str) -> dict:
+    """Задача очереди: сверка и пересборка балансов группы. Результат — {mismatches}."""
+    mismatches = await check_group_balances(db, uuid.UUID(group_id), repair=True)
+    return {'mismatches': len(mismatches)}
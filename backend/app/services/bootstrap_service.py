@@ -0,0 +1,68 @@
+import asyncio
+import math
+import uuid
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.services.category_service import list_categories_for_group
+from app.services.group_service import get_group_by_id, list_group_members_with_users
+from app.services.report_service import shared_month_summary
+from app.services.transaction_service import list_recent_transactions
+
+# параллельные части одного запроса берут соединения пула сразу пачкой;
+# ограничиваем число таких запросов, чтобы пул оставался остальным эндпоинтам
+_bootstrap_slots = asyncio.Semaphore(settings.BOOTSTRAP_MAX_CONCURRENT)
+
+
+async def get_group_bootstrap(
+        session_factory: async_sessionmaker[AsyncSession],
+        group_id: uuid.UUID,
+        tx_limit: int = 50
+) -> dict | None:
+    """
+    Собирает всё, что нужно для первого показа группы.
+
+    Группа, участники, категории, последние транзакции и итоги текущего
+    месяца читаются параллельно, каждый запрос — в своей сессии из пула:
+    время ответа определяется самым долгим запросом, а не их суммой.
+    Сводку за месяц одновременные запросы группы считают один раз.
+    Одновременно выполняется не больше BOOTSTRAP_MAX_CONCURRENT таких
+    запросов. Права проверяются вызывающим кодом.
+
+    :param session_factory: фабрика асинхронных сессий
+    :param group_id: UUID группы
+    :param tx_limit: сколько последних транзакций вернуть
+    :return: словарь {group, members, categories, transactions, summary} или None, если группы нет
+    :raises HTTPException 503: если сводка не готова за SINGLEFLIGHT_TIMEOUT_SECONDS
+    """
+    async def run(func: Callable[..., Awaitable], *args):
+        async with session_factory() as db:
+            return await func(db, group_id, *args)
+
+    try:
+        async with _bootstrap_slots, asyncio.TaskGroup() as tg:
+            group = tg.create_task(run(get_group_by_id, True, False))
+            members = tg.create_task(run(list_group_members_with_users))
+            categories = tg.create_task(run(list_categories_for_group))
+            transactions = tg.create_task(run(list_recent_transactions, tx_limit))
+            summary = tg.create_task(run(shared_month_summary, session_factory))
+    except* TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Group summary is not ready, retry later',
+            headers={'Retry-After': str(math.ceil(settings.SINGLEFLIGHT_TIMEOUT_SECONDS))},
+        ) from None
+
+    if group.result() is None:
+        return None
+
+    return {
+        "group": group.result(),
+        "members": members.result(),
+        "categories": categories.result(),
+        "transactions": transactions.result(),
+        "summary": summary.result(),
+    }
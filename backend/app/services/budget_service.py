@@ -0,0 +1,350 @@
+import uuid
+from datetime import datetime
+from typing import Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import select, delete, update, func, case, literal, literal_column, or_, and_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import TransactionType
+from app.db.upsert import insert
+from app.models.budget import Budget, BudgetSpend, BudgetEvent
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.schemas.budget import BudgetCreate
+from app.services.balance_service import lock_transactions
+
+# Пороги использования бюджета (в процентах), пересечение которых попадает в budget_events
+BUDGET_THRESHOLDS = (50, 80, 100)
+
+
+def month_of(db: AsyncSession, value):
+    """
+    Выражение 'YYYY-MM' для даты в текущем диалекте.
+
+    Формат — литерал, а не параметр: выражение стоит и в SELECT, и в GROUP BY.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime(literal_column("'%Y-%m'"), value)
+    return func.to_char(value, literal_column("'YYYY-MM'"))
+
+
+def _applies_to(group_id, category_id):
+    """Условие «бюджет распространяется на транзакцию с такими группой и категорией»."""
+    return and_(
+        Budget.group_id == group_id,
+        or_(Budget.category_id.is_(None), Budget.category_id == category_id),
+    )
+
+
+def _expense(tx_type, amount):
+    if isinstance(tx_type, TransactionType):
+        return amount if tx_type == TransactionType.expense else literal(0)
+    return case((tx_type == TransactionType.expense, amount), else_=0)
+
+
+async def _accumulate(db: AsyncSession, source) -> list[tuple]:
+    """
+    Прибавляет (budget_id, month, spent) из source к budget_spend.
+
+    :return: затронутые пары (budget_id, month)
+    """
+    stmt = insert(db, BudgetSpend).from_select(['budget_id', 'month', 'spent'], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BudgetSpend.budget_id, BudgetSpend.month],
+        set_={'spent': BudgetSpend.spent + stmt.excluded.spent, 'updated_at': func.now()},
+    )
+    result = await db.execute(stmt.returning(BudgetSpend.budget_id, BudgetSpend.month))
+    return result.tuples().all()
+
+
+async def _record_crossings(db: AsyncSession, touched: list[tuple]) -> None:
+    """
+    Пишет в outbox пороги, которые пересекли затронутые бюджеты.
+
+    Уникальный ключ (budget_id, month, threshold) гарантирует одно событие на порог.
+    """
+    if not touched:
+        return
+
+    thresholds = union_all(*(select(literal(t).label('threshold')) for t in BUDGET_THRESHOLDS)).subquery()
+    budget_ids = {budget_id for budget_id, _ in touched}
+    months = {month for _, month in touched}
+
+    source = (
+        select(BudgetSpend.budget_id, BudgetSpend.month, thresholds.c.threshold, BudgetSpend.spent)
+        .join(Budget, Budget.id == BudgetSpend.budget_id)
+        .join(thresholds, BudgetSpend.spent * 100 >= Budget.amount * thresholds.c.threshold)
+        .filter(BudgetSpend.budget_id.in_(budget_ids), BudgetSpend.month.in_(months))
+    )
+    await db.execute(
+        insert(db, BudgetEvent)
+        .from_select(['budget_id', 'month', 'threshold', 'spent'], source)
+        .on_conflict_do_nothing(index_elements=['budget_id', 'month', 'threshold'])
+    )
+
+
+async def add_transaction_to_budgets(
+        db: AsyncSession,
+        tx: Transaction
+) -> None:
+    """
+    Учитывает новую транзакцию в расходах подходящих бюджетов (без коммита).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param tx: новая транзакция
+    """
+    if tx.type != TransactionType.expense or tx.date is None:
+        return
+
+    source = (
+        select(Budget.id, month_of(db, literal(tx.date, Transaction.date.type)), literal(tx.amount, Budget.amount.type))
+        .filter(_applies_to(tx.group_id, tx.category_id))
+    )
+    await _record_crossings(db, await _accumulate(db, source))
+
+
+async def change_transactions_in_budgets(
+        db: AsyncSession,
+        conditions: list,
+        values: dict | None = None
+) -> None:
+    """
+    Переносит в расходы бюджетов изменение набора транзакций.
+
+    Вызывается до UPDATE/DELETE с теми же условиями: вклад строк в бюджеты
+    снимается по старым значениям и добавляется по новым, каждый шаг —
+    одним INSERT ... SELECT ... ON CONFLICT. Как и для балансов, строки
+    сначала блокируются (lock_transactions), затем меняется budget_spend:
+    параллельные изменения тех же транзакций не считают вклад от устаревших
+    значений. Без коммита.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param conditions: условия WHERE по Transaction, выбирающие изменяемые строки
+    :param values: новые значения amount / type / category_id / date; None — строки удаляются
+    """
+    await lock_transactions(db, conditions)
+    old_month = month_of(db, Transaction.date)
+    removed = (
+        select(Budget.id, old_month, func.sum(-Transaction.amount))
+        .join(Budget, _applies_to(Transaction.group_id, Transaction.category_id))
+        .filter(*conditions, Transaction.type == TransactionType.expense)
+        .group_by(Budget.id, old_month)
+    )
+    await _accumulate(db, removed)
+
+    if values is not None:
+        await add_transactions_to_budgets(db, conditions, values)
+
+
+async def add_transactions_to_budgets(
+        db: AsyncSession,
+        conditions: list,
+        values: dict | None = None
+) -> None:
+    """
+    Прибавляет к расходам бюджетов вклад транзакций, выбранных условиями
+    (одним INSERT ... SELECT ... ON CONFLICT), и записывает пересечения порогов.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param conditions: условия WHERE по Transaction
+    :param values: значения, подставляемые вместо колонок строк (для UPDATE)
+    """
+    values = values or {}
+    new_month = month_of(db, values.get('date', Transaction.date))
+    new_expense = _expense(values.get('type', Transaction.type), values.get('amount', Transaction.amount))
+    added = (
+        select(Budget.id, new_month, func.sum(new_expense))
+        .join(Budget, _applies_to(Transaction.group_id, values.get('category_id', Transaction.category_id)))
+        .filter(*conditions)
+        .group_by(Budget.id, new_month)
+    )
+    await _record_crossings(db, await _accumulate(db, added))
+
+
+async def create_budget(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        budget_in: BudgetCreate
+) -> Budget:
+    """
+    Создаёт месячный бюджет группы или категории и заполняет расходы
+    по уже существующим транзакциям.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param budget_in: данные бюджета
+    :return: созданный объект Budget
+    :raises HTTPException 400: если категория не из группы
+    :raises HTTPException 409: если такой бюджет уже есть
+    """
+    if budget_in.category_id is not None:
+        category = await db.execute(
+            select(Category.id).filter(Category.id == budget_in.category_id, Category.group_id == group_id)
+        )
+        if category.first() is None:
+            raise HTTPException(status_code=400, detail='Category not in group')
+
+    existing = await db.execute(
+        select(Budget.id).filter(
+            Budget.group_id == group_id,
+            Budget.category_id.is_(None) if budget_in.category_id is None
+            else Budget.category_id == budget_in.category_id,
+        )
+    )
+    if existing.first() is not None:
+        raise HTTPException(status_code=409, detail='Budget already exists')
+
+    budget = Budget(id=uuid.uuid4(), group_id=group_id, category_id=budget_in.category_id, amount=budget_in.amount)
+    db.add(budget)
+    await db.flush()
+
+    month = month_of(db, Transaction.date)
+    conditions = [Transaction.group_id == group_id, Transaction.type == TransactionType.expense]
+    if budget_in.category_id is not None:
+        conditions.append(Transaction.category_id == budget_in.category_id)
+    source = (
+        select(literal(budget.id, Budget.id.type), month, func.sum(Transaction.amount))
+        .filter(*conditions)
+        .group_by(month)
+    )
+    await _record_crossings(db, await _accumulate(db, source))
+
+    await db.commit()
+    return budget
+
+
+async def get_budget_by_id(
+        db: AsyncSession,
+        budget_id: uuid.UUID
+) -> Budget | None:
+    """
+    Возвращает бюджет по UUID.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param budget_id: UUID бюджета
+    :return: объект Budget или None
+    """
+    return await db.get(Budget, budget_id)
+
+
+async def _budget_status(db: AsyncSession, month: str | None, *conditions) -> list[dict]:
+    month = month or datetime.now().strftime('%Y-%m')
+    result = await db.execute(
+        select(Budget, func.coalesce(BudgetSpend.spent, 0))
+        .outerjoin(BudgetSpend, and_(BudgetSpend.budget_id == Budget.id, BudgetSpend.month == month))
+        .filter(*conditions)
+        .order_by(Budget.created_at)
+    )
+    return [
+        {
+            'id': budget.id,
+            'group_id': budget.group_id,
+            'category_id': budget.category_id,
+            'amount': float(budget.amount),
+            'month': month,
+            'spent': float(spent),
+            'utilization': float(spent) / float(budget.amount),
+        }
+        for budget, spent in result.tuples().all()
+    ]
+
+
+async def list_budgets(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        month: str | None = None
+) -> list[dict]:
+    """
+    Возвращает бюджеты группы с расходами за месяц: по одной строке
+    budget_spend на бюджет, без обращения к transactions.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param month: месяц 'YYYY-MM' (по умолчанию текущий)
+    :return: список словарей {id, group_id, category_id, amount, month, spent, utilization}
+    """
+    return await _budget_status(db, month, Budget.group_id == group_id)
+
+
+async def get_budget_status(
+        db: AsyncSession,
+        budget_id: uuid.UUID,
+        month: str | None = None
+) -> dict | None:
+    """
+    Возвращает один бюджет с расходами за месяц.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param budget_id: UUID бюджета
+    :param month: месяц 'YYYY-MM' (по умолчанию текущий)
+    :return: словарь как в list_budgets или None
+    """
+    rows = await _budget_status(db, month, Budget.id == budget_id)
+    return rows[0] if rows else None
+
+
+async def delete_budget(
+        db: AsyncSession,
+        budget: Budget
+) -> None:
+    """
+    Удаляет бюджет вместе с накопленными расходами и событиями.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param budget: бюджет для удаления
+    """
+    await delete_budgets(db, Budget.id == budget.id)
+    await db.commit()
+
+
+async def delete_budgets(db: AsyncSession, *conditions) -> None:
+    """
+    Удаляет бюджеты, выбранные условиями, с их расходами и событиями (без коммита).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param conditions: условия WHERE по Budget
+    """
+    budget_ids = select(Budget.id).filter(*conditions).scalar_subquery()
+    await db.execute(delete(BudgetEvent).filter(BudgetEvent.budget_id.in_(budget_ids)))
+    await db.execute(delete(BudgetSpend).filter(BudgetSpend.budget_id.in_(budget_ids)))
+    await db.execute(delete(Budget).filter(*conditions).execution_options(synchronize_session=False))
+
+
+async def fetch_budget_events(
+        db: AsyncSession,
+        limit: int = 100
+) -> Sequence[BudgetEvent]:
+    """
+    Возвращает необработанные события outbox в порядке появления.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param limit: максимум событий
+    :return: список BudgetEvent
+    """
+    result = await db.execute(
+        select(BudgetEvent)
+        .filter(BudgetEvent.processed_at.is_(None))
+        .order_by(BudgetEvent.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def mark_budget_events_processed(
+        db: AsyncSession,
+        event_ids: list[int]
+) -> None:
+    """
+    Отмечает события outbox обработанными.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param event_ids: id событий
+    """
+    await db.execute(
+        update(BudgetEvent)
+        .filter(BudgetEvent.id.in_(event_ids))
+        .values(processed_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
@@ -1,12 +1,20 @@
 import uuid
+from functools import partial
 from typing import Sequence
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import select, func, update, delete, exists, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.events import on_commit
 from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.budget import Budget
+from app.models.recurring_transaction import RecurringTransaction
 from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.services.analytics_service import snapshot_cache
+from app.services.budget_service import delete_budgets
+from app.services.transaction_service import before_transactions_change, touch_group_snapshot
 
 
 async def is_category_name_unique(
@@ -60,7 +68,6 @@ async def create_category(
 
     db.add(category)
     await db.commit()
-    await db.refresh(category)
 
     return category
 
@@ -109,6 +116,25 @@ async def list_categories_for_group(
     return result.scalars().all()
 
 
+async def get_categories_version(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> tuple:
+    """
+    Возвращает версию списка категорий группы для ETag.
+
+    :param db: Асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: кортеж (count, max_updated_at)
+    """
+
+    result = await db.execute(
+        select(func.count(Category.id), func.max(Category.updated_at))
+        .filter(Category.group_id == group_id)
+    )
+    return tuple(result.one())
+
+
 async def update_category(
         db: AsyncSession,
         category: Category,
@@ -133,6 +159,8 @@ async def update_category(
 
         category.name = cat_in.name
         updated = True
+        # названия категорий хранятся в снимке аналитики
+        on_commit(db, partial(snapshot_cache.invalidate, category.group_id))
 
     if cat_in.icon is not None:
         category.icon = cat_in.icon
@@ -140,22 +168,109 @@ async def update_category(
 
     if updated:
         await db.commit()
-        await db.refresh(category)
 
     return category
 
 
+async def merge_categories(
+        db: AsyncSession,
+        source: Category,
+        target_id: uuid.UUID
+) -> int:
+    """
+    Переносит все транзакции и шаблоны повторяющихся транзакций категории
+    в другую категорию той же группы и удаляет исходную категорию.
+    Всё — в одной транзакции БД.
+
+    :param db: Асинхронная сессия SQLAlchemy
+    :param source: категория, которая будет удалена
+    :param target_id: UUID категории, в которую переносятся транзакции
+    :return: количество перенесённых транзакций
+    :raises HTTPException 400: если целевая категория та же или из другой группы
+    """
+
+    if target_id == source.id:
+        raise HTTPException(status_code=400, detail='Cannot merge category into itself')
+
+    target = await db.execute(
+        select(Category.id)
+        .filter(Category.id == target_id, Category.group_id == source.group_id)
+    )
+    if target.first() is None:
+        raise HTTPException(status_code=400, detail='Target category not in group')
+
+    # сначала переносим расходы в бюджеты целевой категории, затем удаляем бюджеты исходной
+    conditions = [Transaction.category_id == source.id]
+    await before_transactions_change(db, conditions, {"category_id": target_id})
+    await delete_budgets(db, Budget.category_id == source.id)
+
+    # updated_at транзакций обновляется через onupdate, поэтому ETag списка меняется
+    result = await db.execute(
+        update(Transaction)
+        .filter(*conditions)
+        .values(category_id=target_id)
+        .execution_options(synchronize_session=False)
+    )
+    # шаблоны ссылаются на категорию внешним ключом
+    await db.execute(
+        update(RecurringTransaction)
+        .filter(RecurringTransaction.category_id == source.id)
+        .values(category_id=target_id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(delete(Category).filter(Category.id == source.id))
+    touch_group_snapshot(db, source.group_id)
+    await db.commit()
+
+    return result.rowcount
+
+
 async def delete_category(
         db: AsyncSession,
-        category: Category
+        category: Category,
+        reassign_to: uuid.UUID | None = None
 ) -> None:
     """
     Удаляет категорию по UUID.
 
+    Если у категории есть транзакции или активные шаблоны повторяющихся
+    транзакций, их нужно перенести в другую категорию (``reassign_to``),
+    иначе удаление отклоняется. Неактивные шаблоны без созданных по ним
+    транзакций удаляются вместе с категорией.
+
     :param db: Асинхронная сессия SQLAlchemy
     :param category: категория для удаления
-    :raises HTTPException 404: если категория не найдена
+    :param reassign_to: UUID категории для переноса транзакций и шаблонов
+    :raises HTTPException 409: если категория используется, а reassign_to не задан
     """
 
-    await db.delete(category)
+    if reassign_to is not None:
+        await merge_categories(db, category, reassign_to)
+        return
+
+    in_use = await db.execute(
+        select(Transaction.id)
+        .filter(Transaction.category_id == category.id)
+        .limit(1)
+    )
+    if in_use.first() is not None:
+        raise HTTPException(status_code=409, detail='Category has transactions, pass reassign_to')
+
+    templates = await db.execute(
+        select(RecurringTransaction.id)
+        .filter(
+            RecurringTransaction.category_id == category.id,
+            or_(
+                RecurringTransaction.is_active == True,
+                exists().where(Transaction.recurring_id == RecurringTransaction.id),
+            ),
+        )
+        .limit(1)
+    )
+    if templates.first() is not None:
+        raise HTTPException(status_code=409, detail='Category has recurring transactions, pass reassign_to')
+
+    await db.execute(delete(RecurringTransaction).filter(RecurringTransaction.category_id == category.id))
+    await delete_budgets(db, Budget.category_id == category.id)
+    await db.execute(delete(Category).filter(Category.id == category.id))
     await db.commit()
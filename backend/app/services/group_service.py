@@ -3,51 +3,83 @@ from datetime import datetime
 from typing import Sequence
 
 from fastapi import HTTPException
-from sqlalchemy import select, delete, update
+from sqlalchemy import select, delete, update, insert, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, raiseload, load_only
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.events import publish_after_commit
 from app.db.base import GroupRole
+from app.models.category import Category
 from app.models.group import Group
 from app.models.user import User
 from app.models.user_group import UserGroup
 from app.schemas.group import GroupCreate, GroupUpdate
+from app.schemas.user import UserRead
 from app.services.user_service import get_user_by_email
 
+# Для GroupRead.members нужны только колонки UserRead (без password_hash)
+MEMBER_COLUMNS = tuple(getattr(User, name) for name in UserRead.model_fields)
+
+
+def members_loader():
+    """Опция загрузки участников группы одним батч-запросом и только нужными колонками."""
+    return selectinload(Group.members).load_only(*MEMBER_COLUMNS)
+
 
 async def create_group(
         db: AsyncSession,
         group_in: GroupCreate,
-        owner_id: uuid.UUID
+        owner_id: uuid.UUID,
+        group_id: uuid.UUID | None = None
 ) -> Group:
     """
-    Создаёт новую группу и добавляет владельца как администратора.
+    Создаёт новую группу, добавляет владельца как администратора
+    и заводит начальные категории — одним flush и одним commit.
+
+    Возвращённая группа уже содержит ``members`` для GroupRead, без повторного чтения.
 
     :param db: асинхронная сессия SQLAlchemy
     :param group_in: данные о новой группе
     :param owner_id: UUID владельца группы
+    :param group_id: UUID новой группы (если шард выбран заранее)
     :return: созданная группа
+    :raises HTTPException 404: если владелец не найден
+    :raises HTTPException 400: если имена начальных категорий повторяются
     """
+    names = [cat.name for cat in group_in.categories]
+    if len(names) != len(set(names)):
+        raise HTTPException(status_code=400, detail='Category name must be unique within the group')
+
+    # владелец обычно уже в identity map сессии (current_user) — тогда без запроса
+    owner = await db.get(User, owner_id)
+    if not owner:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    now = datetime.now()
     group = Group(
+        id=group_id or uuid.uuid4(),
         name=group_in.name,
         description=group_in.description,
         owner_id=owner_id,
         is_active=True,
-        deleted_at=None
+        deleted_at=None,
+        created_at=now,
+        updated_at=now,
     )
-
-    db.add(group)
-    await db.commit()
-
-    group = await get_group_by_id(db, group.id)
-
-    membership = UserGroup(
-        group_id=group.id,
+    group.user_groups.append(UserGroup(
         user_id=owner_id,
         role=GroupRole.admin,
-        joined_at=datetime.now()
-    )
-    db.add(membership)
+        joined_at=now,
+        updated_at=now,
+    ))
+    for cat in group_in.categories:
+        group.categories.append(Category(name=cat.name, icon=cat.icon, created_at=now, updated_at=now))
+
+    # members заполняем без отслеживания: строку user_groups вставляет user_groups выше
+    set_committed_value(group, "members", [owner])
+
+    db.add(group)
     await db.commit()
     return group
 
@@ -55,17 +87,22 @@ async def create_group(
 async def get_group_by_id(
         db: AsyncSession,
         group_id: uuid.UUID,
-        only_active: bool = True
+        only_active: bool = True,
+        with_members: bool = True
 ) -> Group | None:
     """
     Возвращает группу по её ID, опционально фильтруя по активности.
 
+    Без ``with_members`` читается только строка группы (для проверок прав,
+    обновления и удаления); обращение к ``group.members`` тогда — ошибка.
+
     :param db: асинхронная сессия SQLAlchemy
     :param group_id: UUID группы
     :param only_active: учитывать только активные группы
+    :param with_members: загрузить участников для GroupRead
     :return: объект группы или None
     """
-    stmt = select(Group).options(selectinload(Group.members))
+    stmt = select(Group).options(members_loader() if with_members else raiseload(Group.members))
     if only_active:
         stmt = stmt.filter(Group.is_active == True)
     stmt = stmt.filter(Group.id == group_id)
@@ -73,6 +110,23 @@ async def get_group_by_id(
     return result.scalars().first()
 
 
+async def group_exists(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> bool:
+    """
+    Проверяет, что активная группа существует, не загружая её.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: True, если группа есть
+    """
+    result = await db.execute(
+        select(Group.id).filter(Group.id == group_id, Group.is_active == True)
+    )
+    return result.first() is not None
+
+
 async def list_group_by_user(
         db: AsyncSession,
         user_id: uuid.UUID
@@ -84,11 +138,14 @@ async def list_group_by_user(
     :param user_id: UUID пользователя
     :return: список групп
     """
+    # участники всех групп подгружаются одним запросом WHERE group_id IN (...)
     stmt = (
         select(Group)
-        .join(UserGroup, UserGroup.group_id == Group.id)
-        .filter(UserGroup.user_id == user_id, Group.is_active == True)
-        .options(selectinload(Group.members))
+        .filter(
+            Group.id.in_(select(UserGroup.group_id).filter(UserGroup.user_id == user_id)),
+            Group.is_active == True
+        )
+        .options(members_loader())
     )
 
     result = await db.execute(stmt)
@@ -131,9 +188,9 @@ async def update_group(
 
     if updated:
         await db.commit()
-        await db.refresh(group)
 
-    return group
+    # одним чтением обновляем updated_at и подгружаем участников для ответа
+    return await get_group_by_id(db, group.id)
 
 
 async def delete_group(
@@ -174,8 +231,7 @@ async def add_user_to_group(
     :raises HTTPException 404: если группа или пользователь не найдены
     :raises HTTPException 400: если пользователь уже состоит в группе
     """
-    group = await get_group_by_id(db, group_id)
-    if not group:
+    if not await group_exists(db, group_id):
         raise HTTPException(status_code=404, detail="Group not found")
 
     user = await get_user_by_email(db, email)
@@ -194,16 +250,85 @@ async def add_user_to_group(
     membership = UserGroup(
         group_id=group_id,
         user_id=user.id,
-        role=role,
+        role=GroupRole(role),
         joined_at=datetime.now()
     )
 
     db.add(membership)
+    publish_after_commit(db, group_id, "member.added", {"user_id": user.id, "role": membership.role})
     await db.commit()
-    await db.refresh(membership)
     return membership
 
 
+async def add_users_to_group(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        emails: list[str],
+        current_user: User,
+        role: GroupRole = GroupRole.member
+) -> list[dict]:
+    """
+    Добавляет в группу сразу нескольких пользователей по email.
+
+    Пользователи ищутся одним IN-запросом, уже состоящие в группе отсеиваются
+    вторым запросом, новые членства вставляются одним INSERT.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param emails: список email
+    :param current_user: текущий пользователь (для проверки прав)
+    :param role: роль новых участников
+    :return: по одному словарю {email, status, user_id} на каждый email,
+             status — added, already_member или not_found
+    :raises HTTPException 404: если группа не найдена
+    :raises HTTPException 403: если текущий пользователь не администратор группы
+    """
+    if not await group_exists(db, group_id):
+        raise HTTPException(status_code=404, detail="Group not found")
+    if not await is_user_admin_in_group(db, group_id, current_user.id):
+        raise HTTPException(status_code=403, detail="Only group admin can add members")
+
+    emails = list(dict.fromkeys(emails))
+
+    found = await db.execute(
+        select(User.email, User.id).filter(User.email.in_(emails), User.is_active == True)
+    )
+    user_ids = dict(found.tuples().all())
+
+    existing = await db.execute(
+        select(UserGroup.user_id)
+        .filter(UserGroup.group_id == group_id, UserGroup.user_id.in_(user_ids.values()))
+    )
+    members = set(existing.scalars().all())
+
+    now = datetime.now()
+    results, rows = [], []
+    for email in emails:
+        user_id = user_ids.get(email)
+        if user_id is None:
+            results.append({"email": email, "status": "not_found", "user_id": None})
+        elif user_id in members:
+            results.append({"email": email, "status": "already_member", "user_id": user_id})
+        else:
+            results.append({"email": email, "status": "added", "user_id": user_id})
+            rows.append({
+                "id": uuid.uuid4(),
+                "group_id": group_id,
+                "user_id": user_id,
+                "role": GroupRole(role),
+                "joined_at": now,
+                "updated_at": now,
+            })
+
+    if rows:
+        await db.execute(insert(UserGroup), rows)
+        for row in rows:
+            publish_after_commit(db, group_id, "member.added", {"user_id": row["user_id"], "role": row["role"]})
+        await db.commit()
+
+    return results
+
+
 async def remove_user_from_group(
         db: AsyncSession,
         group_id: uuid.UUID,
@@ -233,7 +358,9 @@ async def remove_user_from_group(
         .filter(UserGroup.user_id == user_id, UserGroup.group_id == group_id)
     )
 
-    await db.execute(stmt)
+    result = await db.execute(stmt)
+    if result.rowcount:
+        publish_after_commit(db, group_id, "member.removed", {"user_id": user_id})
     await db.commit()
 
 
@@ -277,6 +404,7 @@ async def change_user_role_in_group(
     if not membership:
         raise HTTPException(status_code=404, detail="User not found")
 
+    publish_after_commit(db, group_id, "member.updated", {"user_id": user_id, "role": new_role})
     await db.commit()
     return membership
 
@@ -298,6 +426,75 @@ async def list_group_members(
     return result.scalars().all()
 
 
+async def list_group_members_with_users(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> list[dict]:
+    """
+    Возвращает участников группы вместе с данными пользователей одним JOIN.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: список словарей {user, role, joined_at} в порядке вступления
+    """
+    result = await db.execute(
+        select(User, UserGroup.role, UserGroup.joined_at)
+        .join(UserGroup, UserGroup.user_id == User.id)
+        .options(load_only(*MEMBER_COLUMNS))
+        .filter(UserGroup.group_id == group_id)
+        .order_by(UserGroup.joined_at)
+    )
+    return [
+        {"user": user, "role": role, "joined_at": joined_at}
+        for user, role, joined_at in result.tuples().all()
+    ]
+
+
+async def get_members_version(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> tuple:
+    """
+    Возвращает версию списка участников группы для ETag.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: кортеж (count, max_updated_at)
+    """
+    result = await db.execute(
+        select(func.count(UserGroup.id), func.max(UserGroup.updated_at))
+        .filter(UserGroup.group_id == group_id)
+    )
+    return tuple(result.one())
+
+
+async def get_group_version(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> tuple | None:
+    """
+    Возвращает версию представления GroupRead (сама группа и её участники) для ETag.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: кортеж версий или None, если активной группы нет
+    """
+    result = await db.execute(
+        select(
+            Group.updated_at,
+            func.count(UserGroup.id),
+            func.max(UserGroup.updated_at),
+            func.max(User.updated_at),
+        )
+        .outerjoin(UserGroup, UserGroup.group_id == Group.id)
+        .outerjoin(User, User.id == UserGroup.user_id)
+        .filter(Group.id == group_id, Group.is_active == True)
+        .group_by(Group.id, Group.updated_at)
+    )
+    row = result.first()
+    return tuple(row) if row else None
+
+
 async def is_user_admin_in_group(
         db: AsyncSession,
         group_id: uuid.UUID,
@@ -333,7 +530,8 @@ async def is_user_member_in_group(
     :return: True, если пользователь состоит в группе, иначе False
     """
     result = await db.execute(
-        select(UserGroup)
+        select(UserGroup.id)
         .filter(UserGroup.group_id == group_id, UserGroup.user_id == user_id)
+        .limit(1)
     )
-    return bool(result.scalars().first())
\ No newline at end of file
+    return result.first() is not None
\ No newline at end of file
@@ -0,0 +1,217 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+
+from loguru import logger
+from sqlalchemy import select, delete, update, exists, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.events import on_commit
+from app.core.jobs import enqueue, job
+from app.db.archive import ARCHIVE_DIR
+from app.db.base import JobStatus
+from app.db.session import async_sesion_factory
+from app.db.shards import shard_router
+from app.models.budget import Budget, BudgetSpend, BudgetEvent
+from app.models.category import Category
+from app.models.group import Group
+from app.models.group_member_balance import GroupMemberBalance
+from app.models.job import Job
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.transaction import Transaction
+from app.models.transaction_archive import TransactionArchive, TransactionArchiveTotal
+from app.models.user import User
+from app.models.user_group import UserGroup
+from app.services.analytics_service import snapshot_cache
+
+# Email обезличенного пользователя: {id.hex}@PURGED_EMAIL_DOMAIN
+PURGED_EMAIL_DOMAIN = 'purged.invalid'
+
+# Колонки, по которым на пользователя ссылается история групп
+USER_REFERENCES = (
+    Group.owner_id,
+    Transaction.user_id,
+    RecurringTransaction.user_id,
+    GroupMemberBalance.user_id,
+    TransactionArchiveTotal.user_id,
+)
+
+
+async def _delete_in_batches(db: AsyncSession, model: type, *criteria) -> int:
+    """
+    Удаляет строки model пачками по PURGE_BATCH_ROWS, каждая — отдельной
+    транзакцией с паузой между ними: блокировки держатся недолго, а
+    WAL и реплики успевают за удалением.
+
+    :return: количество удалённых строк
+    """
+    deleted = 0
+    while True:
+        ids = (await db.execute(
+            select(model.id).filter(*criteria).limit(settings.PURGE_BATCH_ROWS)
+        )).scalars().all()
+        if ids:
+            await db.execute(
+                delete(model).filter(model.id.in_(ids)).execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            deleted += len(ids)
+        if len(ids) < settings.PURGE_BATCH_ROWS:
+            return deleted
+        await asyncio.sleep(settings.PURGE_BATCH_PAUSE_SECONDS)
+
+
+async def purge_group(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> dict[str, int]:
+    """
+    Окончательно удаляет soft-deleted группу со всеми данными.
+
+    Транзакции, категории и шаблоны удаляются пачками (_delete_in_batches),
+    остальное — по одному запросу на таблицу. Каждая пачка фиксируется
+    сразу, поэтому прерванную очистку можно просто запустить снова.
+    Архивные Parquet-файлы группы удаляются после коммита.
+
+    :param db: асинхронная сессия шарда группы
+    :param group_id: UUID группы
+    :return: количество удалённых строк по таблицам; пустой dict, если группа активна или уже удалена
+    """
+    active = (await db.execute(select(Group.is_active).filter(Group.id == group_id))).scalar_one_or_none()
+    if active is None or active:
+        return {}
+
+    counts = {'transactions': await _delete_in_batches(db, Transaction, Transaction.group_id == group_id)}
+    budget_ids = select(Budget.id).filter(Budget.group_id == group_id)
+    await db.execute(delete(BudgetEvent).filter(BudgetEvent.budget_id.in_(budget_ids)))
+    await db.execute(delete(BudgetSpend).filter(BudgetSpend.budget_id.in_(budget_ids)))
+    counts['budgets'] = (await db.execute(delete(Budget).filter(Budget.group_id == group_id))).rowcount
+    await db.commit()
+    counts['recurring_transactions'] = await _delete_in_batches(
+        db, RecurringTransaction, RecurringTransaction.group_id == group_id
+    )
+    counts['categories'] = await _delete_in_batches(db, Category, Category.group_id == group_id)
+
+    paths = (await db.execute(
+        select(TransactionArchive.path).filter(TransactionArchive.group_id == group_id)
+    )).scalars().all()
+    await db.execute(delete(TransactionArchiveTotal).filter(TransactionArchiveTotal.group_id == group_id))
+    await db.execute(delete(TransactionArchive).filter(TransactionArchive.group_id == group_id))
+    await db.execute(delete(GroupMemberBalance).filter(GroupMemberBalance.group_id == group_id))
+    counts['members'] = (await db.execute(delete(UserGroup).filter(UserGroup.group_id == group_id))).rowcount
+    await db.execute(delete(Group).filter(Group.id == group_id))
+
+    def remove_files() -> None:
+        for path in paths:
+            (ARCHIVE_DIR / path).unlink(missing_ok=True)
+
+    on_commit(db, remove_files)
+    on_commit(db, partial(snapshot_cache.invalidate, group_id))
+    await db.commit()
+    counts['archives'] = len(paths)
+
+    logger.info(f'Purged group {group_id}: {counts}')
+    return counts
+
+
+async def purge_user(
+        db: AsyncSession,
+        user_id: uuid.UUID
+) -> bool:
+    """
+    Окончательно удаляет soft-deleted пользователя из одной базы.
+
+    Членства в группах удаляются всегда. Если на пользователя ещё
+    ссылается история групп (USER_REFERENCES), строка остаётся, но
+    обезличивается: email, имя и пароль стираются, email освобождается
+    для новой регистрации.
+
+    :param db: асинхронная сессия основной базы или шарда
+    :param user_id: UUID пользователя
+    :return: True, если строка удалена; False, если обезличена или пользователь активен
+    """
+    active = (await db.execute(select(User.is_active).filter(User.id == user_id))).scalar_one_or_none()
+    if active is None or active:
+        return False
+
+    await db.execute(delete(UserGroup).filter(UserGroup.user_id == user_id))
+    referenced = (await db.execute(
+        select(or_(*(exists().where(column == user_id) for column in USER_REFERENCES)))
+    )).scalar_one()
+    if referenced:
+        await db.execute(
+            update(User)
+            .filter(User.id == user_id)
+            .values(email=f'{user_id.hex}@{PURGED_EMAIL_DOMAIN}', name='deleted', password_hash='')
+        )
+        on_commit(db, partial(snapshot_cache.invalidate_user, user_id))
+    else:
+        await db.execute(delete(User).filter(User.id == user_id))
+    await db.commit()
+    return not referenced
+
+
+@job('purge.group', concurrency=1)
+async def purge_group_job(db: AsyncSession, group_id: str) -> dict:
+    """Задача очереди: очистка группы (выполняется в сессии её шарда)."""
+    return await purge_group(db, uuid.UUID(group_id))
+
+
+@job('purge.user', concurrency=1)
+async def purge_user_job(db: AsyncSession, user_id: str) -> dict:
+    """Задача очереди: очистка пользователя в основной базе и в его копиях на шардах."""
+    results = []
+    for shard in range(len(shard_router)):
+        async with shard_router.session(shard, db) as shard_db:
+            results.append(await purge_user(shard_db, uuid.UUID(user_id)))
+    return {'deleted': results[0]}
+
+
+async def _expired_groups(db: AsyncSession, cutoff: datetime) -> list[uuid.UUID]:
+    result = await db.execute(
+        select(Group.id).filter(Group.is_active == False, Group.deleted_at < cutoff)
+    )
+    return list(result.scalars().all())
+
+
+async def enqueue_purges(db: AsyncSession) -> int:
+    """
+    Ставит в очередь очистку групп и пользователей, удалённых раньше
+    PURGE_RETENTION_DAYS дней назад. Уже ожидающие очистки пропускаются.
+
+    :param db: асинхронная сессия основной базы
+    :return: количество поставленных задач
+    """
+    cutoff = datetime.now() - timedelta(days=settings.PURGE_RETENTION_DAYS)
+    pending = await db.execute(
+        select(Job.kind, Job.payload)
+        .filter(Job.kind.in_(['purge.group', 'purge.user']), Job.status.in_([JobStatus.queued, JobStatus.running]))
+    )
+    pending = {(kind, *payload.values()) for kind, payload in pending.tuples().all()}
+
+    groups = [group_id for ids in await shard_router.gather(db, _expired_groups, cutoff) for group_id in ids]
+    users = (await db.execute(
+        select(User.id).filter(
+            User.is_active == False,
+            User.deleted_at < cutoff,
+            ~User.email.endswith(f'@{PURGED_EMAIL_DOMAIN}'),
+        )
+    )).scalars().all()
+
+    queued = 0
+    # сначала группы: после них на пользователей остаётся меньше ссылок
+    for kind, key, ids, priority in [('purge.group', 'group_id', groups, 10), ('purge.user', 'user_id', users, 20)]:
+        for id_ in ids:
+            if (kind, str(id_)) not in pending:
+                await enqueue(db, kind, {key: id_}, priority=priority, commit=False)
+                queued += 1
+    await db.commit()
+    return queued
+
+
+async def run_purge_tick() -> int:
+    """Постановка очистки в очередь (для PeriodicTask в lifespan)."""
+    async with async_sesion_factory() as db:
+        return await enqueue_purges(db)
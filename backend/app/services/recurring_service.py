@@ -0,0 +1,229 @@
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Sequence
+
+from dateutil.rrule import rrulestr
+from fastapi import HTTPException
+from loguru import logger
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.events import publish_after_commit
+from app.db.shards import shard_router
+from app.db.upsert import insert
+from app.models.category import Category
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.transaction import Transaction
+from app.schemas.recurring import RecurringCreate
+from app.services.group_service import is_user_member_in_group, is_user_admin_in_group
+from app.services.transaction_service import after_transactions_insert, touch_group_snapshot
+
+# Сколько повторений одного шаблона создаётся за тик; остальные — на следующих тиках
+MAX_OCCURRENCES_PER_TICK = 366
+# Ограничение числа параметров в одном IN (...)
+IDS_PER_STATEMENT = 5000
+
+
+def _rule(template: RecurringTransaction):
+    return rrulestr(template.rrule, dtstart=template.dtstart)
+
+
+def _aligned(now: datetime, sample: datetime) -> datetime:
+    """Приводит now к виду дат из БД: aware (Postgres) или naive (SQLite)."""
+    if sample.tzinfo is None:
+        return now.astimezone(timezone.utc).replace(tzinfo=None) if now.tzinfo else now
+    return now.astimezone(sample.tzinfo) if now.tzinfo else now.replace(tzinfo=sample.tzinfo)
+
+
+async def create_recurring(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        rec_in: RecurringCreate,
+        author_id: uuid.UUID
+) -> RecurringTransaction:
+    """
+    Создаёт шаблон повторяющейся транзакции.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param rec_in: данные шаблона
+    :param author_id: UUID автора будущих транзакций
+    :return: созданный объект RecurringTransaction
+    :raises HTTPException 403: если пользователь не состоит в группе
+    :raises HTTPException 400: если категория не из группы или правило некорректно
+    """
+    if not await is_user_member_in_group(db, group_id, author_id):
+        raise HTTPException(status_code=403, detail='User not in group')
+
+    category = await db.execute(
+        select(Category.id).filter(Category.id == rec_in.category_id, Category.group_id == group_id)
+    )
+    if category.first() is None:
+        raise HTTPException(status_code=400, detail='Category not in group')
+
+    try:
+        first = rrulestr(rec_in.rrule, dtstart=rec_in.dtstart).after(rec_in.dtstart, inc=True)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail=f'Invalid rrule: {exc}')
+
+    template = RecurringTransaction(
+        group_id=group_id,
+        user_id=author_id,
+        next_run_at=first,
+        is_active=first is not None,
+        **rec_in.model_dump()
+    )
+    db.add(template)
+    await db.commit()
+    return template
+
+
+async def list_recurring(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> Sequence[RecurringTransaction]:
+    """
+    Возвращает шаблоны группы.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: список RecurringTransaction
+    """
+    result = await db.execute(
+        select(RecurringTransaction)
+        .filter(RecurringTransaction.group_id == group_id)
+        .order_by(RecurringTransaction.created_at)
+    )
+    return result.scalars().all()
+
+
+async def deactivate_recurring(
+        db: AsyncSession,
+        recurring_id: uuid.UUID,
+        current_user_id: uuid.UUID
+) -> None:
+    """
+    Останавливает шаблон; уже созданные транзакции остаются.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param recurring_id: UUID шаблона
+    :param current_user_id: UUID пользователя (автор шаблона или администратор группы)
+    :raises HTTPException 404: если шаблон не найден
+    :raises HTTPException 403: если нет прав
+    """
+    template = await db.get(RecurringTransaction, recurring_id)
+    if template is None:
+        raise HTTPException(status_code=404, detail='Recurring transaction not found')
+    if template.user_id != current_user_id and not await is_user_admin_in_group(db, template.group_id, current_user_id):
+        raise HTTPException(status_code=403, detail='Not enough rights')
+
+    template.is_active = False
+    template.next_run_at = None
+    await db.commit()
+
+
+def _occurrences(template: RecurringTransaction, now: datetime) -> tuple[list[datetime], datetime | None]:
+    """
+    Повторения шаблона от next_run_at до now включительно (не больше
+    MAX_OCCURRENCES_PER_TICK) и следующая дата запуска.
+    """
+    rule = _rule(template)
+    occurrences = []
+    current = template.next_run_at
+    while current is not None and current <= now and len(occurrences) < MAX_OCCURRENCES_PER_TICK:
+        occurrences.append(current)
+        current = rule.after(current)
+    return occurrences, current
+
+
+async def materialize_due(
+        db: AsyncSession,
+        now: datetime | None = None,
+        batch_size: int = 1000
+) -> int:
+    """
+    Создаёт транзакции для всех наступивших повторений активных шаблонов.
+
+    Шаблоны обрабатываются страницами по batch_size: на страницу — один
+    многострочный INSERT ... ON CONFLICT (recurring_id, date) DO NOTHING,
+    одно обновление агрегатов и один bulk UPDATE next_run_at, затем commit.
+    Уникальный ключ делает повторный запуск безопасным, а отставание после
+    простоя догоняется с next_run_at без дублей.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param now: момент, до которого создаются повторения (по умолчанию — сейчас)
+    :param batch_size: шаблонов на страницу
+    :return: количество созданных транзакций
+    """
+    now = now or datetime.now(timezone.utc)
+    created = 0
+
+    while True:
+        # строки, заблокированные другим воркером, пропускаются (на SQLite игнорируется)
+        result = await db.execute(
+            select(RecurringTransaction)
+            .filter(RecurringTransaction.is_active == True, RecurringTransaction.next_run_at <= now)
+            .order_by(RecurringTransaction.next_run_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .execution_options(populate_existing=True)
+        )
+        templates = result.scalars().all()
+        if not templates:
+            return created
+
+        rows, schedule = [], []
+        for template in templates:
+            occurrences, next_run_at = _occurrences(template, _aligned(now, template.next_run_at))
+            rows.extend(
+                {
+                    'id': uuid.uuid4(),
+                    'group_id': template.group_id,
+                    'category_id': template.category_id,
+                    'user_id': template.user_id,
+                    'recurring_id': template.id,
+                    'amount': template.amount,
+                    'type': template.type,
+                    'description': template.description,
+                    'date': occurrence,
+                }
+                for occurrence in occurrences
+            )
+            schedule.append({
+                'id': template.id,
+                'next_run_at': next_run_at,
+                'is_active': next_run_at is not None,
+            })
+
+        inserted, groups = [], Counter()
+        if rows:
+            result = await db.execute(
+                insert(db, Transaction)
+                .on_conflict_do_nothing(index_elements=['recurring_id', 'date'])
+                .returning(Transaction.id, Transaction.group_id),
+                rows,
+            )
+            for tx_id, group_id in result.tuples().all():
+                inserted.append(tx_id)
+                groups[group_id] += 1
+        for start in range(0, len(inserted), IDS_PER_STATEMENT):
+            await after_transactions_insert(db, [Transaction.id.in_(inserted[start:start + IDS_PER_STATEMENT])])
+
+        await db.execute(update(RecurringTransaction), schedule)
+        for group_id, count in groups.items():
+            publish_after_commit(db, group_id, 'transaction.batch', {'op': 'recurring', 'affected': count})
+            touch_group_snapshot(db, group_id)
+        await db.commit()
+
+        created += len(inserted)
+        logger.debug(f'Recurring: {len(templates)} templates, {len(inserted)} transactions created')
+
+
+async def run_recurring_tick() -> int:
+    """Один тик планировщика на каждом шарде (для PeriodicTask в lifespan)."""
+    created = 0
+    for factory in shard_router.factories:
+        async with factory() as db:
+            created += await materialize_due(db)
+    return created
@@ -1,9 +1,9 @@
 import math
 import os
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Awaitable, Callable, Dict
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -12,14 +12,21 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen.canvas import Canvas
 from reportlab.platypus import Table, TableStyle
-from sqlalchemy import select, func
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.core.config import settings
+from app.core.jobs import job
+from app.db.archive import read_archived, as_utc, period_end
 from app.db.base import TransactionType
+from app.db.shards import shard_router
+from app.models.category import Category
 from app.models.transaction import Transaction
+from app.models.user import User
 from app.schemas.report import ReportPdfRequest
-from app.services.category_service import get_category_by_id
-from app.services.user_service import get_user_by_id
+from app.services.analytics_service import get_group_frame, top_n
+from app.services.transaction_service import get_transactions_version, get_month_summary
+from app.utils.singleflight import SingleFlight
 
 # Регистрация шрифта для кириллицы
 FONT_PATH = Path(__file__).parent.parent / "static" / "fonts" / "DejaVuSans.ttf"
@@ -29,6 +36,9 @@ pdfmetrics.registerFont(TTFont("DejaVuSans", str(FONT_PATH)))
 REPORTS_DIR = Path(os.getenv("REPORTS_DIR", "reports"))
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Колонки архива для таблицы транзакций — в порядке строк запроса
+PDF_ARCHIVE_COLUMNS = ["date", "type", "category_name", "user_name", "description", "amount"]
+
 # Цветовая палитра (Tableau10)
 PALETTE = [colors.HexColor(h) for h in [
     "#4e79a7", "#f28e2b", "#e15759", "#76b7b2",
@@ -38,6 +48,9 @@ PALETTE = [colors.HexColor(h) for h in [
 # Цвет для "Прочие"
 GREY_OTHER = colors.HexColor("#666666")
 
+# Одновременные одинаковые отчёты и сводки считаются один раз
+flights = SingleFlight()
+
 async def generate_report_data(
     db: AsyncSession,
     req: ReportPdfRequest
@@ -45,49 +58,24 @@ async def generate_report_data(
     """
     Формирует агрегированные данные по доходам и расходам для отчёта.
 
+    Транзакции группы берутся из кэша колоночных снимков (get_group_frame),
+    суммы за период по типам, категориям и пользователям считаются в NumPy.
+
     :param db: асинхронная сессия SQLAlchemy
     :param req: параметры запроса для отчёта (группа, даты)
     :return: словарь с агрегированными значениями по категориям и пользователям
     """
-    filters = []
-    if req.date_from:
-        filters.append(Transaction.date >= req.date_from)
-    if req.date_to:
-        filters.append(Transaction.date <= req.date_to)
-
-    stmt_sum = lambda ttype: select(func.coalesce(func.sum(Transaction.amount), 0.0)).where(
-        Transaction.group_id == req.group_id,
-        Transaction.type == ttype,
-        *filters
-    )
-    total_income = (await db.execute(stmt_sum(TransactionType.income))).scalar_one()
-    total_expense = (await db.execute(stmt_sum(TransactionType.expense))).scalar_one()
-
-    async def aggregate(stmt, fetch):
-        out = {}
-        for key, amt in (await db.execute(stmt)).all():
-            entity = await fetch(db, key)
-            out[entity.name] = float(amt)
-        return out
-
-    build_stmt = lambda attr, ttype: select(attr, func.coalesce(func.sum(Transaction.amount), 0.0)).where(
-        Transaction.group_id == req.group_id,
-        Transaction.type == ttype,
-        *filters
-    ).group_by(attr)
-
-    inc_cat = build_stmt(Transaction.category_id, TransactionType.income)
-    exp_cat = build_stmt(Transaction.category_id, TransactionType.expense)
-    inc_usr = build_stmt(Transaction.user_id, TransactionType.income)
-    exp_usr = build_stmt(Transaction.user_id, TransactionType.expense)
+    frame = await get_group_frame(db, req.group_id)
+    period = (req.date_from, req.date_to)
+    totals = {row["type"]: row["amount"] for row in frame.group_sum(["type"], None, *period)}
 
     return {
-        "total_income": float(total_income),
-        "total_expense": float(total_expense),
-        "by_category_income": await aggregate(inc_cat, get_category_by_id),
-        "by_category_expense": await aggregate(exp_cat, get_category_by_id),
-        "by_user_income": await aggregate(inc_usr, get_user_by_id),
-        "by_user_expense": await aggregate(exp_usr, get_user_by_id),
+        "total_income": totals.get(TransactionType.income.value, 0.0),
+        "total_expense": totals.get(TransactionType.expense.value, 0.0),
+        "by_category_income": frame.totals_by("category", TransactionType.income, *period),
+        "by_category_expense": frame.totals_by("category", TransactionType.expense, *period),
+        "by_user_income": frame.totals_by("user", TransactionType.income, *period),
+        "by_user_expense": frame.totals_by("user", TransactionType.expense, *period),
     }
 
 async def generate_report_pdf(
@@ -120,10 +108,8 @@ async def generate_report_pdf(
     y = h - 4*cm
 
     def draw_section(title:str, items:Dict[str,float], y0:float)->float:
-        # группировка
-        N=5
-        si = sorted(items.items(),key=lambda kv:kv[1],reverse=True)
-        grp = si[:N] + [("Прочие",sum(v for _,v in si[N:]))] if len(si)>N else si
+        # группировка: первые 5 и «Прочие»
+        grp = top_n(items, 5)
 
         y1 = y0 - cm
         if not grp:
@@ -191,24 +177,34 @@ async def generate_report_pdf(
     if req.date_from:
         filters.append(Transaction.date >= req.date_from)
     if req.date_to:
-        filters.append(Transaction.date <= req.date_to)
-    stmt = select(Transaction).where(Transaction.group_id == req.group_id, *filters).order_by(Transaction.date)
-    txs = (await db.execute(stmt)).scalars().all()
+        end, inclusive = period_end(req.date_to)
+        filters.append(Transaction.date <= end if inclusive else Transaction.date < end)
+    # названия категорий и имена пользователей — тем же запросом, а не по запросу на строку
+    stmt = (
+        select(Transaction.date, Transaction.type, Category.name, User.name, Transaction.description, Transaction.amount)
+        .join(Category, Category.id == Transaction.category_id)
+        .join(User, User.id == Transaction.user_id)
+        .where(Transaction.group_id == req.group_id, *filters)
+        .order_by(Transaction.date)
+    )
+    rows = (await db.execute(stmt)).tuples().all()
+    # закрытые годы — из архива, в том же формате строк
+    archived = await read_archived(db, req.group_id, PDF_ARCHIVE_COLUMNS, req.date_from, req.date_to)
+    if archived.num_rows:
+        columns = [archived.column(name).to_pylist() for name in PDF_ARCHIVE_COLUMNS]
+        rows = sorted([*rows, *zip(*columns)], key=lambda row: as_utc(row[0]))
 
     # Подготовка данных таблицы
     table_data = [["Дата", "Тип", "Категория", "Пользователь", "Описание", "Сумма"]]
-    for tx in txs:
-        cat = await get_category_by_id(db, tx.category_id)
-        user = await get_user_by_id(db, tx.user_id)
-
-        type_rus = "Доходы" if tx.type == TransactionType.income else "Расходы"
+    for tx_date, tx_type, category_name, user_name, description, amount in rows:
+        type_rus = "Доходы" if tx_type == TransactionType.income.value else "Расходы"
         table_data.append([
-            tx.date.strftime('%Y-%m-%d'),
+            tx_date.strftime('%Y-%m-%d'),
             type_rus,
-            cat.name,
-            user.name,
-            tx.description or "",
-            f"{tx.amount:.2f}"
+            category_name,
+            user_name,
+            description or "",
+            f"{amount:.2f}"
         ])
 
     # Создание и отрисовка таблицы
@@ -236,6 +232,13 @@ async def generate_report_pdf(
 
 
 
+@job("report.pdf", concurrency=2)
+async def report_pdf_job(db: AsyncSession, **params: Any) -> dict:
+    """Задача очереди: PDF-отчёт; params — поля ReportPdfRequest. Результат — {report_file}."""
+    path = await generate_report_pdf(db, ReportPdfRequest(**params))
+    return {"report_file": path.name}
+
+
 async def get_report_file_path(report_id: uuid.UUID) -> Path:
     """
     Возвращает путь к сохранённому PDF-отчёту по report_id.
@@ -249,3 +252,103 @@ async def get_report_file_path(report_id: uuid.UUID) -> Path:
         if file.name.startswith(pattern) and file.suffix == ".pdf":
             return file
     raise FileNotFoundError(f"Report {report_id} not found")
+
+
+async def _in_session(
+    session_factory: async_sessionmaker[AsyncSession],
+    func: Callable[..., Awaitable[Any]],
+    *args: Any
+) -> Any:
+    # общее вычисление не может жить в сессии вызывающего: тот может уйти по отмене или таймауту
+    async with session_factory() as db:
+        return await func(db, *args)
+
+
+async def _shared(
+    db: AsyncSession,
+    kind: str,
+    group_id: uuid.UUID,
+    params: tuple,
+    session_factory: async_sessionmaker[AsyncSession] | None,
+    func: Callable[..., Awaitable[Any]],
+    *args: Any
+) -> Any:
+    """
+    Выполняет func в отдельной сессии, объединяя одновременные вызовы
+    с одинаковыми группой, параметрами и версией данных группы.
+    """
+    version = await get_transactions_version(db, group_id)
+    session_factory = session_factory or shard_router.session_factory(group_id)
+    return await flights.do(
+        (kind, group_id, params, version),
+        lambda: _in_session(session_factory, func, *args),
+        timeout=settings.SINGLEFLIGHT_TIMEOUT_SECONDS,
+    )
+
+
+async def shared_report_data(
+    db: AsyncSession,
+    req: ReportPdfRequest,
+    session_factory: async_sessionmaker[AsyncSession] | None = None
+) -> Dict[str, Any]:
+    """
+    generate_report_data с объединением одновременных одинаковых запросов.
+
+    Ключ — группа, период и версия транзакций группы, поэтому после любого
+    изменения данных отчёт считается заново. Результат общий для всех
+    ожидавших, изменять его нельзя.
+
+    :param db: асинхронная сессия SQLAlchemy (для чтения версии)
+    :param req: параметры отчёта
+    :param session_factory: фабрика сессий для общего вычисления (по умолчанию — шарда группы)
+    :return: словарь как у generate_report_data
+    :raises TimeoutError: если отчёт не готов за SINGLEFLIGHT_TIMEOUT_SECONDS
+    """
+    return await _shared(
+        db, "report_data", req.group_id, (req.date_from, req.date_to),
+        session_factory, generate_report_data, req,
+    )
+
+
+async def shared_report_pdf(
+    db: AsyncSession,
+    req: ReportPdfRequest,
+    session_factory: async_sessionmaker[AsyncSession] | None = None
+) -> Path:
+    """
+    generate_report_pdf с объединением одновременных одинаковых запросов:
+    все ожидавшие получают путь к одному файлу.
+
+    :param db: асинхронная сессия SQLAlchemy (для чтения версии)
+    :param req: параметры отчёта
+    :param session_factory: фабрика сессий для общего вычисления (по умолчанию — шарда группы)
+    :return: путь к PDF-файлу
+    :raises TimeoutError: если отчёт не готов за SINGLEFLIGHT_TIMEOUT_SECONDS
+    """
+    return await _shared(
+        db, "report_pdf", req.group_id, (req.date_from, req.date_to),
+        session_factory, generate_report_pdf, req,
+    )
+
+
+async def shared_month_summary(
+    db: AsyncSession,
+    group_id: uuid.UUID,
+    session_factory: async_sessionmaker[AsyncSession] | None = None,
+    month: date | None = None
+) -> dict:
+    """
+    get_month_summary с объединением одновременных одинаковых запросов.
+
+    :param db: асинхронная сессия SQLAlchemy (для чтения версии)
+    :param group_id: UUID группы
+    :param session_factory: фабрика сессий для общего вычисления (по умолчанию — шарда группы)
+    :param month: любой день месяца (по умолчанию текущий)
+    :return: словарь как у get_month_summary
+    :raises TimeoutError: если сводка не готова за SINGLEFLIGHT_TIMEOUT_SECONDS
+    """
+    month = (month or date.today()).replace(day=1)
+    return await _shared(
+        db, "month_summary", group_id, (month,),
+        session_factory, get_month_summary, group_id, month,
+    )
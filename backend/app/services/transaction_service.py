@@ -1,17 +1,84 @@
+import base64
+import re
 import uuid
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
+from functools import partial
 from typing import Sequence
 
+import orjson
 from fastapi import HTTPException
-from sqlalchemy import select, delete
+from sqlalchemy import select, delete, update, func, or_, and_, exists, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.base import TransactionType
+from app.core.events import on_commit, publish_after_commit
+from app.db.base import TransactionType, GroupRole
 from app.models.category import Category
-from app.models.transaction import Transaction
+from app.models.transaction import Transaction, transactions_fts
 from app.models.user_group import UserGroup
-from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionBatch, TransactionRead
+from app.services.analytics_service import snapshot_cache
+from app.services.balance_service import (
+    add_transaction_to_balances,
+    add_transactions_to_balances,
+    change_transactions_in_balances,
+)
+from app.services.budget_service import (
+    add_transaction_to_budgets,
+    add_transactions_to_budgets,
+    change_transactions_in_budgets,
+)
 from app.services.group_service import is_user_admin_in_group
+from app.utils.serialization import model_encoder
+
+
+# Поля транзакции, от которых зависят производные агрегаты
+BALANCE_FIELDS = frozenset({"amount", "type"})
+BUDGET_FIELDS = frozenset({"amount", "type", "category_id", "date"})
+
+
+async def after_transaction_insert(db: AsyncSession, tx: Transaction) -> None:
+    """
+    Учитывает новую транзакцию в производных агрегатах (балансы, бюджеты)
+    в той же транзакции БД.
+    """
+    await add_transaction_to_balances(db, tx.group_id, tx.user_id, tx.type, tx.amount)
+    await add_transaction_to_budgets(db, tx)
+
+
+async def after_transactions_insert(db: AsyncSession, conditions: list) -> None:
+    """
+    Учитывает в производных агрегатах набор строк, вставленных set-based INSERT.
+
+    :param conditions: условия WHERE по Transaction, выбирающие новые строки
+    """
+    await add_transactions_to_balances(db, conditions)
+    await add_transactions_to_budgets(db, conditions)
+
+
+async def before_transactions_change(db: AsyncSession, conditions: list, values: dict | None = None) -> None:
+    """
+    Переносит в производные агрегаты изменение строк, выбранных conditions.
+
+    Вызывается до UPDATE/DELETE с теми же условиями, поэтому если запрос
+    не затронет ни одной строки, агрегаты тоже не изменятся.
+
+    :param values: новые значения колонок; None — строки удаляются
+    """
+    if values is None or BALANCE_FIELDS & values.keys():
+        await change_transactions_in_balances(db, conditions, values)
+    if values is None or BUDGET_FIELDS & values.keys():
+        await change_transactions_in_budgets(db, conditions, values)
+
+
+def touch_group_snapshot(db: AsyncSession, group_id: uuid.UUID) -> None:
+    """После коммита помечает снимок аналитики группы устаревшим."""
+    on_commit(db, partial(snapshot_cache.touch, group_id))
+
+
+def _publish_transaction(db: AsyncSession, tx: Transaction, event_type: str) -> None:
+    """Публикует транзакцию в поток событий группы после коммита."""
+    publish_after_commit(db, tx.group_id, event_type, model_encoder(TransactionRead)(tx))
+    touch_group_snapshot(db, tx.group_id)
 
 
 async def create_transaction(
@@ -59,8 +126,11 @@ async def create_transaction(
     )
 
     db.add(tx)
+    await after_transaction_insert(db, tx)
+    # id и created_at нужны событию до коммита
+    await db.flush()
+    _publish_transaction(db, tx, 'transaction.created')
     await db.commit()
-    await db.refresh(tx)
     return tx
 
 
@@ -85,6 +155,27 @@ async def get_transaction_by_id(
     return result.scalars().first()
 
 
+def _filter_conditions(
+        user_id: uuid.UUID | None = None,
+        category_id: uuid.UUID | None = None,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        tx_type: TransactionType | None = None
+) -> list:
+    conditions = []
+    if user_id:
+        conditions.append(Transaction.user_id == user_id)
+    if category_id:
+        conditions.append(Transaction.category_id == category_id)
+    if date_from:
+        conditions.append(Transaction.date >= date_from)
+    if date_to:
+        conditions.append(Transaction.date <= date_to)
+    if tx_type:
+        conditions.append(Transaction.type == tx_type)
+    return conditions
+
+
 async def list_transactions(
         db: AsyncSession,
         group_id: uuid.UUID,
@@ -111,24 +202,197 @@ async def list_transactions(
     :return: список объектов Transaction
     """
 
-    stmt = select(Transaction).filter(Transaction.group_id == group_id)
-
-    if user_id:
-        stmt = stmt.filter(Transaction.user_id == user_id)
-    if category_id:
-        stmt = stmt.filter(Transaction.category_id == category_id)
-    if date_from:
-        stmt = stmt.filter(Transaction.date >= date_from)
-    if date_to:
-        stmt = stmt.filter(Transaction.date <= date_to)
-    if tx_type:
-        stmt = stmt.filter(Transaction.type == tx_type)
+    stmt = select(Transaction).filter(
+        Transaction.group_id == group_id,
+        *_filter_conditions(user_id, category_id, date_from, date_to, tx_type)
+    )
 
     stmt = stmt.offset(skip).limit(limit)
     result = await db.execute(stmt)
     return result.scalars().all()
 
 
+async def list_recent_transactions(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        limit: int = 50
+) -> Sequence[Transaction]:
+    """
+    Возвращает последние транзакции группы (по дате операции, новые первыми).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param limit: максимум транзакций
+    :return: список объектов Transaction
+    """
+    result = await db.execute(
+        select(Transaction)
+        .filter(Transaction.group_id == group_id)
+        .order_by(Transaction.date.desc(), Transaction.id.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def get_month_summary(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        month: date | None = None
+) -> dict:
+    """
+    Итоги группы за календарный месяц одним GROUP BY по категории и типу.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param month: любой день месяца (по умолчанию текущий)
+    :return: словарь {month, total_income, total_expense, by_category}
+    """
+    start = (month or date.today()).replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    result = await db.execute(
+        select(Transaction.category_id, Transaction.type, func.sum(Transaction.amount))
+        .filter(
+            Transaction.group_id == group_id,
+            Transaction.date >= datetime.combine(start, time.min),
+            Transaction.date < datetime.combine(end, time.min),
+        )
+        .group_by(Transaction.category_id, Transaction.type)
+    )
+
+    by_category: dict[uuid.UUID, dict] = {}
+    for category_id, tx_type, amount in result.tuples().all():
+        row = by_category.setdefault(category_id, {"category_id": category_id, "income": 0.0, "expense": 0.0})
+        row[tx_type.value] += float(amount)
+
+    return {
+        "month": start.strftime("%Y-%m"),
+        "total_income": sum(row["income"] for row in by_category.values()),
+        "total_expense": sum(row["expense"] for row in by_category.values()),
+        "by_category": list(by_category.values()),
+    }
+
+
+def _encode_cursor(score: float, tx_id: uuid.UUID) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([score, str(tx_id)])).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    try:
+        score, tx_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(score), uuid.UUID(tx_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+
+def _search_query(db: AsyncSession, q: str):
+    """
+    Строит SELECT (Transaction, score) по совпадению с q для текущего диалекта;
+    score — релевантность, больше — лучше.
+
+    Postgres: websearch-запрос по tsvector либо trigram-похожесть (GIN-индексы
+    ix_transactions_description_tsv / _trgm). SQLite: FTS5 с префиксным поиском
+    по каждому слову, релевантность — bm25.
+
+    :return: (stmt, score) или (None, None), если в запросе нет слов
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        terms = re.findall(r"\w+", q)
+        if not terms:
+            return None, None
+        match = " ".join(f'"{term}"*' for term in terms)
+        score = (-func.bm25(literal_column("transactions_fts"))).label("score")
+        stmt = (
+            select(Transaction, score)
+            .join(transactions_fts, transactions_fts.c.rowid == literal_column("transactions.rowid"))
+            .filter(literal_column("transactions_fts").op("MATCH")(match))
+        )
+        return stmt, score
+
+    # выражение должно совпадать с выражением индекса, поэтому константы — литералы
+    tsv = func.to_tsvector(
+        literal_column("'simple'::regconfig"),
+        func.coalesce(Transaction.description, literal_column("''"))
+    )
+    tsq = func.websearch_to_tsquery(literal_column("'simple'::regconfig"), q)
+    score = func.greatest(func.ts_rank(tsv, tsq), func.similarity(Transaction.description, q)).label("score")
+    stmt = (
+        select(Transaction, score)
+        .filter(or_(tsv.op("@@")(tsq), Transaction.description.op("%")(q)))
+    )
+    return stmt, score
+
+
+async def search_transactions(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        q: str,
+        limit: int = 50,
+        cursor: str | None = None,
+        **filters
+) -> tuple[list[Transaction], str | None]:
+    """
+    Ищет транзакции группы по описанию с ранжированием по релевантности.
+
+    Пагинация keyset: курсор — (релевантность, id) последней строки страницы,
+    следующая страница продолжает порядок (score DESC, id DESC) без OFFSET.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param q: поисковая строка
+    :param limit: размер страницы
+    :param cursor: курсор из предыдущей страницы
+    :param filters: те же фильтры, что у list_transactions
+    :return: (транзакции страницы, курсор следующей страницы или None)
+    :raises HTTPException 400: если курсор некорректен
+    """
+
+    stmt, score = _search_query(db, q)
+    if stmt is None:
+        return [], None
+
+    stmt = (
+        stmt
+        .filter(Transaction.group_id == group_id, *_filter_conditions(**filters))
+        .order_by(score.desc(), Transaction.id.desc())
+        .limit(limit + 1)
+    )
+
+    if cursor is not None:
+        last_score, last_id = _decode_cursor(cursor)
+        stmt = stmt.filter(or_(
+            score.element < last_score,
+            and_(score.element == last_score, Transaction.id < last_id)
+        ))
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].score, rows[-1].Transaction.id)
+
+    return [row.Transaction for row in rows], next_cursor
+
+
+async def get_transactions_version(
+        db: AsyncSession,
+        group_id: uuid.UUID
+) -> tuple:
+    """
+    Возвращает версию списка транзакций группы для ETag:
+    количество строк и последний updated_at (по индексу group_id, updated_at).
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :return: кортеж (count, max_updated_at)
+    """
+
+    result = await db.execute(
+        select(func.count(Transaction.id), func.max(Transaction.updated_at))
+        .filter(Transaction.group_id == group_id)
+    )
+    return tuple(result.one())
+
+
 async def check_transaction_permission(
         db: AsyncSession,
         tx: Transaction,
@@ -147,79 +411,239 @@ async def check_transaction_permission(
     return await is_user_admin_in_group(db, tx.group_id, user_id)
 
 
-async def update_transaction(
+def _can_modify(user_id: uuid.UUID):
+    """
+    Условие «автор или администратор группы» для WHERE в UPDATE/DELETE/SELECT по транзакциям.
+    """
+    return or_(
+        Transaction.user_id == user_id,
+        exists().where(
+            UserGroup.group_id == Transaction.group_id,
+            UserGroup.user_id == user_id,
+            UserGroup.role == GroupRole.admin,
+        ),
+    )
+
+
+def _category_in_group(category_id: uuid.UUID):
+    return exists().where(Category.id == category_id, Category.group_id == Transaction.group_id)
+
+
+async def _raise_not_modified(
         db: AsyncSession,
-        tx: Transaction,
+        tx_id: uuid.UUID,
+        user_id: uuid.UUID,
+        category_id: uuid.UUID | None = None
+) -> None:
+    """
+    Объясняет одним запросом, почему условная запись не затронула строк.
+
+    :raises HTTPException 404: если транзакции нет
+    :raises HTTPException 403: если пользователь не автор и не администратор группы
+    :raises HTTPException 400: если категория не из группы транзакции
+    """
+    result = await db.execute(
+        select(Transaction.id, _can_modify(user_id).label("allowed"))
+        .filter(Transaction.id == tx_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail='Transaction not found')
+    if not row.allowed:
+        raise HTTPException(status_code=403, detail='forbidden')
+    if category_id is not None:
+        raise HTTPException(status_code=400, detail='Invalid category for this group')
+    raise HTTPException(status_code=409, detail='Transaction was modified concurrently')
+
+
+async def update_transaction_by_id(
+        db: AsyncSession,
+        tx_id: uuid.UUID,
         tx_in: TransactionUpdate,
         current_user_id: uuid.UUID
 ) -> Transaction:
     """
-    Обновляет данные транзакции.
+    Обновляет транзакцию одним UPDATE ... WHERE <права> RETURNING.
+
+    Права (автор или администратор группы) и принадлежность новой категории группе
+    проверяются в самом запросе; лишний запрос выполняется только при отказе,
+    чтобы вернуть правильный код ошибки.
 
     :param db: асинхронная сессия SQLAlchemy
-    :param transaction_id: UUID транзакции
+    :param tx_id: UUID транзакции
     :param tx_in: новые данные транзакции
+    :param current_user_id: UUID пользователя, выполняющего изменение
     :return: обновлённый объект Transaction
     :raises HTTPException 404: если транзакция не найдена
+    :raises HTTPException 403: если нет прав
+    :raises HTTPException 400: если категория не из группы транзакции
     """
 
-    if not await check_transaction_permission(db, tx, current_user_id):
-        raise HTTPException(status_code=403, detail='forbidden')
+    values = tx_in.model_dump(exclude_none=True)
 
-    updated = False
-
-    if tx_in.amount is not None:
-        tx.amount = tx_in.amount
-        updated = True
-    if tx_in.description is not None:
-        tx.description = tx_in.description
-        updated = True
-    if tx_in.type is not None:
-        tx.type = tx_in.type
-        updated = True
-    if tx_in.date is not None:
-        tx.date = tx_in.date
-        updated = True
-    if tx_in.category_id is not None:
-        cat = await db.execute(
-            select(Category)
-            .filter(Category.id == tx_in.category_id,
-                    Category.group_id == tx.group_id)
+    if not values:
+        result = await db.execute(
+            select(Transaction).filter(Transaction.id == tx_id, _can_modify(current_user_id))
+        )
+    else:
+        conditions = [Transaction.id == tx_id, _can_modify(current_user_id)]
+        if "category_id" in values:
+            conditions.append(_category_in_group(values["category_id"]))
+        await before_transactions_change(db, conditions, values)
+        result = await db.execute(
+            update(Transaction).filter(*conditions).values(**values)
+            .returning(Transaction)
+            .execution_options(synchronize_session=False, populate_existing=True)
         )
 
-        if not cat.scalars().first():
-            raise HTTPException(status_code=400, detail='Invalid category for this group')
-
-        tx.category_id = tx_in.category_id
-        updated = True
+    tx = result.scalars().first()
+    if tx is None:
+        await _raise_not_modified(db, tx_id, current_user_id, values.get("category_id"))
 
-    if updated:
+    if values:
+        _publish_transaction(db, tx, 'transaction.updated')
         await db.commit()
-        await db.refresh(tx)
-
     return tx
 
 
+async def delete_transaction_by_id(
+        db: AsyncSession,
+        tx_id: uuid.UUID,
+        current_user_id: uuid.UUID
+) -> None:
+    """
+    Удаляет транзакцию одним DELETE ... WHERE <права> RETURNING.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param tx_id: UUID транзакции
+    :param current_user_id: UUID пользователя, выполняющего удаление
+    :raises HTTPException 404: если транзакция не найдена
+    :raises HTTPException 403: если нет прав
+    """
+
+    conditions = [Transaction.id == tx_id, _can_modify(current_user_id)]
+    await before_transactions_change(db, conditions)
+    result = await db.execute(
+        delete(Transaction)
+        .filter(*conditions)
+        .returning(Transaction.group_id)
+        .execution_options(synchronize_session="fetch")
+    )
+    group_id = result.scalars().first()
+    if group_id is None:
+        await _raise_not_modified(db, tx_id, current_user_id)
+
+    publish_after_commit(db, group_id, 'transaction.deleted', {'id': tx_id})
+    touch_group_snapshot(db, group_id)
+    await db.commit()
+
+
+async def update_transaction(
+        db: AsyncSession,
+        tx: Transaction,
+        tx_in: TransactionUpdate,
+        current_user_id: uuid.UUID
+) -> Transaction:
+    """
+    Обновляет данные транзакции.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param tx: транзакция
+    :param tx_in: новые данные транзакции
+    :param current_user_id: UUID пользователя, выполняющего изменение
+    :return: обновлённый объект Transaction
+    :raises HTTPException 403: если нет прав
+    :raises HTTPException 400: если категория не из группы транзакции
+    """
+
+    return await update_transaction_by_id(db, tx.id, tx_in, current_user_id)
+
+
 async def delete_transaction(
         db: AsyncSession,
         tx: Transaction,
         current_user_id: uuid.UUID
 ) -> None:
     """
-    Удаляет транзакцию по UUID.
+    Удаляет транзакцию.
 
     :param db: асинхронная сессия SQLAlchemy
-    :param transaction_id: UUID транзакции
-    :raises HTTPException 404: если транзакция не найдена
+    :param tx: транзакция
+    :param current_user_id: UUID пользователя, выполняющего удаление
+    :raises HTTPException 403: если нет прав
     """
 
-    check_permission = await check_transaction_permission(db, tx, current_user_id)
+    await delete_transaction_by_id(db, tx.id, current_user_id)
 
-    if not check_permission:
-        raise HTTPException(status_code=403, detail='forbidden')
 
-    await db.execute(
-        delete(Transaction)
-        .filter(Transaction.id == tx.id)
-    )
+def _shifted_date(db: AsyncSession, days: int):
+    """Выражение «date + days» для текущего диалекта."""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.datetime(Transaction.date, f"{days:+d} days")
+    return Transaction.date + timedelta(days=days)
+
+
+async def batch_transactions(
+        db: AsyncSession,
+        group_id: uuid.UUID,
+        batch: TransactionBatch,
+        current_user_id: uuid.UUID
+) -> int:
+    """
+    Применяет операцию к набору транзакций группы одним UPDATE/DELETE.
+
+    Набор задаётся списком id и/или фильтром. Права те же, что у одиночных
+    операций: администратор группы затрагивает любые транзакции группы,
+    участник — только свои.
+
+    :param db: асинхронная сессия SQLAlchemy
+    :param group_id: UUID группы
+    :param batch: набор и операция (delete, set_category, set_type, shift_date)
+    :param current_user_id: UUID пользователя
+    :return: количество затронутых транзакций
+    :raises HTTPException 403: если пользователь не состоит в группе
+    :raises HTTPException 400: если категория не из группы
+    """
+
+    role = (await db.execute(
+        select(UserGroup.role)
+        .filter(UserGroup.group_id == group_id, UserGroup.user_id == current_user_id)
+    )).scalars().first()
+    if role is None:
+        raise HTTPException(status_code=403, detail='User not in group')
+
+    conditions = [Transaction.group_id == group_id]
+    if role != GroupRole.admin:
+        conditions.append(Transaction.user_id == current_user_id)
+    if batch.ids is not None:
+        conditions.append(Transaction.id.in_(batch.ids))
+    if batch.filter is not None:
+        conditions.extend(_filter_conditions(**batch.filter.model_dump()))
+
+    if batch.op == 'delete':
+        await before_transactions_change(db, conditions)
+        stmt = delete(Transaction).filter(*conditions)
+    else:
+        if batch.op == 'set_category':
+            category = await db.execute(
+                select(Category.id)
+                .filter(Category.id == batch.category_id, Category.group_id == group_id)
+            )
+            if category.first() is None:
+                raise HTTPException(status_code=400, detail='Category not in group')
+            values = {"category_id": batch.category_id}
+        elif batch.op == 'set_type':
+            values = {"type": batch.type}
+        else:
+            values = {"date": _shifted_date(db, batch.days)}
+        await before_transactions_change(db, conditions, values)
+        stmt = update(Transaction).filter(*conditions).values(**values)
+
+    # объекты в сессии не синхронизируем: набор может быть очень большим
+    result = await db.execute(stmt.execution_options(synchronize_session=False))
+    if result.rowcount:
+        # набор может быть большим — клиент перечитывает список сам
+        publish_after_commit(db, group_id, 'transaction.batch', {'op': batch.op, 'affected': result.rowcount})
+        touch_group_snapshot(db, group_id)
     await db.commit()
+    return result.rowcount
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
+from functools import partial
 from typing import Sequence
 
 from fastapi import HTTPException
@@ -10,8 +11,10 @@ from pydantic import EmailStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.events import on_commit
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.analytics_service import snapshot_cache
 from app.utils.utils import check_rights
 
 __all__ = [
@@ -45,7 +48,6 @@ async def create_user(
     )
     db.add(user)
     await db.commit()
-    await db.refresh(user)
     return user
 
 
@@ -114,6 +116,8 @@ async def update_user(
     if user_in.name is not None:
         user.name = user_in.name
         updated = True
+        # имена пользователей хранятся в снимках аналитики
+        on_commit(db, partial(snapshot_cache.invalidate_user, user.id))
 
     if user_in.password is not None:
         user.password_hash = pwd_context.hash(user_in.password)
@@ -121,7 +125,6 @@ async def update_user(
 
     if updated:
         await db.commit()
-        await db.refresh(user)
     return user
 
 
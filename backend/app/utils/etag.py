@@ -0,0 +1,42 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Строит слабый ETag из версии ресурса (id, количество строк, max(updated_at), ...).
+
+    Слабый, потому что CompressionMiddleware отдаёт один и тот же ресурс
+    побайтно разным (identity, gzip, br), а сильный валидатор у разных
+    представлений совпадать не должен.
+
+    :param parts: значения, однозначно задающие состояние ответа
+    :return: значение заголовка ETag (W/"...")
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Проверяет If-None-Match запроса против текущего ETag слабым сравнением
+    (RFC 9110): префикс W/ не учитывается ни у одной из сторон.
+
+    :param request: входящий запрос
+    :param etag: текущий ETag ресурса
+    :return: True, если клиент уже имеет актуальную версию
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified(etag: str) -> Response:
+    """Ответ 304 без тела."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
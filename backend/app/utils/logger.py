@@ -1,37 +1,84 @@
+import atexit
 import logging
+import queue
+import random
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
 from loguru import logger
 
+ACCESS_LOGGER = "uvicorn.access"
+
+_listener: QueueListener | None = None
+
 
 class InterceptHandler(logging.Handler):
     """
     Custom logging handler to intercept standard logging records and redirect them to Loguru.
+
+    The stdlib record already knows where it was emitted (name, funcName, lineno),
+    so it is copied into the Loguru record instead of walking stack frames.
     """
+    def __init__(self, level: int = logging.NOTSET) -> None:
+        super().__init__(level)
+        self._levels: dict[str, str | int] = {}
+
+    def _resolve_level(self, record: logging.LogRecord) -> str | int:
+        level = self._levels.get(record.levelname)
+        if level is None:
+            # Get corresponding Loguru level if it exists
+            try:
+                level = logger.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            self._levels[record.levelname] = level
+        return level
+
     def emit(self, record: logging.LogRecord) -> None:
-        # Get corresponding Loguru level if it exists
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
+        def patch(loguru_record) -> None:
+            loguru_record.update(name=record.name, function=record.funcName, line=record.lineno)
 
-        # Find the caller frame to get accurate depth
-        frame = logging.currentframe()
-        depth = 2
-        while frame and frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
+        logger.patch(patch).opt(exception=record.exc_info).log(
+            self._resolve_level(record), record.getMessage()
+        )
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through only a share of records below WARNING (e.g. access log lines).
+    """
+    def __init__(self, rate: float = 1.0) -> None:
+        super().__init__()
+        self.rate = min(max(rate, 0.0), 1.0)
 
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
 
 
-def setup_logging(log_file: str = "logs/app.log") -> None:
+def setup_logging(
+        log_file: str | None = "logs/app.log",
+        *,
+        enqueue: bool = True,
+        serialize: bool = False,
+        diagnose: bool = False,
+        access_sample_rate: float = 1.0,
+) -> None:
     """
     Configure Loguru and intercept standard logging.
 
     - Outputs to stderr at INFO level for console.
-    - Writes DEBUG+ logs to a rotating file with retention and compression.
+    - Writes DEBUG+ logs to a rotating file with retention and compression
+      (skipped when ``log_file`` is empty, e.g. under tests).
+    - With ``enqueue`` the file is written by Loguru's own writer thread and
+      stdlib records (uvicorn, sqlalchemy, ...) are handed to a dedicated
+      thread as well, so neither ``logger.info(...)`` nor stdlib logging
+      blocks the request path on disk I/O.
+    - With ``serialize`` every line is a JSON object.
+    - ``access_sample_rate`` keeps only a share of uvicorn access lines.
     """
+    stop_logging()
     logger.remove()
 
     # Console output
@@ -39,28 +86,63 @@ def setup_logging(log_file: str = "logs/app.log") -> None:
         sink=sys.stderr,
         level="INFO",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {message}",
-        backtrace=True,
-        diagnose=True,
+        backtrace=diagnose,
+        diagnose=diagnose,
+        serialize=serialize,
     )
 
     # File output
-    logger.add(
-        sink=log_file,
-        level="DEBUG",
-        rotation="10 MB",
-        retention="7 days",
-        compression="zip",
-        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
-    )
+    if log_file:
+        logger.add(
+            sink=log_file,
+            level="DEBUG",
+            rotation="10 MB",
+            retention="7 days",
+            compression="zip",
+            format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
+            backtrace=diagnose,
+            diagnose=diagnose,
+            serialize=serialize,
+            enqueue=enqueue,
+        )
 
     # Intercept stdlib logging
     intercept = InterceptHandler()
-    logging.root.handlers = [intercept]
+    if enqueue:
+        global _listener
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        _listener = QueueListener(records, intercept)
+        _listener.start()
+        logging.root.handlers = [QueueHandler(records)]
+    else:
+        logging.root.handlers = [intercept]
     logging.root.setLevel(logging.INFO)
 
-    # Intercept popular loggers (e.g. Uvicorn)
-    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
-        logging.getLogger(name).handlers = [intercept]
+    # Uvicorn loggers propagate to the root handler, so every record is emitted once
+    for name in ("uvicorn", "uvicorn.error", ACCESS_LOGGER):
+        logging.getLogger(name).handlers = []
         logging.getLogger(name).propagate = True
 
+    access = logging.getLogger(ACCESS_LOGGER)
+    access.filters = [f for f in access.filters if not isinstance(f, SamplingFilter)]
+    if access_sample_rate < 1.0:
+        access.addFilter(SamplingFilter(access_sample_rate))
+
     logger.info("Logging is configured.")
+
+
+def stop_logging() -> None:
+    """
+    Stop the writer thread started by ``setup_logging(enqueue=True)`` and flush
+    the records still waiting in its queue and in Loguru's enqueued sinks.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        # dispatch synchronously from now on
+        logging.root.handlers = list(_listener.handlers)
+        _listener = None
+    logger.complete()
+
+
+atexit.register(stop_logging)
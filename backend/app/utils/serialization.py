@@ -0,0 +1,111 @@
+import types
+import typing
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Iterable, Mapping
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+# pydantic пишет UTC как "Z", orjson по умолчанию — как "+00:00"
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+Encoder = Callable[[Any], Any]
+
+
+def _optional(encoder: Encoder) -> Encoder:
+    return lambda value: None if value is None else encoder(value)
+
+
+def _field_encoder(annotation: Any) -> Encoder | None:
+    """
+    Подбирает преобразование значения атрибута ORM-объекта под тип поля схемы.
+
+    None означает, что значение отдаётся в orjson как есть
+    (str, bool, UUID, datetime, Enum orjson кодирует сам).
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin in (typing.Union, types.UnionType):
+        inner = [arg for arg in args if arg is not type(None)]
+        if len(inner) == 1:
+            encoder = _field_encoder(inner[0])
+            return _optional(encoder) if encoder else None
+        return None
+
+    if origin is list and args:
+        encoder = _field_encoder(args[0])
+        if encoder is None:
+            return list
+        return lambda values: [encoder(value) for value in values]
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return model_encoder(annotation)
+
+    if annotation is float:
+        # Numeric из БД приходит как Decimal
+        return float
+
+    return None
+
+
+@lru_cache(maxsize=None)
+def model_encoder(model: type[BaseModel]) -> Callable[[Any], dict]:
+    """
+    Строит функцию «ORM-объект -> dict» с тем же набором и порядком полей,
+    что у pydantic-схемы, без валидации через pydantic.
+
+    :param model: схема ответа (TransactionRead, CategoryRead, ...)
+    :return: функция преобразования объекта
+    """
+    names = tuple(model.model_fields)
+    getter = attrgetter(*names) if len(names) > 1 else (lambda obj: (getattr(obj, names[0]),))
+    converters = [
+        (index, encoder)
+        for index, field in enumerate(model.model_fields.values())
+        if (encoder := _field_encoder(field.annotation)) is not None
+    ]
+
+    def encode(obj: Any) -> dict:
+        if isinstance(obj, dict):
+            values = [obj[name] for name in names]
+        else:
+            values = list(getter(obj))
+        for index, encoder in converters:
+            if values[index] is not None:
+                values[index] = encoder(values[index])
+        return dict(zip(names, values))
+
+    return encode
+
+
+def encode_models(rows: Iterable[Any], model: type[BaseModel]) -> bytes:
+    """
+    Кодирует список ORM-объектов (или словарей) сразу в JSON-байты.
+
+    Результат побайтово совпадает с сериализацией через ``response_model``.
+
+    :param rows: объекты или словари с атрибутами схемы
+    :param model: pydantic-схема элемента списка
+    :return: JSON-массив
+    """
+    encode = model_encoder(model)
+    return orjson.dumps([encode(row) for row in rows], option=ORJSON_OPTIONS)
+
+
+class ModelListResponse(Response):
+    """
+    Ответ со списком объектов, закодированных напрямую через ``encode_models``.
+    """
+    media_type = "application/json"
+
+    def __init__(
+            self,
+            rows: Iterable[Any],
+            model: type[BaseModel],
+            status_code: int = 200,
+            headers: Mapping[str, str] | None = None,
+    ) -> None:
+        super().__init__(encode_models(rows, model), status_code=status_code, headers=headers)
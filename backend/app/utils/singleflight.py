@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые вызовы в одно вычисление.
+
+    Первый вызов с ключом запускает ``func`` отдельной задачей, остальные
+    ждут ту же задачу. Ожидание идёт через ``asyncio.shield``: отмена или
+    таймаут одного вызывающего не прерывает вычисление для остальных;
+    задача отменяется, только когда её больше никто не ждёт. Результат
+    не кэшируется — после завершения следующий вызов считает заново.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(
+            self,
+            key: Hashable,
+            func: Callable[[], Awaitable[T]],
+            timeout: float | None = None,
+    ) -> T:
+        """
+        Возвращает результат func(), разделяя его со всеми одновременными вызовами с тем же ключом.
+
+        :param key: нормализованный ключ запроса (включая версию данных)
+        :param func: фабрика корутины вычисления; вызывается только первым
+        :param timeout: сколько ждать этому вызывающему (None — без ограничения)
+        :return: результат вычисления
+        :raises TimeoutError: если результат не получен за timeout
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: (self._forget(key, call), _consume(task)))
+
+        call.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(call.task), timeout)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # результат больше никому не нужен
+                call.task.cancel()
+                self._forget(key, call)
+
+
+def _consume(task: asyncio.Task) -> Any:
+    # исключение уже получили ожидающие (или их не осталось) — не пишем "never retrieved"
+    if not task.cancelled():
+        return task.exception()
@@ -0,0 +1,45 @@
+"""
+Отдельный процесс обработки фоновых задач без HTTP-сервера:
+
+    python -m app.worker
+
+Воркеры в приложении и в таких процессах могут работать одновременно.
+"""
+import asyncio
+import signal
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.jobs import HANDLERS, JobWorker
+from app.db.session import async_engine, async_sesion_factory
+from app.db.shards import dispose_shards, shard_router
+from app.utils.logger import setup_logging, stop_logging
+
+# модули с обработчиками @job
+import app.services.balance_service  # noqa: F401
+import app.services.purge_service  # noqa: F401
+import app.services.report_service  # noqa: F401
+
+
+async def main() -> None:
+    setup_logging(settings.LOG_FILE, enqueue=settings.LOG_ENQUEUE, serialize=settings.LOG_JSON)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = JobWorker(async_sesion_factory, shard_router, settings.JOBS_CONCURRENCY, settings.JOBS_POLL_SECONDS)
+    worker.start()
+    logger.info(f'Job worker {worker.name} started: {", ".join(sorted(HANDLERS))}')
+    await stop.wait()
+
+    # незавершённые задачи возвращаются в очередь
+    await worker.stop()
+    await async_engine.dispose()
+    await dispose_shards()
+    stop_logging()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+# bench_logging.py
+#
+# Замер пропускной способности access-логов на потоке запроса:
+# синхронные sink'и против очереди (enqueue) и сэмплирования.
+#
+#   python -m tests.bench_logging
+
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from app.utils.logger import ACCESS_LOGGER, setup_logging, stop_logging
+
+RECORDS = 20_000
+
+
+def run(label: str, **options) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_logging(str(Path(tmp) / "bench.log"), **options)
+        access = logging.getLogger(ACCESS_LOGGER)
+
+        started = time.perf_counter()
+        for i in range(RECORDS):
+            access.info('%s - "%s %s HTTP/1.1" %d', "127.0.0.1:5000", "GET", f"/api/v1/transactions?skip={i}", 200)
+        elapsed = time.perf_counter() - started
+
+        stop_logging()
+        logger.remove()
+
+    rate = RECORDS / elapsed
+    print(f"{label:<32} {rate:>12,.0f} records/s on request path")
+    return rate
+
+
+def main() -> None:
+    sync = run("sync sinks", enqueue=False)
+    queued = run("enqueue", enqueue=True)
+    sampled = run("enqueue + 10% access sampling", enqueue=True, access_sample_rate=0.1)
+    print(f"enqueue speed-up: x{queued / sync:.1f}, with sampling: x{sampled / sync:.1f}")
+
+
+if __name__ == "__main__":
+    main()
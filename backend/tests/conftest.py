@@ -1,3 +1,8 @@
+import os
+
+# до импорта app: main.py настраивает логирование при импорте, тесты пишут только в консоль
+os.environ["LOG_FILE"] = ""
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -0,0 +1,192 @@
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.db.base import Base, TransactionType
+from app.models.category import Category
+from app.models.user import User
+from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.schemas.group import GroupCreate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.user import UserCreate
+from app.services.analytics_service import (
+    load_transactions_frame,
+    top_n,
+    get_group_frame,
+    snapshot_cache,
+    Snapshot,
+    SnapshotCache,
+    TransactionFrame,
+)
+from app.services.category_service import create_category, update_category
+from app.services.group_service import create_group
+from app.services.transaction_service import (
+    create_transaction,
+    update_transaction_by_id,
+    delete_transaction_by_id,
+)
+from app.services.user_service import create_user
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@contextmanager
+def capture_statements():
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_frame_group_sum_and_pivot(async_session: AsyncSession):
+    user = await create_user(async_session, UserCreate(email="an@example.com", name="Ann", password="pass1234"))
+    group = await create_group(async_session, GroupCreate(name="Stats", description=""), user.id)
+    food = await create_category(async_session, CategoryCreate(name="Food", icon=None), group.id)
+    rent = await create_category(async_session, CategoryCreate(name="Rent", icon=None), group.id)
+
+    for category, amount, tx_type, day in [
+        (food, 0.29, TransactionType.expense, datetime(2025, 1, 6, 12)),
+        (food, 10.0, TransactionType.expense, datetime(2025, 1, 12, 23)),
+        (rent, 500.0, TransactionType.expense, datetime(2025, 2, 1)),
+        (food, 100.0, TransactionType.income, datetime(2025, 2, 3)),
+    ]:
+        await create_transaction(async_session, TransactionCreate(
+            group_id=group.id, category_id=category.id, amount=amount,
+            type=tx_type, description="", date=day
+        ), user.id)
+
+    frame = await load_transactions_frame(async_session, group.id)
+    assert len(frame) == 4
+    assert frame.cents.tolist().count(29) == 1
+
+    rows = frame.group_sum(["category", "month"], TransactionType.expense)
+    assert [(r["category"], r["month"], r["amount"], r["count"]) for r in rows] == [
+        (food.id, "2025-01", 10.29, 2),
+        (rent.id, "2025-02", 500.0, 1),
+    ]
+    assert frame.named(rows)[0]["category_name"] == "Food"
+
+    # недели начинаются с понедельника
+    weeks = frame.group_sum(["week"], TransactionType.expense)
+    assert [(r["week"], r["count"]) for r in weeks] == [("2025-01-06", 2), ("2025-01-27", 1)]
+
+    pivot = frame.pivot("type", "month")
+    assert pivot == {
+        "index": ["expense", "income"],
+        "columns": ["2025-01", "2025-02"],
+        "values": [[10.29, 500.0], [0.0, 100.0]],
+    }
+
+    assert frame.totals_by("category", TransactionType.expense) == {"Food": 10.29, "Rent": 500.0}
+    assert len(await load_transactions_frame(async_session, group.id, date_from=datetime(2025, 2, 1))) == 2
+
+    # дата без времени в конце периода — весь день, datetime — ровно до этого момента
+    days = frame.group_sum(["day"], None, date(2025, 1, 1), date(2025, 1, 12))
+    assert [(r["day"], r["amount"]) for r in days] == [("2025-01-06", 0.29), ("2025-01-12", 10.0)]
+    assert len(frame.group_sum(["day"], None, None, datetime(2025, 1, 12, 22))) == 1
+    assert len(await load_transactions_frame(async_session, group.id, date_to=date(2025, 1, 12))) == 2
+
+
+def test_top_n_with_other_bucket():
+    items = {"a": 1.0, "b": 5.0, "c": 3.0, "d": 2.0}
+    assert top_n(items, 2) == [("b", 5.0), ("c", 3.0), ("Прочие", 3.0)]
+    assert top_n(items, 4) == [("b", 5.0), ("c", 3.0), ("d", 2.0), ("a", 1.0)]
+    assert top_n({}) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_group_snapshot_refresh(async_session: AsyncSession):
+    user = await create_user(async_session, UserCreate(email="sn@example.com", name="Sam", password="pass1234"))
+    group = await create_group(async_session, GroupCreate(name="Snap", description=""), user.id)
+    food = await create_category(async_session, CategoryCreate(name="Food", icon=None), group.id)
+    user_id, group_id = user.id, group.id
+
+    async def add(amount: float):
+        tx = await create_transaction(async_session, TransactionCreate(
+            group_id=group_id, category_id=food.id, amount=amount,
+            type=TransactionType.expense, description="", date=datetime(2025, 3, 1)
+        ), user_id)
+        return tx.id
+
+    first = await add(1.0)
+    await add(2.0)
+    frame = await get_group_frame(async_session, group_id)
+    assert len(frame) == 2
+
+    # свежий снимок отдаётся без обращения к БД
+    with capture_statements() as statements:
+        assert await get_group_frame(async_session, group_id) is frame
+    assert statements == []
+
+    # запись помечает снимок, при чтении дочитываются только изменённые строки
+    await add(4.0)
+    with capture_statements() as statements:
+        frame = await get_group_frame(async_session, group_id)
+    assert len(frame) == 3
+    assert any("updated_at >=" in statement for statement in statements)
+
+    await update_transaction_by_id(async_session, first, TransactionUpdate(amount=10.0), user_id)
+    frame = await get_group_frame(async_session, group_id)
+    assert frame.totals_by("category", TransactionType.expense) == {"Food": 16.0}
+
+    # удаление не видно по updated_at — группа перечитывается целиком
+    await delete_transaction_by_id(async_session, first, user_id)
+    frame = await get_group_frame(async_session, group_id)
+    assert frame.totals_by("category", TransactionType.expense) == {"Food": 6.0}
+
+    # переименование категории сбрасывает снимок
+    await update_category(async_session, food, CategoryUpdate(name="Groceries"))
+    assert snapshot_cache.get(group_id) is None
+    frame = await get_group_frame(async_session, group_id)
+    assert frame.totals_by("category", TransactionType.expense) == {"Groceries": 6.0}
+
+    # переименования в другом процессе: локальный снимок не сброшен,
+    # но при сверке версии (после check_interval) названия перечитываются
+    later = datetime(2100, 1, 1)
+    await async_session.execute(update(Category).filter(Category.id == food.id).values(name="Market", updated_at=later))
+    await async_session.execute(update(User).filter(User.id == user_id).values(name="Samuel", updated_at=later))
+    await async_session.commit()
+    snapshot_cache.get(group_id).checked_at = 0
+    with capture_statements() as statements:
+        frame = await get_group_frame(async_session, group_id)
+    assert frame.totals_by("category", TransactionType.expense) == {"Market": 6.0}
+    assert frame.totals_by("user", TransactionType.expense) == {"Samuel": 6.0}
+    # без полной перезагрузки: версия, изменённые строки, названия
+    assert len(statements) == 4
+
+
+def test_snapshot_cache_evicts_by_size():
+    rows = [(uuid.uuid4(), uuid.uuid4(), uuid.uuid4(), 100, 0, False) for _ in range(10)]
+    frame = TransactionFrame.from_rows(rows)
+    cache = SnapshotCache(max_bytes=2 * frame.nbytes + 1, check_interval=60)
+    for group_id in ("a", "b", "c"):
+        cache.put(group_id, Snapshot(frame, (0, None)))
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.nbytes == 2 * frame.nbytes
+
+    cache.invalidate("b")
+    assert cache.stats()["groups"] == 1 and cache.nbytes == frame.nbytes
@@ -7,7 +7,7 @@ from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_session_factory
 from app.main import app
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -29,6 +29,7 @@ async def async_client(async_session):
     async def override_get_db():
         yield async_session
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: AsyncSessionLocal
 
     # Используем ASGITransport для работы с FastAPI-приложением
     transport = ASGITransport(app=app)
@@ -131,7 +132,18 @@ async def test_full_flow(async_client):
     assert resp.status_code == 200
     assert any(t["id"] == tx_id for t in resp.json())
 
-    # --- 12) Удаление транзакции ---
+    # --- 12) Вся группа одним запросом ---
+    resp = await async_client.get(f"/api/v1/groups/{group_id}/bootstrap", headers=auth_headers)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["group"]["id"] == group_id
+    assert [(m["user"]["id"], m["role"]) for m in data["members"]] == [(user_id, "admin")]
+    assert [c["id"] for c in data["categories"]] == [category_id]
+    assert [t["id"] for t in data["transactions"]] == [tx_id]
+    assert data["summary"]["total_expense"] == 50.0
+    assert data["summary"]["by_category"] == [{"category_id": category_id, "income": 0.0, "expense": 50.0}]
+
+    # --- 13) Удаление транзакции ---
     resp = await async_client.delete(f"/api/v1/transactions/{tx_id}", headers=auth_headers)
     assert resp.status_code == 204
     resp = await async_client.get(f"/api/v1/transactions/{tx_id}", headers=auth_headers)
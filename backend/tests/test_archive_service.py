@@ -0,0 +1,87 @@
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.db import archive
+from app.db.base import Base, TransactionType
+from app.models.transaction import Transaction
+from app.models.transaction_archive import TransactionArchive
+from app.schemas.category import CategoryCreate
+from app.schemas.group import GroupCreate
+from app.schemas.report import ReportPdfRequest
+from app.schemas.transaction import TransactionCreate
+from app.schemas.user import UserCreate
+from app.services.analytics_service import load_transactions_frame, get_group_frame
+from app.services.archive_service import archive_closed_years
+from app.services.balance_service import check_group_balances
+from app.services.category_service import create_category, delete_category
+from app.services.group_service import create_group
+from app.services.report_service import generate_report_data, generate_report_pdf
+from app.services.transaction_service import create_transaction
+from app.services.user_service import create_user
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@pytest_asyncio.fixture
+async def async_session(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", tmp_path)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_archive_closed_years(async_session: AsyncSession, tmp_path):
+    user = await create_user(async_session, UserCreate(email="ar@example.com", name="Arch", password="pass1234"))
+    group = await create_group(async_session, GroupCreate(name="History", description=""), user.id)
+    old = await create_category(async_session, CategoryCreate(name="Old", icon=None), group.id)
+    food = await create_category(async_session, CategoryCreate(name="Food", icon=None), group.id)
+    group_id, user_id, old_id = group.id, user.id, old.id
+
+    for category, amount, tx_type, day in [
+        (old, 10.25, TransactionType.expense, datetime(2021, 3, 1)),
+        (food, 5.0, TransactionType.expense, datetime(2022, 7, 1)),
+        (food, 100.0, TransactionType.income, datetime(2022, 12, 31, 23)),
+        (food, 7.5, TransactionType.expense, datetime(2025, 1, 10)),
+    ]:
+        await create_transaction(async_session, TransactionCreate(
+            group_id=group_id, category_id=category.id, amount=amount,
+            type=tx_type, description="old" if day.year < 2023 else "", date=day
+        ), user_id)
+    await get_group_frame(async_session, group_id)
+
+    assert await archive_closed_years(async_session, 2023) == 3
+    assert await archive_closed_years(async_session, 2023) == 0
+
+    hot = await async_session.execute(select(func.count()).select_from(Transaction))
+    assert hot.scalar_one() == 1
+    manifest = (await async_session.execute(select(TransactionArchive).order_by(TransactionArchive.year))).scalars().all()
+    assert [(a.year, a.row_count) for a in manifest] == [(2021, 1), (2022, 2)]
+    assert all((tmp_path / a.path).exists() for a in manifest)
+
+    # архивная категория удалена — название сохранилось в файле
+    await delete_category(async_session, old)
+    frame = await get_group_frame(async_session, group_id)
+    assert len(frame) == 4
+    assert frame.totals_by("category", TransactionType.expense) == {"Old": 10.25, "Food": 12.5}
+    assert len(await load_transactions_frame(async_session, group_id, date_from=date(2022, 1, 1))) == 3
+    assert old_id in frame.category_ids
+
+    data = await generate_report_data(async_session, ReportPdfRequest(
+        group_id=group_id, date_from=date(2022, 1, 1), date_to=date(2025, 12, 31)
+    ))
+    assert (data["total_expense"], data["total_income"]) == (12.5, 100.0)
+    path = await generate_report_pdf(async_session, ReportPdfRequest(group_id=group_id))
+    assert path.exists()
+    path.unlink()
+
+    # балансы по-прежнему сходятся с транзакциями с учётом архива
+    assert await check_group_balances(async_session, group_id) == []
@@ -1,13 +1,17 @@
+from datetime import datetime, timedelta
 from uuid import UUID
 
 import pytest
 import pytest_asyncio
 from fastapi import HTTPException
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
-from app.db.base import Base
+from app.db.base import Base, TransactionType
 from app.schemas.category import CategoryCreate, CategoryUpdate
 from app.schemas.group import GroupCreate
+from app.schemas.recurring import RecurringCreate
+from app.schemas.transaction import TransactionCreate
 from app.schemas.user import UserCreate
 from app.services.category_service import (
     create_category,
@@ -16,8 +20,11 @@ from app.services.category_service import (
     update_category,
     delete_category,
     is_category_name_unique,
+    merge_categories,
 )
 from app.services.group_service import create_group
+from app.services.recurring_service import create_recurring, deactivate_recurring
+from app.services.transaction_service import create_transaction, list_transactions
 from app.services.user_service import create_user
 
 # тестовая БД в памяти
@@ -25,6 +32,16 @@ DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 engine = create_async_engine(DATABASE_URL, echo=False)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+# та же схема, но SQLite проверяет внешние ключи, как Postgres
+fk_engine = create_async_engine(DATABASE_URL, echo=False)
+FkSessionLocal = async_sessionmaker(fk_engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@event.listens_for(fk_engine.sync_engine, "connect")
+def _enable_foreign_keys(connection, _):
+    connection.execute("PRAGMA foreign_keys=ON")
+
+
 @pytest_asyncio.fixture
 async def async_session():
     # пересоздаём схему перед каждым тестом
@@ -124,3 +141,76 @@ async def test_delete_category(async_session: AsyncSession):
     # после удаления get вернёт None
     fetched = await get_category_by_id(async_session, category.id)
     assert fetched is None
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_category_with_transactions(async_session: AsyncSession):
+    user = await create_user(async_session,
+        UserCreate(email="mergecat@example.com", name="MergeCat", password="pass1234")
+    )
+    group = await create_group(async_session, GroupCreate(name="Merge Group", description=""), user.id)
+    other = await create_group(async_session, GroupCreate(name="Other Group", description=""), user.id)
+    source = await create_category(async_session, CategoryCreate(name="Food", icon=None), group.id)
+    target = await create_category(async_session, CategoryCreate(name="Meals", icon=None), group.id)
+    alien = await create_category(async_session, CategoryCreate(name="Alien", icon=None), other.id)
+    for amount in (10.0, 20.0):
+        await create_transaction(async_session, TransactionCreate(
+            group_id=group.id, category_id=source.id, amount=amount,
+            type=TransactionType.expense, description="Dup", date=datetime.now()
+        ), user.id)
+
+    # без переноса удалить категорию с транзакциями нельзя
+    with pytest.raises(HTTPException) as err:
+        await delete_category(async_session, source)
+    assert err.value.status_code == 409
+
+    with pytest.raises(HTTPException) as err:
+        await merge_categories(async_session, source, alien.id)
+    assert err.value.status_code == 400
+
+    moved = await merge_categories(async_session, source, target.id)
+    assert moved == 2
+    assert await get_category_by_id(async_session, source.id) is None
+    txs = await list_transactions(async_session, group.id, category_id=target.id)
+    assert len(txs) == 2
+
+
+@pytest_asyncio.fixture
+async def fk_session():
+    async with fk_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with FkSessionLocal() as session:
+        yield session
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_category_with_recurring_templates(fk_session: AsyncSession):
+    db = fk_session
+    user = await create_user(db, UserCreate(email="fkcat@example.com", name="FkCat", password="pass1234"))
+    group = await create_group(db, GroupCreate(name="Fk Group", description=""), user.id)
+    source, target, rent, old = [
+        await create_category(db, CategoryCreate(name=name, icon=None), group.id)
+        for name in ("Food", "Meals", "Rent", "Old")
+    ]
+    templates = {}
+    for category in (source, rent, old):
+        templates[category.id] = await create_recurring(db, group.id, RecurringCreate(
+            category_id=category.id, amount=5, type=TransactionType.expense, description="Monthly",
+            rrule="FREQ=MONTHLY", dtstart=datetime.now() + timedelta(days=1),
+        ), user.id)
+
+    # шаблоны переезжают вместе с транзакциями
+    await merge_categories(db, source, target.id)
+    assert await get_category_by_id(db, source.id) is None
+    await db.refresh(templates[source.id])
+    assert templates[source.id].category_id == target.id
+
+    # активный шаблон не даёт удалить категорию
+    with pytest.raises(HTTPException) as err:
+        await delete_category(db, rent)
+    assert err.value.status_code == 409
+
+    # остановленный шаблон без транзакций удаляется вместе с категорией
+    await deactivate_recurring(db, templates[old.id].id, user.id)
+    await delete_category(db, old)
+    assert await get_category_by_id(db, old.id) is None
@@ -1,12 +1,21 @@
+import asyncio
+from contextlib import contextmanager
+
 import pytest
 import pytest_asyncio
-from sqlalchemy import select
+from fastapi import HTTPException
+from sqlalchemy import select, event, inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
+from app.core.config import settings
 from app.db.base import Base, GroupRole
 from app.models.user_group import UserGroup
+from app.models.category import Category
+from app.schemas.category import CategoryCreate
 from app.schemas.group import GroupCreate, GroupUpdate
 from app.schemas.user import UserCreate
+from app.services import bootstrap_service
+from app.services.bootstrap_service import get_group_bootstrap
 from app.services.group_service import (
     create_group,
     get_group_by_id,
@@ -14,11 +23,13 @@ from app.services.group_service import (
     update_group,
     delete_group,
     add_user_to_group,
+    add_users_to_group,
     remove_user_from_group,
     change_user_role_in_group,
     list_group_members,
     is_user_admin_in_group,
     is_user_member_in_group,
+    group_exists,
 )
 from app.services.user_service import create_user
 
@@ -27,6 +38,20 @@ engine = create_async_engine(DATABASE_URL, echo=False)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
+@contextmanager
+def count_statements():
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+
+
 @pytest_asyncio.fixture
 async def async_session():
     # Сбрасываем и создаём схему перед каждым тестом
@@ -63,6 +88,31 @@ async def test_create_and_get_group(async_session: AsyncSession):
     assert membership.role == GroupRole.admin
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_group_single_commit(async_session: AsyncSession):
+    owner = await create_user(async_session, UserCreate(email="atomic@example.com", name="Atomic", password="pass1234"))
+    grp_in = GroupCreate(
+        name="Atomic Group", description="",
+        categories=[CategoryCreate(name="Food", icon=None), CategoryCreate(name="Rent", icon="home")],
+    )
+
+    with count_statements() as statements:
+        group = await create_group(async_session, grp_in, owner.id)
+        assert [m.id for m in group.members] == [owner.id]
+        assert group.updated_at is not None
+    # только вставки: группа, участник, категории — без перечитывания
+    assert len(statements) == 3
+    assert all(s.lstrip().upper().startswith("INSERT") for s in statements)
+
+    cats = (await async_session.execute(select(Category.name).filter(Category.group_id == group.id))).scalars()
+    assert sorted(cats) == ["Food", "Rent"]
+
+    with pytest.raises(HTTPException):
+        await create_group(async_session, GroupCreate(
+            name="Dup", description="", categories=[CategoryCreate(name="A", icon=None)] * 2
+        ), owner.id)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_list_groups_for_user(async_session: AsyncSession):
     # Новый владелец и группа
@@ -141,4 +191,99 @@ async def test_update_and_delete_group(async_session: AsyncSession):
     await delete_group(async_session, upd, current_user=owner)
     # После soft-delete get_group_by_id должен вернуть None
     fetched = await get_group_by_id(async_session, upd.id)
-    assert fetched is None
\ No newline at end of file
+    assert fetched is None
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_group_loading_strategies(async_session: AsyncSession):
+    owner = await create_user(async_session, UserCreate(email="load@example.com", name="Loader", password="pass1234"))
+    member = await create_user(async_session, UserCreate(email="load2@example.com", name="Loader2", password="pass1234"))
+    group_ids = []
+    for i in range(5):
+        group = await create_group(async_session, GroupCreate(name=f"L{i}", description=""), owner.id)
+        await add_user_to_group(async_session, group.id, member.email)
+        group_ids.append(group.id)
+
+    async with AsyncSessionLocal() as fresh:
+        # все группы и участники всех групп — ровно два запроса
+        with count_statements() as statements:
+            groups = await list_group_by_user(fresh, member.id)
+        assert len(statements) == 2
+        assert {g.id for g in groups} == set(group_ids)
+        assert all({m.id for m in g.members} == {owner.id, member.id} for g in groups)
+        # у участников не загружен хеш пароля
+        assert all("password_hash" in inspect(m).unloaded for g in groups for m in g.members)
+
+    async with AsyncSessionLocal() as fresh:
+        with count_statements() as statements:
+            light = await get_group_by_id(fresh, group_ids[0], with_members=False)
+            assert await group_exists(fresh, group_ids[0])
+        assert len(statements) == 2
+        assert "members" in inspect(light).unloaded
+
+        upd = await update_group(fresh, light, GroupUpdate(name="Renamed"), current_user=owner)
+        assert upd.name == "Renamed"
+        assert {m.id for m in upd.members} == {owner.id, member.id}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_add_users_to_group_bulk(async_session: AsyncSession):
+    owner = await create_user(async_session, UserCreate(
+        email="bulkowner@example.com", name="BulkOwner", password="pass1234"
+    ))
+    users = [
+        await create_user(async_session, UserCreate(
+            email=f"bulk{i}@example.com", name=f"Bulk{i}", password="pass1234"
+        ))
+        for i in range(5)
+    ]
+    group = await create_group(async_session, GroupCreate(name="Bulk Group", description=""), owner.id)
+    await add_user_to_group(async_session, group.id, users[0].email)
+
+    emails = [u.email for u in users] + ["nobody@example.com", users[1].email]
+    with count_statements() as statements:
+        results = await add_users_to_group(async_session, group.id, emails, current_user=owner)
+
+    # group_exists, проверка прав, поиск пользователей, существующие участники, INSERT
+    assert len(statements) == 5
+    assert [r["status"] for r in results] == [
+        "already_member", "added", "added", "added", "added", "not_found"
+    ]
+    members = await list_group_members(async_session, group.id)
+    assert {m.user_id for m in members} == {owner.id, *(u.id for u in users)}
+
+    # участник без прав администратора не может приглашать
+    with pytest.raises(HTTPException) as err:
+        await add_users_to_group(async_session, group.id, ["x@example.com"], current_user=users[0])
+    assert err.value.status_code == 403
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bootstrap_concurrency_and_summary_timeout(async_session: AsyncSession, monkeypatch):
+    user = await create_user(async_session, UserCreate(email="boot@example.com", name="Boot", password="pass1234"))
+    group = await create_group(async_session, GroupCreate(name="Boot", description=""), user.id)
+    running = peak = 0
+
+    async def slow_summary(db, group_id, session_factory):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {}
+
+    monkeypatch.setattr(bootstrap_service, "shared_month_summary", slow_summary)
+    monkeypatch.setattr(bootstrap_service, "_bootstrap_slots", asyncio.Semaphore(2))
+    results = await asyncio.gather(*(get_group_bootstrap(AsyncSessionLocal, group.id) for _ in range(6)))
+    assert all(result["group"].id == group.id for result in results)
+    # одновременно пул занимают не больше двух запросов
+    assert peak == 2
+
+    async def not_ready(db, group_id, session_factory):
+        raise TimeoutError
+
+    monkeypatch.setattr(bootstrap_service, "shared_month_summary", not_ready)
+    monkeypatch.setattr(settings, "SINGLEFLIGHT_TIMEOUT_SECONDS", 2.5)
+    with pytest.raises(HTTPException) as exc:
+        await get_group_bootstrap(AsyncSessionLocal, group.id)
+    assert exc.value.status_code == 503
+    assert exc.value.headers == {"Retry-After": "3"}
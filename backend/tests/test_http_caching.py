@@ -0,0 +1,125 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.core.middleware import accepted_encodings
+from app.db.base import Base
+from app.db.session import get_db
+from app.main import app
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest_asyncio.fixture(scope="function")
+async def async_client(async_session):
+    async def override_get_db():
+        yield async_session
+    app.dependency_overrides[get_db] = override_get_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test", follow_redirects=True) as client:
+        yield client
+
+    app.dependency_overrides.clear()
+
+
+async def login(client: AsyncClient, email: str) -> dict:
+    await client.post("/api/v1/auth/register", json={"email": email, "name": "Cache", "password": "secret123"})
+    resp = await client.post("/api/v1/auth/login", data={"username": email, "password": "secret123"})
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br;q=0.8") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip") == {"gzip"}
+    assert accepted_encodings("") == set()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_conditional_get(async_client):
+    headers = await login(async_client, "etag@example.com")
+    group_id = (await async_client.post(
+        "/api/v1/groups/", json={"name": "Cached", "description": "d"}, headers=headers
+    )).json()["id"]
+
+    urls = [
+        f"/api/v1/groups/{group_id}",
+        f"/api/v1/groups/{group_id}/members",
+        f"/api/v1/groups/{group_id}/categories",
+        f"/api/v1/transactions?group_id={group_id}",
+    ]
+    etags = {}
+    for url in urls:
+        resp = await async_client.get(url, headers=headers)
+        assert resp.status_code == 200
+        etags[url] = resp.headers["etag"]
+
+        resp = await async_client.get(url, headers={**headers, "If-None-Match": etags[url]})
+        assert resp.status_code == 304
+        assert resp.content == b""
+
+    # новая категория и транзакция меняют версии своих списков
+    category_id = (await async_client.post(
+        f"/api/v1/groups/{group_id}/categories", json={"name": "Food", "icon": None}, headers=headers
+    )).json()["id"]
+    await async_client.post("/api/v1/transactions", json={
+        "group_id": group_id, "category_id": category_id, "amount": 10, "type": "expense",
+        "description": "Tea", "date": datetime.now().isoformat(),
+    }, headers=headers)
+
+    for url in urls[2:]:
+        resp = await async_client.get(url, headers={**headers, "If-None-Match": etags[url]})
+        assert resp.status_code == 200
+        assert resp.headers["etag"] != etags[url]
+
+    # другие параметры выборки — другой ETag
+    resp = await async_client.get(
+        f"/api/v1/transactions?group_id={group_id}&limit=5", headers={**headers, "If-None-Match": etags[urls[3]]}
+    )
+    assert resp.status_code == 200
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_large_responses_are_compressed(async_client):
+    headers = await login(async_client, "zip@example.com")
+    group_id = (await async_client.post(
+        "/api/v1/groups/", json={"name": "Zip", "description": "d"}, headers=headers
+    )).json()["id"]
+    for i in range(30):
+        await async_client.post(
+            f"/api/v1/groups/{group_id}/categories", json={"name": f"Category {i}", "icon": "icon"}, headers=headers
+        )
+
+    url = f"/api/v1/groups/{group_id}/categories"
+    resp = await async_client.get(url, headers={**headers, "Accept-Encoding": "br, gzip"})
+    assert resp.headers["content-encoding"] == "br"
+    assert len(resp.json()) == 30
+
+    resp = await async_client.get(url, headers={**headers, "Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+
+    resp = await async_client.get(url, headers={**headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in resp.headers
+
+    # тело зависит от кодировки, поэтому ETag слабый; сравнение в If-None-Match — слабое
+    etag = resp.headers["etag"]
+    assert etag.startswith('W/"')
+    for tag in (etag, etag.removeprefix("W/")):
+        resp = await async_client.get(url, headers={**headers, "Accept-Encoding": "br", "If-None-Match": tag})
+        assert resp.status_code == 304
+        assert resp.headers["etag"] == etag
@@ -0,0 +1,135 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.core.jobs import JobWorker, enqueue, job, retry_delay
+from app.db.base import Base, JobStatus
+from app.models.job import Job
+from app.schemas.group import GroupCreate
+from app.schemas.user import UserCreate
+from app.services import balance_service  # noqa: F401 — регистрирует balances.repair
+from app.services.group_service import create_group
+from app.services.user_service import create_user
+
+
+@job("test.echo")
+async def echo_job(db: AsyncSession, **payload):
+    return payload
+
+
+@job("test.broken", max_attempts=2)
+async def broken_job(db: AsyncSession, **payload):
+    raise RuntimeError("boom")
+
+
+@job("test.single", concurrency=1)
+async def single_job(db: AsyncSession, **payload):
+    return None
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    # файл, а не :memory: — у воркера и обработчиков свои соединения
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/jobs.db", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def _job(factory, job_id) -> Job:
+    async with factory() as db:
+        return await db.get(Job, job_id)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_enqueue_and_run(session_factory):
+    group_id = uuid.uuid4()
+    async with session_factory() as db:
+        queued = await enqueue(db, "test.echo", {"group_id": group_id, "n": 1})
+        with pytest.raises(ValueError):
+            await enqueue(db, "test.missing")
+
+    worker = JobWorker(session_factory)
+    assert await worker.run_once() == 1
+    await worker.join()
+    assert await worker.run_once() == 0
+
+    done = await _job(session_factory, queued.id)
+    assert (done.status, done.attempts, done.locked_by) == (JobStatus.done, 1, None)
+    assert done.result == {"group_id": str(group_id), "n": 1}
+    assert done.finished_at is not None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_retry_with_backoff_then_fail(session_factory):
+    async with session_factory() as db:
+        queued = await enqueue(db, "test.broken")
+    worker = JobWorker(session_factory)
+
+    started = datetime.now(timezone.utc)
+    await worker.run_once()
+    await worker.join()
+    retried = await _job(session_factory, queued.id)
+    assert (retried.status, retried.attempts) == (JobStatus.queued, 1)
+    assert retried.last_error == "RuntimeError: boom"
+    delay = (retried.run_at.replace(tzinfo=timezone.utc) - started).total_seconds()
+    assert retry_delay(1) <= delay < retry_delay(1) + 5
+    # пауза ещё не прошла
+    assert await worker.run_once() == 0
+
+    async with session_factory() as db:
+        await db.execute(update(Job).filter(Job.id == queued.id).values(run_at=started))
+        await db.commit()
+    await worker.run_once()
+    await worker.join()
+    failed = await _job(session_factory, queued.id)
+    assert (failed.status, failed.attempts) == (JobStatus.failed, 2)
+    assert failed.finished_at is not None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_priority_and_concurrency_limit(session_factory):
+    async with session_factory() as db:
+        late = await enqueue(db, "test.echo", priority=5)
+        first = await enqueue(db, "test.single", priority=0)
+        second = await enqueue(db, "test.single", priority=1)
+
+    worker = JobWorker(session_factory)
+    # вторую test.single не берём, пока первая выполняется
+    claimed = await worker.claim(10)
+    assert [row[0] for row in claimed] == [first.id, late.id]
+    assert await worker.claim(10) == []
+
+    other = JobWorker(session_factory, name="other")
+    async with session_factory() as db:
+        # воркер пропал: после истечения блокировки задачу забирает другой
+        await db.execute(update(Job).filter(Job.id == first.id).values(locked_until=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        await db.commit()
+    assert await other.run_once() == 1
+    await other.join()
+    reclaimed = await _job(session_factory, first.id)
+    assert (reclaimed.status, reclaimed.attempts) == (JobStatus.done, 2)
+
+    # запоздалое завершение у прежнего владельца ничего не меняет
+    await worker._update(first.id, status=JobStatus.failed)
+    assert (await _job(session_factory, first.id)).status == JobStatus.done
+    assert [row[0] for row in await other.claim(10)] == [second.id]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_balances_repair_job(session_factory):
+    async with session_factory() as db:
+        user = await create_user(db, UserCreate(email="jobs@example.com", name="Jobs", password="pass1234"))
+        group = await create_group(db, GroupCreate(name="Queue", description=""), user.id)
+        queued = await enqueue(db, "balances.repair", {"group_id": group.id})
+
+    worker = JobWorker(session_factory)
+    await worker.run_once()
+    await worker.join()
+    done = await _job(session_factory, queued.id)
+    assert (done.status, done.result) == (JobStatus.done, {"mismatches": 0})
@@ -0,0 +1,56 @@
+import logging
+import threading
+
+from loguru import logger
+
+from app.utils.logger import ACCESS_LOGGER, SamplingFilter, setup_logging, stop_logging
+
+
+def _capture():
+    messages = []
+    logger.add(lambda msg: messages.append(msg.record), level="DEBUG")
+    return messages
+
+
+def test_sampling_filter_keeps_warnings():
+    sampler = SamplingFilter(0.0)
+    info = logging.LogRecord(ACCESS_LOGGER, logging.INFO, __file__, 1, "GET /", None, None)
+    warning = logging.LogRecord(ACCESS_LOGGER, logging.WARNING, __file__, 1, "GET /", None, None)
+    assert not sampler.filter(info)
+    assert sampler.filter(warning)
+    assert SamplingFilter(1.0).filter(info)
+
+
+def test_enqueued_access_log_is_written_once(tmp_path):
+    setup_logging(str(tmp_path / "app.log"), enqueue=True)
+    messages = _capture()
+
+    logging.getLogger(ACCESS_LOGGER).info("GET /api/v1/groups 200")
+    stop_logging()
+
+    access = [r for r in messages if r["message"] == "GET /api/v1/groups 200"]
+    assert len(access) == 1
+    assert access[0]["name"] == ACCESS_LOGGER
+
+
+def test_enqueued_file_sink_writes_in_background(tmp_path):
+    log_file = tmp_path / "app.log"
+    setup_logging(str(log_file), enqueue=True)
+    # файл пишет поток Loguru, а не вызывающий код
+    assert any(thread.name.startswith("loguru-writer") for thread in threading.enumerate())
+
+    logger.info("native loguru call")
+    stop_logging()
+    assert "native loguru call" in log_file.read_text()
+    setup_logging(str(log_file), enqueue=False)
+
+
+def test_access_sampling_drops_records(tmp_path):
+    setup_logging(str(tmp_path / "app.log"), enqueue=False, access_sample_rate=0.0)
+    messages = _capture()
+
+    logging.getLogger(ACCESS_LOGGER).info("GET /api/v1/groups 200")
+    logging.getLogger("uvicorn.error").info("Started server process")
+
+    assert [r["message"] for r in messages] == ["Started server process"]
+    setup_logging(str(tmp_path / "app.log"), enqueue=False)
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, func, update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.jobs import JobWorker
+from app.db.base import Base, JobStatus, TransactionType
+from app.models.budget import Budget, BudgetSpend
+from app.models.category import Category
+from app.models.group import Group
+from app.models.group_member_balance import GroupMemberBalance
+from app.models.job import Job
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.models.user_group import UserGroup
+from app.schemas.budget import BudgetCreate
+from app.schemas.category import CategoryCreate
+from app.schemas.group import GroupCreate
+from app.schemas.transaction import TransactionCreate
+from app.schemas.user import UserCreate
+from app.services.budget_service import create_budget
+from app.services.category_service import create_category
+from app.services.group_service import create_group, delete_group, add_user_to_group
+from app.services.purge_service import enqueue_purges, purge_user, PURGED_EMAIL_DOMAIN
+from app.services.transaction_service import create_transaction
+from app.services.user_service import create_user, delete_user, get_user_by_email
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PURGE_BATCH_ROWS", 2)
+    monkeypatch.setattr(settings, "PURGE_BATCH_PAUSE_SECONDS", 0)
+    # файл, а не :memory: — у воркера свои соединения
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/purge.db", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    await engine.dispose()
+
+
+async def _age(db: AsyncSession, model: type, *ids) -> None:
+    old = datetime.now() - timedelta(days=settings.PURGE_RETENTION_DAYS + 1)
+    await db.execute(update(model).filter(model.id.in_(ids)).values(deleted_at=old))
+    await db.commit()
+
+
+async def _count(db: AsyncSession, model: type) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_purge_expired_group(session_factory):
+    async with session_factory() as db:
+        user = await create_user(db, UserCreate(email="purge@example.com", name="Purge", password="pass1234"))
+        dead = await create_group(db, GroupCreate(name="Dead", description=""), user.id)
+        alive = await create_group(db, GroupCreate(name="Alive", description=""), user.id)
+        for group in (dead, alive):
+            category = await create_category(db, CategoryCreate(name="Food", icon=None), group.id)
+            await create_budget(db, group.id, BudgetCreate(category_id=category.id, amount=100))
+            for amount in (1, 2, 3):
+                await create_transaction(db, TransactionCreate(
+                    group_id=group.id, category_id=category.id, amount=amount,
+                    type=TransactionType.expense, description="", date=datetime.now()
+                ), user.id)
+        recent = await create_group(db, GroupCreate(name="Recent", description=""), user.id)
+        for group in (dead, recent):
+            await delete_group(db, group, user)
+        await _age(db, Group, dead.id)
+
+        assert await enqueue_purges(db) == 1
+        # задача уже в очереди — повторно не ставится
+        assert await enqueue_purges(db) == 0
+
+    worker = JobWorker(session_factory)
+    assert await worker.run_once() == 1
+    await worker.join()
+
+    async with session_factory() as db:
+        queued = (await db.execute(select(Job))).scalars().one()
+        assert queued.status == JobStatus.done
+        assert queued.result["transactions"] == 3 and queued.result["budgets"] == 1
+        assert set((await db.execute(select(Group.id))).scalars().all()) == {alive.id, recent.id}
+        for model in (Category, Budget, BudgetSpend, GroupMemberBalance):
+            assert await _count(db, model) == 1
+        assert await _count(db, Transaction) == 3
+        assert await _count(db, UserGroup) == 2
+        assert await enqueue_purges(db) == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_purge_user_deletes_or_anonymizes(session_factory):
+    async with session_factory() as db:
+        users = [
+            await create_user(db, UserCreate(email=f"{name}@example.com", name=name, password="pass1234"))
+            for name in ("owner", "guest", "fresh")
+        ]
+        owner, guest, fresh = users
+        group = await create_group(db, GroupCreate(name="Shared", description=""), owner.id)
+        await add_user_to_group(db, group.id, guest.email)
+        for user in users:
+            await delete_user(db, user, user)
+        await _age(db, User, owner.id, guest.id)
+
+        assert await enqueue_purges(db) == 2
+        owner_id, guest_id, fresh_id = owner.id, guest.id, fresh.id
+
+    # purge.user выполняется по одной задаче за раз
+    worker = JobWorker(session_factory)
+    while await worker.run_once():
+        await worker.join()
+
+    async with session_factory() as db:
+        # гость нигде не упоминается — удалён вместе с членством
+        assert await db.get(User, guest_id) is None
+        assert await _count(db, UserGroup) == 0
+        # владелец группы остаётся, но без личных данных
+        anonymized = await db.get(User, owner_id)
+        assert anonymized.email == f"{owner_id.hex}@{PURGED_EMAIL_DOMAIN}"
+        assert (anonymized.name, anonymized.password_hash) == ("deleted", "")
+        assert await get_user_by_email(db, "owner@example.com") is None
+        # удалён недавно — ещё не трогаем
+        assert (await db.get(User, fresh_id)).email == "fresh@example.com"
+        assert await enqueue_purges(db) == 0
+        # активного пользователя purge_user не трогает
+        active = await create_user(db, UserCreate(email="active@example.com", name="active", password="pass1234"))
+        assert await purge_user(db, active.id) is False
+        assert await get_user_by_email(db, "active@example.com") is not None
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.db.base import Base, TransactionType
+from app.models.recurring_transaction import RecurringTransaction
+from app.schemas.category import CategoryCreate
+from app.schemas.group import GroupCreate
+from app.schemas.recurring import RecurringCreate
+from app.schemas.user import UserCreate
+from app.services.balance_service import check_group_balances
+from app.services.category_service import create_category
+from app.services.group_service import create_group
+from app.services.recurring_service import create_recurring, materialize_due, deactivate_recurring
+from app.services.transaction_service import list_transactions
+from app.services.user_service import create_user
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def _setup(db: AsyncSession):
+    user = await create_user(db, UserCreate(email="rec@example.com", name="Rec", password="pass1234"))
+    group = await create_group(db, GroupCreate(name="Flat", description=""), user.id)
+    category = await create_category(db, CategoryCreate(name="Rent", icon=None), group.id)
+    return user, group, category
+
+
+def _template(category, rrule="FREQ=MONTHLY;BYMONTHDAY=1", dtstart=datetime(2025, 1, 1, 9, 0), amount=1000.0):
+    return RecurringCreate(
+        category_id=category.id, amount=amount, type=TransactionType.expense,
+        description="Rent", rrule=rrule, dtstart=dtstart
+    )
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_materialize_is_idempotent_and_catches_up(async_session: AsyncSession):
+    user, group, category = await _setup(async_session)
+    rent = await create_recurring(async_session, group.id, _template(category), user.id)
+    assert rent.next_run_at == datetime(2025, 1, 1, 9, 0)
+
+    # простой с января: догоняем все пропущенные месяцы одним вызовом
+    assert await materialize_due(async_session, now=datetime(2025, 4, 15)) == 4
+    assert await materialize_due(async_session, now=datetime(2025, 4, 15)) == 0
+
+    txs = await list_transactions(async_session, group.id)
+    assert sorted(t.date.month for t in txs) == [1, 2, 3, 4]
+    assert {t.recurring_id for t in txs} == {rent.id}
+
+    # сбой после INSERT, но до сдвига next_run_at: повторный запуск не создаёт дублей
+    await async_session.execute(
+        update(RecurringTransaction)
+        .filter(RecurringTransaction.id == rent.id)
+        .values(next_run_at=datetime(2025, 1, 1, 9, 0))
+    )
+    await async_session.commit()
+    assert await materialize_due(async_session, now=datetime(2025, 4, 15)) == 0
+    await async_session.refresh(rent)
+    assert rent.next_run_at == datetime(2025, 5, 1, 9, 0)
+
+    # созданные транзакции учтены в балансах
+    assert await check_group_balances(async_session, group.id) == []
+
+    await deactivate_recurring(async_session, rent.id, user.id)
+    assert await materialize_due(async_session, now=datetime(2026, 1, 1)) == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_materialize_in_pages(async_session: AsyncSession):
+    user, group, category = await _setup(async_session)
+    for _ in range(5):
+        await create_recurring(async_session, group.id, _template(category, "FREQ=DAILY", amount=1.0), user.id)
+    # конечное правило после последнего повторения выключается
+    finite = await create_recurring(
+        async_session, group.id, _template(category, "FREQ=WEEKLY;COUNT=2", amount=5.0), user.id
+    )
+
+    # 5 шаблонов × 400 дней: страницы по 2 шаблона и не больше 366 повторений за проход
+    created = await materialize_due(async_session, now=datetime(2026, 2, 4, 9, 0), batch_size=2)
+    assert created == 5 * 400 + 2
+    await async_session.refresh(finite)
+    assert finite.is_active is False and finite.next_run_at is None
+
+    with pytest.raises(HTTPException) as err:
+        await create_recurring(async_session, group.id, _template(category, "FREQ=SOMETIMES"), user.id)
+    assert err.value.status_code == 400
@@ -1,5 +1,6 @@
 # tests/test_report_service.py
 
+import asyncio
 from datetime import datetime
 from pathlib import Path
 
@@ -15,7 +16,12 @@ from app.schemas.transaction import TransactionCreate
 from app.schemas.user import UserCreate
 from app.services.category_service import create_category
 from app.services.group_service import create_group
-from app.services.report_service import generate_report_data, generate_report_pdf, get_report_file_path
+from app.services.report_service import (
+    generate_report_data,
+    generate_report_pdf,
+    get_report_file_path,
+    shared_report_data,
+)
 from app.services.transaction_service import create_transaction
 from app.services.user_service import create_user
 
@@ -63,6 +69,21 @@ async def test_generate_report_data(async_session: AsyncSession):
     assert data["total_income"] == 1000
     assert data["total_expense"] == 500
 
+    # одновременные одинаковые запросы считаются одним вычислением в отдельной сессии
+    sessions = []
+
+    def counting_factory():
+        sessions.append(1)
+        return AsyncSessionLocal()
+
+    async def request():
+        async with AsyncSessionLocal() as db:
+            return await shared_report_data(db, req, counting_factory)
+
+    results = await asyncio.gather(*(request() for _ in range(5)))
+    assert len(sessions) == 1
+    assert all(result == data for result in results)
+
 
 @pytest.mark.asyncio(loop_scope="session")
 async def test_generate_report_pdf(async_session: AsyncSession):
@@ -0,0 +1,81 @@
+import uuid
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+
+import orjson
+import pytest
+import pytest_asyncio
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.db.base import Base, TransactionType, GroupRole
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.user_group import UserGroup
+from app.schemas.category import CategoryRead
+from app.schemas.group import GroupCreate, GroupRead, UserGroupRead
+from app.schemas.transaction import TransactionRead
+from app.schemas.user import UserCreate, UserRead
+from app.services.group_service import create_group, list_group_by_user
+from app.services.user_service import create_user
+from app.utils.serialization import encode_models
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+def pydantic_bytes(rows, model) -> bytes:
+    """То, что отдаёт FastAPI: валидация response_model + ORJSONResponse."""
+    adapter = TypeAdapter(list[model])
+    content = adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json")
+    return ORJSONResponse(content).body
+
+
+def test_transactions_match_response_model():
+    group_id, category_id, user_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    stamps = [
+        datetime(2025, 6, 22, 10, 0, tzinfo=timezone.utc),
+        datetime(2025, 6, 22, 10, 0, 0, 123456, tzinfo=timezone(timedelta(hours=3))),
+        datetime(2025, 1, 1),
+    ]
+    rows = [
+        Transaction(
+            id=uuid.uuid4(), group_id=group_id, category_id=category_id, user_id=user_id,
+            amount=amount, type=TransactionType.expense, description="Обед «у Мамы»",
+            date=stamp, created_at=stamp, updated_at=stamp,
+        )
+        for amount, stamp in zip([Decimal("42.50"), Decimal("0.10"), 1000], stamps)
+    ]
+    assert encode_models(rows, TransactionRead) == pydantic_bytes(rows, TransactionRead)
+
+    categories = [
+        Category(id=uuid.uuid4(), group_id=group_id, name="Food", icon=None, created_at=stamps[0]),
+        Category(id=uuid.uuid4(), group_id=group_id, name="Еда", icon="🍔", created_at=stamps[2]),
+    ]
+    assert encode_models(categories, CategoryRead) == pydantic_bytes(categories, CategoryRead)
+
+    members = [UserGroup(id=uuid.uuid4(), user_id=user_id, group_id=group_id, role=GroupRole.admin, joined_at=stamps[1])]
+    assert encode_models(members, UserGroupRead) == pydantic_bytes(members, UserGroupRead)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_groups_with_members_match_response_model(async_session: AsyncSession):
+    owner = await create_user(async_session, UserCreate(email="ser@example.com", name="Serial", password="pass1234"))
+    await create_group(async_session, GroupCreate(name="G1", description="first"), owner.id)
+    await create_group(async_session, GroupCreate(name="G2", description="second"), owner.id)
+
+    groups = await list_group_by_user(async_session, owner.id)
+    assert encode_models(groups, GroupRead) == pydantic_bytes(groups, GroupRead)
+    assert encode_models([owner], UserRead) == pydantic_bytes([owner], UserRead)
+    assert orjson.loads(encode_models([], GroupRead)) == []
@@ -0,0 +1,125 @@
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.db.base import Base
+from app.db.session import get_db, get_session_factory
+from app.db.shards import ShardRouter, get_shard_router
+from app.main import app
+from app.models.group import Group
+from app.models.user import User
+
+
+def test_ring_moves_few_groups_to_new_shard():
+    three = ShardRouter([None, None, None])
+    four = ShardRouter([None, None, None, None])
+    ids = [uuid.UUID(int=i * 7919 + 1) for i in range(3000)]
+
+    before = [three.shard_for(group_id) for group_id in ids]
+    assert before == [three.shard_for(group_id) for group_id in ids]
+    assert all(before.count(shard) > 600 for shard in range(3))
+
+    # при добавлении шарда группы переезжают только на новый шард
+    moved = [(old, four.shard_for(group_id)) for old, group_id in zip(before, ids) if four.shard_for(group_id) != old]
+    assert all(new == 3 for _, new in moved)
+    assert 450 < len(moved) < 1050
+
+
+@pytest_asyncio.fixture
+async def shards(tmp_path):
+    factories = []
+    for shard in range(3):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/shard{shard}.db", echo=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        info = {"shard": shard} if shard else {}
+        factories.append(async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession, info=info))
+    yield ShardRouter(factories)
+    for factory in factories:
+        await factory.kw["bind"].dispose()
+
+
+@pytest_asyncio.fixture
+async def async_client(shards):
+    async def override_get_db():
+        async with shards.factories[0]() as session:
+            yield session
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: shards.factories[0]
+    app.dependency_overrides[get_shard_router] = lambda: shards
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test", follow_redirects=True) as client:
+        yield client
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_groups_are_routed_to_shards(async_client: AsyncClient, shards: ShardRouter):
+    for email, name in [("alice@example.com", "Alice"), ("bob@example.com", "Bob")]:
+        resp = await async_client.post("/api/v1/auth/register", json={"email": email, "name": name, "password": "secret123"})
+        assert resp.status_code == 201
+    resp = await async_client.post("/api/v1/auth/login", data={"username": "alice@example.com", "password": "secret123"})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    alice_id = (await async_client.get("/api/v1/users/me", headers=headers)).json()["id"]
+
+    # создаём группы, пока на каждом шарде не окажется хотя бы одна
+    by_shard: dict[int, list[str]] = {}
+    while len(by_shard) < 3:
+        resp = await async_client.post("/api/v1/groups/", json={"name": "Trip", "description": ""}, headers=headers)
+        assert resp.status_code == 201
+        group_id = resp.json()["id"]
+        by_shard.setdefault(shards.shard_for(uuid.UUID(group_id)), []).append(group_id)
+
+    # строка группы лежит только в базе своего шарда
+    for shard, factory in enumerate(shards.factories):
+        async with factory() as db:
+            stored = set(map(str, (await db.execute(select(Group.id))).scalars().all()))
+        assert stored == set(by_shard[shard])
+
+    # список групп собирается со всех шардов
+    resp = await async_client.get("/api/v1/groups/", headers=headers)
+    assert sorted(g["id"] for g in resp.json()) == sorted(sum(by_shard.values(), []))
+
+    group_id = by_shard[2][0]
+    resp = await async_client.post(f"/api/v1/groups/{group_id}/members", json={"email": "bob@example.com"})
+    assert resp.status_code == 201
+    resp = await async_client.get(f"/api/v1/groups/{group_id}/members", headers=headers)
+    assert len(resp.json()) == 2
+
+    resp = await async_client.post(f"/api/v1/groups/{group_id}/categories", json={"name": "Food", "icon": None}, headers=headers)
+    assert resp.status_code == 201
+    category_id = resp.json()["id"]
+    resp = await async_client.post("/api/v1/transactions", json={
+        "group_id": group_id, "category_id": category_id, "amount": 12.5,
+        "type": "expense", "description": "Lunch", "date": datetime.now().isoformat(),
+    }, headers=headers)
+    assert resp.status_code == 201
+    tx_id = resp.json()["id"]
+
+    # по id транзакции и категории шард находится без группы в запросе
+    resp = await async_client.get(f"/api/v1/transactions/{tx_id}", headers=headers)
+    assert resp.status_code == 200 and resp.json()["amount"] == 12.5
+    resp = await async_client.patch(f"/api/v1/categories/{category_id}", json={"name": "Meals"}, headers=headers)
+    assert resp.status_code == 200
+    resp = await async_client.get("/api/v1/transactions", params={"group_id": group_id}, headers=headers)
+    assert [t["id"] for t in resp.json()] == [tx_id]
+    resp = await async_client.get(f"/api/v1/groups/{group_id}/bootstrap", headers=headers)
+    assert resp.json()["summary"]["total_expense"] == 12.5
+    assert sorted(m["user"]["name"] for m in resp.json()["members"]) == ["Alice", "Bob"]
+    resp = await async_client.get(f"/api/v1/transactions/{uuid.uuid4()}", headers=headers)
+    assert resp.status_code == 404
+
+    # переименование пользователя доходит до его копий на шардах, пароль туда не копируется
+    resp = await async_client.patch(f"/api/v1/users/{alice_id}", json={"name": "Alicia"}, headers=headers)
+    assert resp.status_code == 200
+    async with shards.factories[2]() as db:
+        alice = await db.get(User, uuid.UUID(alice_id))
+    assert (alice.name, alice.password_hash) == ("Alicia", "")
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"total": calls}
+
+    results = await asyncio.gather(*(flights.do("k", compute) for _ in range(10)))
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert len(flights) == 0
+
+    # результат не кэшируется
+    assert await flights.do("k", compute) == {"total": 2}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_errors_are_shared_and_not_cached():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+    assert [type(r) for r in results] == [ValueError, ValueError]
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cancel_and_timeout_of_one_waiter():
+    flights = SingleFlight()
+    started = asyncio.Event()
+    finish = asyncio.Event()
+    cancelled = False
+
+    async def compute():
+        nonlocal cancelled
+        started.set()
+        try:
+            await finish.wait()
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        return 42
+
+    first = asyncio.create_task(flights.do("k", compute))
+    second = asyncio.create_task(flights.do("k", compute))
+    await started.wait()
+
+    # отмена одного ожидающего не трогает общее вычисление
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    with pytest.raises(TimeoutError):
+        await flights.do("k", compute, timeout=0.01)
+    finish.set()
+    assert await second == 42
+    assert not cancelled
+
+    # последний ожидающий ушёл — вычисление отменяется
+    finish.clear()
+    started.clear()
+    lone = asyncio.create_task(flights.do("k", compute))
+    await started.wait()
+    lone.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await lone
+    await asyncio.sleep(0)
+    assert cancelled
+    assert len(flights) == 0
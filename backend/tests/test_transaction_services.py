@@ -1,14 +1,15 @@
 from datetime import datetime, timedelta
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
 import pytest_asyncio
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 
 from app.db.base import Base, TransactionType, GroupRole
 from app.schemas.category import CategoryCreate
 from app.schemas.group import GroupCreate
-from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionBatch, TransactionFilter
 from app.schemas.user import UserCreate
 from app.services.category_service import create_category
 from app.services.group_service import create_group, add_user_to_group, change_user_role_in_group
@@ -18,7 +19,11 @@ from app.services.transaction_service import (
     list_transactions,
     update_transaction,
     delete_transaction,
-    check_transaction_permission
+    check_transaction_permission,
+    update_transaction_by_id,
+    delete_transaction_by_id,
+    batch_transactions,
+    search_transactions,
 )
 from app.services.user_service import create_user
 
@@ -129,3 +134,125 @@ async def test_transaction_permission(async_session: AsyncSession):
     # Promote to admin
     await change_user_role_in_group(async_session, group.id, other.id, new_role=GroupRole.admin, current_user=owner)
     assert await check_transaction_permission(async_session, tx, other.id) == True
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_guarded_update_and_delete(async_session: AsyncSession):
+    owner = await create_user(async_session, UserCreate(email="guard1@example.com", name="Guard1", password="pass1234"))
+    other = await create_user(async_session, UserCreate(email="guard2@example.com", name="Guard2", password="pass1234"))
+    group = await create_group(async_session, GroupCreate(name="Guard Group", description=""), owner.id)
+    foreign = await create_group(async_session, GroupCreate(name="Foreign", description=""), other.id)
+    category = await create_category(async_session, CategoryCreate(name="Misc", icon=""), group.id)
+    foreign_cat = await create_category(async_session, CategoryCreate(name="Alien", icon=""), foreign.id)
+    tx = await create_transaction(async_session, TransactionCreate(
+        group_id=group.id, category_id=category.id,
+        amount=30.0, type=TransactionType.expense, description="Test", date=datetime.now()
+    ), owner.id)
+
+    with pytest.raises(HTTPException) as err:
+        await update_transaction_by_id(async_session, uuid4(), TransactionUpdate(amount=1.0), owner.id)
+    assert err.value.status_code == 404
+
+    with pytest.raises(HTTPException) as err:
+        await update_transaction_by_id(async_session, tx.id, TransactionUpdate(amount=1.0), other.id)
+    assert err.value.status_code == 403
+
+    with pytest.raises(HTTPException) as err:
+        await update_transaction_by_id(async_session, tx.id, TransactionUpdate(category_id=foreign_cat.id), owner.id)
+    assert err.value.status_code == 400
+
+    # администратор группы может менять чужие транзакции
+    await add_user_to_group(async_session, group.id, other.email, role=GroupRole.admin)
+    updated = await update_transaction_by_id(async_session, tx.id, TransactionUpdate(amount=35.0), other.id)
+    assert updated.amount == 35.0
+
+    with pytest.raises(HTTPException) as err:
+        await delete_transaction_by_id(async_session, uuid4(), owner.id)
+    assert err.value.status_code == 404
+
+    await delete_transaction_by_id(async_session, tx.id, other.id)
+    assert await get_transaction_by_id(async_session, tx.id) is None
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_batch_transactions(async_session: AsyncSession):
+    admin = await create_user(async_session, UserCreate(email="batch1@example.com", name="Batch1", password="pass1234"))
+    member = await create_user(async_session, UserCreate(email="batch2@example.com", name="Batch2", password="pass1234"))
+    outsider = await create_user(async_session, UserCreate(email="batch3@example.com", name="Batch3", password="pass1234"))
+    group = await create_group(async_session, GroupCreate(name="Batch Group", description=""), admin.id)
+    await add_user_to_group(async_session, group.id, member.email)
+    food = await create_category(async_session, CategoryCreate(name="Food", icon=""), group.id)
+    misc = await create_category(async_session, CategoryCreate(name="Misc", icon=""), group.id)
+    dt = datetime(2025, 3, 1, 12, 0)
+    txs = []
+    for author in (admin, admin, member):
+        txs.append(await create_transaction(async_session, TransactionCreate(
+            group_id=group.id, category_id=food.id, amount=10.0,
+            type=TransactionType.expense, description="Batch", date=dt
+        ), author.id))
+
+    with pytest.raises(HTTPException) as err:
+        await batch_transactions(async_session, group.id, TransactionBatch(op="delete", filter=TransactionFilter()), outsider.id)
+    assert err.value.status_code == 403
+
+    # участник затрагивает только свои транзакции
+    affected = await batch_transactions(async_session, group.id, TransactionBatch(
+        op="set_category", filter=TransactionFilter(category_id=food.id), category_id=misc.id
+    ), member.id)
+    assert affected == 1
+
+    affected = await batch_transactions(async_session, group.id, TransactionBatch(
+        op="shift_date", ids=[txs[0].id, txs[1].id], days=2
+    ), admin.id)
+    assert affected == 2
+    shifted = await get_transaction_by_id(async_session, txs[0].id)
+    await async_session.refresh(shifted)
+    assert shifted.date.replace(tzinfo=None) == dt + timedelta(days=2)
+
+    affected = await batch_transactions(async_session, group.id, TransactionBatch(
+        op="set_type", filter=TransactionFilter(date_from=dt + timedelta(days=1)), type=TransactionType.income
+    ), admin.id)
+    assert affected == 2
+
+    affected = await batch_transactions(async_session, group.id, TransactionBatch(op="delete", filter=TransactionFilter()), admin.id)
+    assert affected == 3
+    assert await list_transactions(async_session, group.id) == []
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_search_transactions(async_session: AsyncSession):
+    user = await create_user(async_session, UserCreate(email="search@example.com", name="Search", password="pass1234"))
+    group = await create_group(async_session, GroupCreate(name="Search Group", description=""), user.id)
+    other = await create_group(async_session, GroupCreate(name="Other Search", description=""), user.id)
+    category = await create_category(async_session, CategoryCreate(name="Food", icon=""), group.id)
+    other_cat = await create_category(async_session, CategoryCreate(name="Food", icon=""), other.id)
+    for gid, cat_id, description in (
+        (group.id, category.id, "Starbucks coffee"),
+        (group.id, category.id, "Coffee beans, coffee filters"),
+        (group.id, category.id, "Кофе у метро"),
+        (group.id, category.id, "Taxi"),
+        (other.id, other_cat.id, "Coffee"),
+    ):
+        await create_transaction(async_session, TransactionCreate(
+            group_id=gid, category_id=cat_id, amount=5.0,
+            type=TransactionType.expense, description=description, date=datetime.now()
+        ), user.id)
+
+    # префиксный поиск, самые релевантные — первыми, постранично по курсору
+    page, cursor = await search_transactions(async_session, group.id, "coff", limit=1)
+    assert [t.description for t in page] == ["Coffee beans, coffee filters"]
+    page, cursor = await search_transactions(async_session, group.id, "coff", limit=1, cursor=cursor)
+    assert [t.description for t in page] == ["Starbucks coffee"]
+    assert cursor is None
+
+    page, _ = await search_transactions(async_session, group.id, "КОФЕ")
+    assert [t.description for t in page] == ["Кофе у метро"]
+
+    # индекс следует за изменениями описания и удалением
+    taxi = (await search_transactions(async_session, group.id, "taxi"))[0][0]
+    await update_transaction_by_id(async_session, taxi.id, TransactionUpdate(description="Uber"), user.id)
+    assert (await search_transactions(async_session, group.id, "taxi"))[0] == []
+    assert len((await search_transactions(async_session, group.id, "uber"))[0]) == 1
+    await delete_transaction_by_id(async_session, taxi.id, user.id)
+    assert (await search_transactions(async_session, group.id, "uber"))[0] == []
+
+    with pytest.raises(HTTPException) as err:
+        await search_transactions(async_session, group.id, "coffee", cursor="garbage")
+    assert err.value.status_code == 400
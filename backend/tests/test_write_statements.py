@@ -0,0 +1,150 @@
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport
+from httpx import AsyncClient
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+
+from app.db.base import Base
+from app.db.session import get_db
+from app.main import app
+from app.models.transaction import Transaction
+
+DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+engine = create_async_engine(DATABASE_URL, echo=False)
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@pytest_asyncio.fixture
+async def async_session():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest_asyncio.fixture(scope="function")
+async def async_client(async_session):
+    async def override_get_db():
+        yield async_session
+    app.dependency_overrides[get_db] = override_get_db
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test", follow_redirects=True) as client:
+        yield client
+
+    app.dependency_overrides.clear()
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    event.listen(engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", on_execute)
+
+
+def assert_write_is_last(statements: list[str], expected: int):
+    """Запись — последний запрос: после INSERT/UPDATE ... RETURNING ничего не перечитывается."""
+    assert len(statements) == expected, statements
+    assert statements[-1] in ("INSERT", "UPDATE"), statements
+
+
+def test_eager_defaults_kept_by_mapper_overrides():
+    # __mapper_args__ модели дополняет настройки Base, а не заменяет их
+    assert inspect(Transaction).eager_defaults is True
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_write_endpoints_statement_count(async_client):
+    with count_statements() as statements:
+        resp = await async_client.post(
+            "/api/v1/auth/register", json={"email": "w@example.com", "name": "Writer", "password": "secret123"}
+        )
+    assert resp.status_code == 201 and resp.json()["created_at"]
+    # проверка email + INSERT
+    assert_write_is_last(statements, 2)
+
+    with count_statements() as statements:
+        resp = await async_client.post(
+            "/api/v1/users/", json={"email": "w2@example.com", "name": "Writer2", "password": "secret123"}
+        )
+    assert resp.status_code == 201
+    assert_write_is_last(statements, 1)
+
+    token = (await async_client.post(
+        "/api/v1/auth/login", data={"username": "w@example.com", "password": "secret123"}
+    )).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = (await async_client.get("/api/v1/users/me", headers=headers)).json()["id"]
+
+    with count_statements() as statements:
+        resp = await async_client.patch(f"/api/v1/users/{user_id}", json={"name": "Renamed"}, headers=headers)
+    assert resp.status_code == 200 and resp.json()["name"] == "Renamed"
+    # текущий пользователь, целевой пользователь, UPDATE
+    assert_write_is_last(statements, 3)
+
+    group_id = (await async_client.post(
+        "/api/v1/groups/", json={"name": "W", "description": ""}, headers=headers
+    )).json()["id"]
+
+    with count_statements() as statements:
+        resp = await async_client.post(
+            f"/api/v1/groups/{group_id}/categories", json={"name": "Food", "icon": None}, headers=headers
+        )
+    assert resp.status_code == 201 and resp.json()["created_at"]
+    # пользователь, членство, уникальность имени, INSERT
+    assert_write_is_last(statements, 4)
+    category_id = resp.json()["id"]
+
+    with count_statements() as statements:
+        resp = await async_client.patch(f"/api/v1/categories/{category_id}", json={"name": "Meals"}, headers=headers)
+    assert resp.status_code == 200
+    # пользователь, категория, членство, уникальность имени, UPDATE
+    assert_write_is_last(statements, 5)
+
+    with count_statements() as statements:
+        resp = await async_client.post("/api/v1/transactions", json={
+            "group_id": group_id, "category_id": category_id, "amount": 10, "type": "expense",
+            "description": "Tea", "date": datetime.now().isoformat(),
+        }, headers=headers)
+    assert resp.status_code == 201 and resp.json()["updated_at"]
+    # пользователь, членство и категория (эндпоинт и сервис), upsert баланса и бюджетов, INSERT
+    assert_write_is_last(statements, 8)
+    tx_id = resp.json()["id"]
+
+    with count_statements() as statements:
+        resp = await async_client.patch(f"/api/v1/transactions/{tx_id}", json={"amount": 12}, headers=headers)
+    assert resp.status_code == 200 and resp.json()["amount"] == 12
+    # пользователь, перенос разницы в баланс и бюджеты (снять старое, добавить новое)
+    # и UPDATE ... WHERE <автор или админ группы> RETURNING
+    assert_write_is_last(statements, 5)
+
+    with count_statements() as statements:
+        resp = await async_client.delete(f"/api/v1/transactions/{tx_id}", headers=headers)
+    assert resp.status_code == 204
+    assert statements == ["SELECT", "INSERT", "INSERT", "DELETE"]
+
+    with count_statements() as statements:
+        resp = await async_client.delete(f"/api/v1/transactions/{tx_id}", headers=headers)
+    assert resp.status_code == 404
+    # отказ объясняется одним дополнительным запросом
+    assert statements == ["SELECT", "INSERT", "INSERT", "DELETE", "SELECT"]
+
+    with count_statements() as statements:
+        resp = await async_client.post(
+            f"/api/v1/groups/{group_id}/members", json={"email": "w2@example.com", "role": "member"}
+        )
+    assert resp.status_code == 201 and resp.json()["joined_at"]
+    # группа, пользователь, существующее членство, INSERT
+    assert_write_is_last(statements, 4)